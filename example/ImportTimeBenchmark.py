@@ -0,0 +1,53 @@
+""" Check the time of importing the main fealpy packages
+
+Usage: python ImportTimeBenchmark.py [budget] [repeat]
+
+Every import is done in a new interpreter, the best of `repeat` runs is
+compared with `budget` (in seconds), and the heavy optional packages, which
+should only be imported when they are used, must not have been loaded.
+"""
+import sys
+import subprocess
+
+budget = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+modules = ['fealpy', 'fealpy.mesh', 'fealpy.quadrature',
+        'fealpy.functionspace', 'fealpy.solver', 'fealpy.fem', 'fealpy.vem']
+heavy = ['matplotlib', 'pyamg', 'vtk', 'tvtk', 'mumps',
+        'mayavi', 'meshio']
+
+code = """
+import sys
+import warnings
+warnings.simplefilter('ignore')
+from timeit import default_timer as timer
+start = timer()
+import {0}
+end = timer()
+print(end - start)
+print(' '.join(m for m in {1} if m in sys.modules))
+"""
+
+def import_time(module):
+    t = []
+    for i in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code.format(module, heavy)],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                check=True, universal_newlines=True).stdout.split('\n')
+        t.append(float(out[0]))
+    return min(t), out[1].split()
+
+failed = False
+print("{:24s} {:>10s}   {}".format('module', 'time (s)', 'heavy modules loaded'))
+for module in modules:
+    t, loaded = import_time(module)
+    print("{:24s} {:10.4f}   {}".format(module, t, ' '.join(loaded)))
+    if loaded:
+        failed = True
+
+t, loaded = import_time(', '.join(modules))
+print("{:24s} {:10.4f}   {}".format('all', t, ' '.join(loaded)))
+
+assert not failed, "Heavy optional packages are imported at startup!"
+assert t <= budget, "Import time {:.4f}s is over the budget {}s!".format(t, budget)
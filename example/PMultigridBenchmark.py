@@ -0,0 +1,64 @@
+""" Compare the p-multigrid preconditioner `HOFEMFastSovler` with the AMG of
+the whole matrix for the Poisson problem with the Lagrange elements of degree
+2, ..., 5
+
+Usage: python PMultigridBenchmark.py [n] [pmax]
+
+The mesh is the unit square refined `n` times. For each degree the setup
+time, the solve time and the number of the CG iterations to the relative
+residual 1e-10 are printed.
+"""
+import sys
+import numpy as np
+from scipy.sparse import spdiags
+from timeit import default_timer as timer
+
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+from fealpy.fem.doperator import stiff_matrix, stiff_operator
+from fealpy.solver.hofsolver import HOFEMFastSovler
+from fealpy.solver import AMGSolver
+
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+pmax = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+pde = CosCosData()
+mesh = pde.init_mesh(n)
+
+print('{:>2} {:>8} {:>22} {:>8} {:>8} {:>5}'.format('p', 'gdof', 'solver',
+    'setup', 'solve', 'iter'))
+for p in range(2, pmax+1):
+    space = LagrangeFiniteElementSpace(mesh, p)
+    integrator = mesh.integrator(p+2)
+    measure = mesh.area()
+    gdof = space.number_of_global_dofs()
+    isBdDof = space.boundary_dof()
+
+    A = stiff_matrix(space, integrator, measure)
+    bdIdx = np.zeros(gdof, dtype=np.int)
+    bdIdx[isBdDof] = 1
+    Tbd = spdiags(bdIdx, 0, gdof, gdof)
+    T = spdiags(1-bdIdx, 0, gdof, gdof)
+    A = (T@A@T + Tbd).tocsr()
+    Aop = stiff_operator(space, integrator, measure, isBdDof=isBdDof)
+
+    b = np.random.rand(gdof)
+    b[isBdDof] = 0
+
+    for name, M, smoother in [('pmg gs', A, 'gs'), ('pmg jacobi', A, 'jacobi'),
+            ('pmg chebyshev', A, 'chebyshev'),
+            ('pmg chebyshev (free)', Aop, 'chebyshev')]:
+        solver = HOFEMFastSovler(M, space, integrator, measure, smoother=smoother)
+        start = timer()
+        x = solver.solve(b, tol=1e-10)
+        end = timer()
+        print('{:2d} {:8d} {:>22} {:8.3f} {:8.3f} {:5d}'.format(p, gdof, name,
+            solver.setupTime, end - start, solver.niter))
+
+    amg = AMGSolver()
+    start = timer()
+    amg.setup(A)
+    end = timer()
+    x = amg.solve(b, tol=1e-10, accel='cg')
+    print('{:2d} {:8d} {:>22} {:8.3f} {:8.3f} {:5d}'.format(p, gdof, 'amg',
+        end - start, timer() - end, len(amg.residuals) - 1))
@@ -8,6 +8,7 @@ from fealpy.fem.PoissonFEMModel import PoissonFEMModel
 from fealpy.recovery import FEMFunctionRecoveryAlg
 from fealpy.mesh.adaptive_tools import mark
 from fealpy.quadrature  import TriangleQuadrature
+from fealpy.common import Checkpoint
 
 from mpl_toolkits.mplot3d import Axes3D
 from fealpy.tools.show import showmultirate
@@ -46,7 +47,17 @@ Ndof = np.zeros((maxit,), dtype=np.int)
 errorMatrix = np.zeros((len(errorType), maxit), dtype=np.float)
 integrator = mesh.integrator(7)
 
-for i in range(maxit):
+# restart from the last checkpoint if there is one
+checkpoint = Checkpoint('checkpoint', interval=600)
+start = 0
+data = checkpoint.load()
+if data is not None:
+    mesh, _, state = data
+    start = state['step'] + 1
+    Ndof[:start] = state['Ndof'][:start]
+    errorMatrix[:, :start] = state['errorMatrix'][:, :start]
+
+for i in range(start, maxit):
     print('step:', i)
     fem = PoissonFEMModel(pde, mesh, p, integrator)
     fem.solve()
@@ -62,6 +73,8 @@ for i in range(maxit):
     if i < maxit - 1:
         markedCell = mark(eta,theta=theta)
         mesh.bisect(markedCell)
+        checkpoint.save(i, mesh, state={'step':i, 'm':m, 'p':p, 'theta':theta,
+            'Ndof':Ndof, 'errorMatrix':errorMatrix})
 
 mesh.add_plot(plt, cellcolor='w')
 
@@ -0,0 +1,62 @@
+""" Compare the orderings of `mesh.reorder` on the P1 stiffness matrix of a
+randomly numbered triangle mesh
+
+Usage: python ReorderBenchmark.py [n] [repeat]
+
+The mesh is the unit square refined uniformly `n` times (2*4**n cells), its
+nodes and cells are shuffled, and then reordered by 'rcm', 'hilbert' and
+'morton'. For each ordering the best of `repeat` runs of the assembly and of
+the matrix-vector product are printed with the bandwidth of the matrix.
+"""
+import sys
+import numpy as np
+from timeit import default_timer as timer
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+from fealpy.fem.doperator import stiff_matrix
+
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+def init_mesh(n):
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    mesh = TriangleMesh(node, cell)
+    mesh.uniform_refine(n)
+    NN = mesh.number_of_nodes()
+    NC = mesh.number_of_cells()
+    rng = np.random.default_rng(0)
+    mesh.renumber(rng.permutation(NN), rng.permutation(NC))
+    return mesh
+
+def best_time(f, *args):
+    t = []
+    for i in range(repeat):
+        start = timer()
+        val = f(*args)
+        t.append(timer() - start)
+    return min(t), val
+
+results = []
+for method in ['random', 'rcm', 'hilbert', 'morton']:
+    mesh = init_mesh(n)
+    if method != 'random':
+        mesh.reorder(method)
+    space = LagrangeFiniteElementSpace(mesh, 1)
+    integrator = mesh.integrator(3)
+    measure = mesh.area()
+    t0, A = best_time(stiff_matrix, space, integrator, measure)
+    x = np.random.rand(A.shape[0])
+    t1, _ = best_time(A.dot, x)
+    I, J = A.nonzero()
+    results.append((method, mesh.number_of_cells(), t0, 1000*t1, np.max(np.abs(I - J))))
+
+print('{:8s} {:>9s} {:>12s} {:>10s} {:>10s}'.format('ordering', 'cells',
+    'assembly(s)', 'A@x(ms)', 'bandwidth'))
+for r in results:
+    print('{:8s} {:9d} {:12.3f} {:10.3f} {:10d}'.format(*r))
@@ -0,0 +1,63 @@
+""" Compare `unique_row`, which sorts the rows as `np.void` bytes, with
+`unique_row_int`, which sorts one packed int64 key per row, on the edges of
+a triangle mesh and on the faces and the edges of a tetrahedron mesh
+
+Usage: python UniqueRowBenchmark.py [n2] [n3] [repeat]
+
+The triangle mesh is the unit square with `n2 x n2` squares cut into two
+triangles, the tetrahedron mesh is the unit cube of 6 tetrahedra refined
+uniformly `n3` times. The best of `repeat` runs is printed. The two
+functions must find the same number of entities, though `unique_row` orders
+them by their bytes and `unique_row_int` lexicographically.
+"""
+import sys
+import numpy as np
+from timeit import default_timer as timer
+
+from fealpy.mesh.simple_mesh_generator import rectangledomainmesh
+from fealpy.mesh.TetrahedronMesh import TetrahedronMesh
+from fealpy.mesh.mesh_tools import unique_row, unique_row_int
+
+n2 = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+n3 = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+def best_time(f, *args):
+    t = []
+    for i in range(repeat):
+        start = timer()
+        val = f(*args)
+        t.append(timer() - start)
+    return min(t), val
+
+def compare(name, NC, entities, NN):
+    t0 = 0
+    t1 = 0
+    for a in entities:
+        a = np.sort(a, axis=1)
+        s0, (b0, i0, j0) = best_time(unique_row, a)
+        s1, (b1, i1, j1) = best_time(unique_row_int, a, NN)
+        assert (len(i0) == len(i1)) and np.all(b0[j0] == a) and np.all(b1[j1] == a)
+        t0 += s0
+        t1 += s1
+    print('{:12s} {:9d} {:>12s} {:10.3f} {:10.3f} {:8.2f}'.format(name, NC,
+        '+'.join(str(a.shape[1]) for a in entities), t0, t1, t0/t1))
+
+print('{:12s} {:>9s} {:>12s} {:>10s} {:>10s} {:>8s}'.format('mesh', 'cells',
+    'entity size', 'unique_row', '_int', 'speedup'))
+
+mesh = rectangledomainmesh([0, 1, 0, 1], nx=n2, ny=n2)
+ds = mesh.ds
+compare('triangle', ds.NC, [ds.cell[:, ds.localEdge].reshape(-1, 2)], ds.NN)
+
+node = np.array([
+    (0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0), (0.0, 1.0, 0.0),
+    (0.0, 0.0, 1.0), (1.0, 0.0, 1.0), (1.0, 1.0, 1.0), (0.0, 1.0, 1.0)],
+    dtype=np.float64)
+cell = np.array([
+    (0, 1, 2, 6), (0, 5, 1, 6), (0, 4, 5, 6),
+    (0, 7, 4, 6), (0, 3, 7, 6), (0, 2, 3, 6)], dtype=np.int_)
+mesh = TetrahedronMesh(node, cell)
+mesh.uniform_refine(n3)
+ds = mesh.ds
+compare('tetrahedron', ds.NC, [ds.total_face(), ds.total_edge()], ds.NN)
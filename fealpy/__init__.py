@@ -1,3 +1,18 @@
 """FEALPy: Finite Element Analysis Library in Python
 ====
 """
+import importlib
+
+# The subpackages are imported on first use, so `import fealpy` is cheap and
+# `fealpy.mesh` only pulls in what the mesh needs
+subpackages = {'boundarycondition', 'common', 'fdm', 'fem', 'functionspace',
+        'geometry', 'graph', 'mesh', 'mg', 'pde', 'quadrature', 'recovery',
+        'solver', 'timeintegratoralg', 'tools', 'vem'}
+
+def __getattr__(name):
+    if name in subpackages:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | subpackages)
@@ -1,9 +1,245 @@
-
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from functools import wraps
+from itertools import count
+from threading import Lock
+from scipy.sparse import issparse
 
 def ranges(nv, start = 0):
+    nv = np.asarray(nv)
     shifts = np.cumsum(nv)
-    id_arr = np.ones(shifts[-1], dtype=np.int)
+    id_arr = np.ones(shifts[-1], dtype=nv.dtype)
     id_arr[shifts[:-1]] = -np.asarray(nv[:-1])+1
     id_arr[0] = start 
-    return id_arr.cumsum()
+    return id_arr.cumsum(dtype=nv.dtype)
+
+def block_slices(N, n):
+    """ Split `range(N)` into consecutive slices with at most `n` items 
+    """
+    n = max(int(n), 1)
+    return [slice(i, min(i+n, N)) for i in range(0, N, n)]
+
+def block_map(f, blocks, workers=None):
+    """ Apply `f` on every block and return the results in order
+
+    If `workers` is given, the blocks are run in a `ThreadPoolExecutor` with
+    `workers` threads. This pays off when `f` spends its time in numpy
+    kernels (einsum, matmul) which release the GIL.
+    """
+    if workers is None:
+        return list(map(f, blocks))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(f, blocks))
+
+class DynamicArray():
+    """ The rows of an array stored in a buffer whose capacity is doubled
+    when it is full, so that appending `n` rows costs O(n) amortized.
+
+    Notes
+    -----
+        The methods take the current array `a` and return `data`, the view of
+        the active rows. When `a` is not the active view (e.g. it has been
+        replaced by the user), the buffer is rebuilt from `a`.
+    """
+    def __init__(self):
+        self.buf = None
+        self.size = 0
+
+    @property
+    def data(self):
+        return self.buf[:self.size]
+
+    def capacity(self):
+        return 0 if self.buf is None else self.buf.shape[0]
+
+    def is_active(self, a):
+        buf = self.buf
+        return (buf is not None) and (a.shape[0] == self.size) \
+                and (a.shape[1:] == buf.shape[1:]) and (a.dtype == buf.dtype) \
+                and (a.strides == buf.strides) \
+                and (a.__array_interface__['data'][0] == buf.__array_interface__['data'][0])
+
+    def reallocate(self, a, capacity):
+        self.buf = np.empty((capacity, ) + a.shape[1:], dtype=a.dtype)
+        self.buf[:a.shape[0]] = a
+        self.size = a.shape[0]
+
+    def extend(self, a, *arrays):
+        """ Append the rows of `arrays` to `a` 
+        """
+        n = a.shape[0] + sum(b.shape[0] for b in arrays)
+        if not self.is_active(a):
+            self.reallocate(a, max(2*n, 1))
+        elif n > self.capacity():
+            self.reallocate(a, 2*n)
+        for b in arrays:
+            self.buf[self.size:self.size+b.shape[0]] = b
+            self.size += b.shape[0]
+        return self.data
+
+    def compact(self, a, flag):
+        """ Keep the rows `a[flag]`, moved to the front of the buffer
+
+        The rows are compacted in place, and the buffer is only shrunk to
+        twice the new size when less than a quarter of it is used.
+
+        Notes
+        -----
+            The arrays taken from the buffer before (e.g. an earlier
+            `tree.ds.cell` or `tree.child`) see the moved rows after this
+            call. Copy them first if the old data is still needed.
+        """
+        flag = np.asarray(flag, dtype=np.bool_)
+        n = int(flag.sum())
+        if (not self.is_active(a)) or (4*n < self.capacity()):
+            b = a[flag]
+            self.buf = np.empty((max(2*n, 1), ) + b.shape[1:], dtype=b.dtype)
+            self.buf[:n] = b
+        else:
+            # the rows before the first removed row stay where they are
+            k = np.argmin(flag) if n < flag.shape[0] else n
+            self.buf[k:n] = a[k:][flag[k:]]
+        self.size = n
+        return self.data
+
+_versions = count(1)
+_cachelock = Lock()
+
+def new_version():
+    """ A new number from a global counter, so two versions never collide
+    even when the object they are attached to is replaced
+    """
+    return next(_versions)
+
+def _nbytes(val):
+    if isinstance(val, np.ndarray):
+        return val.nbytes
+    elif issparse(val):
+        return sum(a.nbytes for a in _arrays(val))
+    elif isinstance(val, tuple):
+        return sum(_nbytes(v) for v in val)
+    else:
+        return 0
+
+def _arrays(A):
+    if A.format == 'coo':
+        return [A.data, A.row, A.col]
+    elif A.format in {'csr', 'csc', 'bsr'}:
+        return [A.data, A.indices, A.indptr]
+    else:
+        return []
+
+def _freeze(val):
+    """ Make the arrays of `val` read-only, the sparse matrices are put in the
+    canonical format first, so that scipy does not sort them in place later
+    """
+    if isinstance(val, np.ndarray):
+        val.flags.writeable = False
+    elif issparse(val):
+        if val.format in {'csr', 'csc', 'bsr'}:
+            val.sum_duplicates()
+        for a in _arrays(val):
+            a.flags.writeable = False
+    elif isinstance(val, tuple):
+        for v in val:
+            _freeze(v)
+
+def _view(val):
+    """ A read-only view of the frozen `val`, the caller can not make it
+    writeable again or change the cached sparse matrix in place
+    """
+    if isinstance(val, np.ndarray):
+        return val.view()
+    elif issparse(val):
+        if val.format == 'coo':
+            return val.__class__((val.data.view(), (val.row.view(), val.col.view())),
+                    shape=val.shape, copy=False)
+        elif val.format in {'csr', 'csc', 'bsr'}:
+            A = val.__class__((val.data.view(), val.indices.view(), val.indptr.view()),
+                    shape=val.shape, copy=False)
+            A.has_canonical_format = True
+            return A
+        else:
+            return val.copy()
+    elif isinstance(val, tuple):
+        return tuple(_view(v) for v in val)
+    else:
+        return val
+
+def versioned_cache(f):
+    """ Cache the results of the method `f` against `self.version`, which
+    is an attribute or a method
+
+    The cache of an object is dropped as soon as its version changes, and it
+    holds at most `self.maxcachebytes` bytes (256MB by default), the least
+    recently used results are dropped first. Calls with arguments that can
+    not be hashed (e.g. slices or large arrays) are not cached, and nothing
+    is cached if the version is `None`. Small numpy arrays are keyed by
+    their data.
+
+    Every call returns read-only views of the cached arrays and sparse
+    matrices, the callers copy them before changing them. The arrays which
+    are attributes of the object itself (e.g. `node`) are returned as they
+    are. The cache may be used from several threads, e.g. the workers of
+    `block_map`.
+    """
+    name = f.__name__
+    @wraps(f)
+    def wrapper(self, *args, **kwargs):
+        version = getattr(self, 'version', None)
+        if callable(version):
+            version = version()
+        if version is None:
+            return f(self, *args, **kwargs)
+        key = [name]
+        items = list(args)
+        for k in sorted(kwargs):
+            items += [k, kwargs[k]]
+        for a in items:
+            if isinstance(a, np.ndarray):
+                if a.size > 4096:
+                    return f(self, *args, **kwargs)
+                key.append((a.shape, a.dtype.str, a.tobytes()))
+            else:
+                try:
+                    hash(a)
+                except TypeError:
+                    return f(self, *args, **kwargs)
+                key.append(a)
+        key = tuple(key)
+
+        with _cachelock:
+            cache = self.__dict__.get('_versionedcache')
+            if (cache is None) or (cache['version'] != version):
+                cache = {'version':version, 'data':OrderedDict(), 'nbytes':0}
+                self.__dict__['_versionedcache'] = cache
+            data = cache['data']
+            hit = key in data
+            if hit:
+                data.move_to_end(key)
+                val = data[key][0]
+
+        if not hit:
+            # computed out of the lock, two threads may both compute it
+            val = f(self, *args, **kwargs)
+            if any(val is v for v in self.__dict__.values()):
+                return val
+            nbytes = _nbytes(val) + sum(len(k[2]) for k in key
+                    if isinstance(k, tuple) and len(k) == 3 and isinstance(k[2], bytes))
+            maxbytes = getattr(self, 'maxcachebytes', 2**28)
+            if nbytes > maxbytes:
+                return val
+            _freeze(val)
+            with _cachelock:
+                if key in data:
+                    cache['nbytes'] -= data[key][1]
+                data[key] = (val, nbytes)
+                cache['nbytes'] += nbytes
+                while cache['nbytes'] > maxbytes:
+                    cache['nbytes'] -= data.popitem(last=False)[1][1]
+
+        if any(val is v for v in self.__dict__.values()):
+            return val
+        return _view(val)
+    return wrapper
@@ -1 +1,3 @@
 from .Tools import *
+from .async_writer import AsyncWriter
+from .checkpoint import Checkpoint
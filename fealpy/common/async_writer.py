@@ -0,0 +1,103 @@
+import os
+import threading
+import queue
+import zipfile
+import numpy as np
+
+
+class AsyncWriter():
+    """ Write the output of a time dependent model in a background thread
+
+    The arrays are copied when they are put into the queue, so the model can
+    go on changing them, and they are compressed and written while the next
+    time step is computed. The queue holds at most `maxsize` snapshots,
+    `submit` blocks when it is full, so the memory does not grow on long runs.
+    `compresslevel` is the zlib level of the `.npz` files, 0 for no
+    compression.
+
+    Example
+    -------
+        writer = AsyncWriter()
+        for i, t in enumerate(timeline):
+            ...
+            writer.save('results/uh{:06d}.npz'.format(i), uh=uh, t=t)
+        writer.close()
+    """
+    def __init__(self, maxsize=4, compresslevel=1):
+        self.compresslevel = compresslevel
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.error = None
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def work(self):
+        while True:
+            task = self.queue.get()
+            try:
+                if task is None:
+                    return
+                f, args, kwargs = task
+                if self.error is None:
+                    f(*args, **kwargs)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def check(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def submit(self, f, *args, **kwargs):
+        """ Call `f(*args, **kwargs)` in the writer thread, the array
+        arguments are copied first
+        """
+        self.check()
+        if not self.thread.is_alive():
+            raise RuntimeError("The writer has been closed!")
+        args = [np.array(a) if isinstance(a, np.ndarray) else a for a in args]
+        kwargs = {key:np.array(val) if isinstance(val, np.ndarray) else val
+                for key, val in kwargs.items()}
+        self.queue.put((f, args, kwargs))
+
+    def save(self, fileName, **arrays):
+        """ Save the `arrays` into the `.npz` file `fileName`, which can be
+        read by `np.load`
+
+        The directory of `fileName` is created here, in the calling thread,
+        so a bad path fails at once instead of on a later `submit`.
+        """
+        path = os.path.dirname(fileName)
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self.submit(self.write_npz, fileName, **arrays)
+
+    def write_npz(self, fileName, **arrays):
+        if self.compresslevel > 0:
+            kwargs = {'compression':zipfile.ZIP_DEFLATED,
+                    'compresslevel':self.compresslevel}
+        else:
+            kwargs = {'compression':zipfile.ZIP_STORED}
+        with zipfile.ZipFile(fileName, mode='w', allowZip64=True, **kwargs) as zf:
+            for key, val in arrays.items():
+                with zf.open(key + '.npy', mode='w', force_zip64=True) as fp:
+                    np.lib.format.write_array(fp, np.asanyarray(val), allow_pickle=False)
+
+    def flush(self):
+        """ Wait until everything in the queue has been written
+        """
+        self.queue.join()
+        self.check()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.check()
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import shutil
+import numpy as np
+
+
+class Checkpoint():
+    """ Save the state of a long run now and then, and restart from the last
+    saved one
+
+    Every checkpoint is a directory `path/checkpoint_<step>` holding the mesh
+    and the functions in the native npy format (see `write_npy_mesh`), with
+    the parent and child arrays of the tree meshes, and the `state`: the
+    time step, the model parameters and so on, the numbers and the strings go
+    to `state.json` and the arrays to `state.npz`. The file `path/latest`
+    names the last finished checkpoint, and it is replaced only when the new
+    one is complete, so a run killed while saving restarts from the one
+    before.
+
+    Example
+    -------
+        checkpoint = Checkpoint('results/checkpoint', interval=600)
+        data = checkpoint.load()
+        if data is not None:
+            mesh, functions, state = data
+            start = state['step'] + 1
+        for i in range(start, maxit):
+            ...
+            checkpoint.save(i, mesh, functions={'uh':uh}, state={'step':i})
+    """
+    def __init__(self, path, interval=600, keep=2):
+        """
+        Parameters
+        ----------
+        path : the directory of the checkpoints
+        interval : float, the least wall clock time in seconds between two
+            checkpoints
+        keep : int, the number of the checkpoints kept on the disk
+        """
+        self.path = path
+        self.interval = interval
+        self.keep = keep
+        self.last = time.time()
+
+    def is_due(self):
+        return time.time() - self.last >= self.interval
+
+    def save(self, step, mesh, functions=None, state=None, force=False):
+        """ Save a checkpoint if `interval` seconds have passed since the last
+        one (or since the start), or if `force` is True
+
+        Returns
+        -------
+        True if a checkpoint has been written
+        """
+        from ..mesh.meshio import write_npy_mesh
+
+        if not (force or self.is_due()):
+            return False
+        os.makedirs(self.path, exist_ok=True)
+        name = 'checkpoint_{:06d}'.format(step)
+        tmp = os.path.join(self.path, '.' + name)
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp)
+
+        write_npy_mesh(tmp, mesh, functions=functions)
+        state = {} if state is None else state
+        arrays = {key:val for key, val in state.items() if isinstance(val, np.ndarray)}
+        values = {key:val for key, val in state.items() if key not in arrays}
+        with open(os.path.join(tmp, 'state.json'), 'w') as fp:
+            json.dump(values, fp, indent=2, default=lambda a: a.item())
+        np.savez(os.path.join(tmp, 'state.npz'), **arrays)
+
+        target = os.path.join(self.path, name)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.rename(tmp, target)
+        with open(os.path.join(self.path, '.latest'), 'w') as fp:
+            fp.write(name)
+        os.replace(os.path.join(self.path, '.latest'), os.path.join(self.path, 'latest'))
+
+        old = sorted(f for f in os.listdir(self.path) if f.startswith('checkpoint_'))
+        for f in old[:-self.keep]:
+            shutil.rmtree(os.path.join(self.path, f))
+        self.last = time.time()
+        return True
+
+    def load(self):
+        """ Load the last checkpoint
+
+        Returns
+        -------
+        None if there is no checkpoint, otherwise `(mesh, functions, state)`
+        """
+        from ..mesh.meshio import load_npy_mesh
+
+        latest = os.path.join(self.path, 'latest')
+        if not os.path.exists(latest):
+            return None
+        with open(latest) as fp:
+            f = os.path.join(self.path, fp.read().strip())
+        mesh, functions = load_npy_mesh(f, mmap_mode=None)
+        with open(os.path.join(f, 'state.json')) as fp:
+            state = json.load(fp)
+        with np.load(os.path.join(f, 'state.npz')) as data:
+            state.update({key:data[key] for key in data.files})
+        return mesh, functions, state
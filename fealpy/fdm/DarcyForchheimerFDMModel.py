@@ -4,6 +4,7 @@ from scipy.sparse import coo_matrix, csr_matrix, eye, hstack, vstack, bmat, spdi
 from numpy import linalg as LA
 from fealpy.fem.integral_alg import IntegralAlg
 from scipy.sparse.linalg import cg, inv, dsolve, spsolve 
+from ..solver.context import SolverContext
 
 class DarcyForchheimerFDMModel():
     def __init__(self, pde, mesh):
@@ -203,6 +204,11 @@ class DarcyForchheimerFDMModel():
         iterMax = 2000
         r = np.zeros((2,iterMax),dtype=ftype)
 
+        # The matrix changes little from one iteration to the next, the last
+        # factorization preconditions gmres as long as it converges in a few
+        # steps
+        context = SolverContext(method='direct', reuse=True, maxiter=5)
+
         while eu+ep > tol and count < iterMax:
 
             bnew = b
@@ -220,7 +226,7 @@ class DarcyForchheimerFDMModel():
 
             idx1 = 1 - bdIdx
             idx2, = np.nonzero(idx1)
-            x[idx2] = spsolve(AD[idx2,:][:,idx2], bnew[idx2])
+            x[idx2] = context.solve(AD[idx2,:][:,idx2], bnew[idx2])
             u1 = x[:NE]
             p1 = x[NE:]
 
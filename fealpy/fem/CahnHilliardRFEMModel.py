@@ -1,15 +1,12 @@
+import os
 import numpy as np
 
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-
 from scipy.sparse import csc_matrix, csr_matrix, spdiags, eye
 from scipy.sparse.linalg import spsolve
 from ..functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
 from ..fem import doperator 
 from .integral_alg import IntegralAlg
 from .doperator import mass_matrix, grad_recovery_matrix
-import pyamg
 
 class CahnHilliardRFEMModel():
     def __init__(self, pde, n, tau, q):
@@ -30,6 +27,7 @@ class CahnHilliardRFEMModel():
         self.M = doperator.mass_matrix(self.femspace, self.integrator, self.area)
         self.K = self.get_stiff_matrix()  
         self.D = self.M + self.tau * self.K
+        import pyamg
         self.ml = pyamg.ruge_stuben_solver(self.D)  
         print(self.ml)
         self.current = 0
@@ -143,22 +141,50 @@ class CahnHilliardRFEMModel():
 
 
 
-    def solve(self):
+    def solve(self, writer=None, checkpoint=None, path='./results'):
+        """
+        Parameters
+        ----------
+        writer : AsyncWriter, optional
+            if given, the solution of every step is saved into
+            `path/cahnHilliard<i>.npz` in the background instead of being
+            plotted
+        checkpoint : Checkpoint, optional
+            if given, the run restarts from its last checkpoint, and new ones
+            are saved at its interval
+        path : str
+            the directory of the output files, it is created if needed
+        """
         timemesh = self.timemesh 
         tau = self.tau
         N = len(timemesh)
         print(N)
         D = self.D
-        for i in range(N):
+        start = 0
+        if checkpoint is not None:
+            data = checkpoint.load()
+            if data is not None:
+                _, functions, state = data
+                self.uh0[:] = functions['uh0']
+                start = state['current'] + 1
+        for i in range(start, N):
             t = timemesh[i]
             b = self.get_right_vector(t)
             #self.uh1[:] =  spsolve(D, b)
             self.uh1[:] = self.ml.solve(b, tol=1e-12, accel='cg').reshape((-1,))
             
             self.current = i
-            if self.current%2 == 0:
+            if writer is not None:
+                fileName = os.path.join(path, 'cahnHilliard{}.npz'.format(self.current))
+                writer.save(fileName, uh=self.uh1, t=t)
+            elif self.current%2 == 0:
                 self.show_soultion()
             self.uh0[:] = self.uh1[:]
+            if checkpoint is not None:
+                checkpoint.save(i, self.mesh, functions={'uh0':self.uh0},
+                        state={'current':i, 't':t, 'tau':tau})
+        if writer is not None:
+            writer.flush()
         error = self.get_L2_error((N-1)*tau)
         print(error)
             
@@ -175,6 +201,8 @@ class CahnHilliardRFEMModel():
         timemesh = self.timemesh 
         cell = mesh.entity('cell')
         node = mesh.entity('node')
+        import matplotlib.pyplot as plt
+        from mpl_toolkits.mplot3d import Axes3D
         fig = plt.figure()
         fig.set_facecolor('white')
         axes = fig.gca(projection='3d')
@@ -1,15 +1,12 @@
+import os
 import numpy as np
 
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-
 from scipy.sparse import csc_matrix, csr_matrix, spdiags, eye
 from scipy.sparse.linalg import spsolve
 from ..functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
 from ..fem import doperator 
 from .integral_alg import IntegralAlg
 from .doperator  import mass_matrix, grad_recovery_matrix
-import pyamg
 
 class LinearCahnHilliardRFEMModel():
     def __init__(self, pde, n, tau, q):
@@ -30,6 +27,7 @@ class LinearCahnHilliardRFEMModel():
         self.M = doperator.mass_matrix(self.femspace, self.integrator, self.area)
         self.K = self.get_stiff_matrix()  
         self.D = self.M + self.tau * self.K
+        import pyamg
         self.ml = pyamg.ruge_stuben_solver(self.D)  
         print(self.ml)
         self.current = 0
@@ -142,7 +140,17 @@ class LinearCahnHilliardRFEMModel():
         b = doperator.source_vector(f, self.femspace, self.integrator, self.area)
         return self.M@uh + self.tau*b
 
-    def solve(self):
+    def solve(self, writer=None, path='./results'):
+        """
+        Parameters
+        ----------
+        writer : AsyncWriter, optional
+            if given, the solution of every step is saved into
+            `path/cahnHilliard<i>.npz` in the background instead of being
+            plotted
+        path : str
+            the directory of the output files, it is created if needed
+        """
         timemesh = self.timemesh 
         N = len(timemesh)
         D = self.D
@@ -152,9 +160,14 @@ class LinearCahnHilliardRFEMModel():
             #self.uh1[:] =  spsolve(D, b)
             self.uh1[:] = self.ml.solve(b, tol=1e-12, accel='cg').reshape((-1,))
             self.current = i
-            if self.current%10 == 0:
+            if writer is not None:
+                fileName = os.path.join(path, 'cahnHilliard{}.npz'.format(self.current))
+                writer.save(fileName, uh=self.uh1, t=t)
+            elif self.current%10 == 0:
                 self.show_soultion()
             self.uh0[:] = self.uh1[:]
+        if writer is not None:
+            writer.flush()
             
 
     def step(self):
@@ -169,6 +182,8 @@ class LinearCahnHilliardRFEMModel():
         timemesh = self.timemesh 
         cell = mesh.entity('cell')
         node = mesh.entity('node')
+        import matplotlib.pyplot as plt
+        from mpl_toolkits.mplot3d import Axes3D
         fig = plt.figure()
         fig.set_facecolor('white')
         axes = fig.gca(projection='3d')
@@ -1,6 +1,6 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, block_diag
-from scipy.sparse import spdiags, eye, bmat, tril, triu
+from scipy.sparse import spdiags, eye, bmat, tril, triu, kron
 from scipy.sparse.linalg import cg, inv, dsolve,  gmres, LinearOperator, spsolve_triangular
 
 try:
@@ -8,18 +8,20 @@ try:
 except  ImportError:
     from scipy.sparse.linalg import spsolve
 
-import pyamg
-
 from ..functionspace.lagrange_fem_space import VectorLagrangeFiniteElementSpace
 from ..functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
 from ..functionspace.mixed_fem_space import HuZhangFiniteElementSpace
 from .integral_alg import IntegralAlg
 from .doperator import stiff_matrix
+from ..solver.hofsolver import p_prolongation
+from ..solver.saddle_point import BlockPreconditioner, AuxiliarySpacePreconditioner
+from ..solver.saddle_point import saddle_point_solve, schur_complement
+from ..common import block_slices, block_map
 from timeit import default_timer as timer
 import cProfile
 
 class LinearElasticityFEMModel:
-    def __init__(self, mesh,  pde, p, integrator):
+    def __init__(self, mesh,  pde, p, integrator, workers=None):
         self.mesh = mesh
         self.tensorspace = HuZhangFiniteElementSpace(mesh, p)
         self.vectorspace = VectorLagrangeFiniteElementSpace(mesh, p-1, spacetype='D') 
@@ -34,6 +36,7 @@ class LinearElasticityFEMModel:
         self.measure = mesh.entity_measure()
         self.integralalg = IntegralAlg(self.integrator, mesh, self.measure)
         self.count = 0
+        self.workers = workers
 
         self.itype = mesh.itype
         self.ftype = mesh.ftype
@@ -59,29 +62,13 @@ class LinearElasticityFEMModel:
         tcell2dof = tspace.cell_to_dof()
         self.D = np.bincount(tcell2dof.flat, weights=D.flat, minlength=tgdof)
 
-        # construct amg solver 
-        A = stiff_matrix(self.cspace, self.integrator, self.measure)
-        isBdDof = self.cspace.boundary_dof()
-        bdIdx = np.zeros((A.shape[0], ), np.int)
-        bdIdx[isBdDof] = 1
-        Tbd = spdiags(bdIdx, 0, A.shape[0], A.shape[0])
-        T = spdiags(1-bdIdx, 0, A.shape[0], A.shape[0])
-        A = T@A@T + Tbd
-        self.ml = pyamg.ruge_stuben_solver(A) # 这里要求必须有网格内部节点 
-
-        # Get interpolation matrix 
+    def cell_blocks(self):
+        """ The cell blocks for the assembly, one block in the serial case 
+        """
         NC = self.mesh.number_of_cells()
-        bc = self.vectorspace.dof.multiIndex/self.vectorspace.p
-        val = np.tile(bc, (NC, 1))
-        c2d0 = self.vectorspace.dof.cell2dof
-        c2d1 = self.cspace.cell_to_dof()
-
-        gdim = self.tensorspace.geo_dimension()
-        I = np.einsum('ij, k->ijk', c2d0, np.ones(gdim+1))
-        J = np.einsum('ik, j->ijk', c2d1, np.ones(len(bc)))
-        cgdof = self.cspace.number_of_global_dofs()
-        fgdof = self.vectorspace.number_of_global_dofs()/self.mesh.geo_dimension()
-        self.PI = csr_matrix((val.flat, (I.flat, J.flat)), shape=(fgdof, cgdof))
+        if self.workers is None:
+            return [np.arange(NC)]
+        return [np.arange(NC)[idx] for idx in block_slices(NC, -(-NC//self.workers))]
 
     def get_left_matrix(self):
         mesh = self.mesh
@@ -107,9 +94,13 @@ class LinearElasticityFEMModel:
                 M += ws[i]*np.einsum('jkm, m, jom->jko', aphi, d, phi, optimize=True)
             M *= self.measure[..., np.newaxis, np.newaxis]
         else:
-            phi = tspace.basis(bcs)
-            aphi = self.pde.compliance_tensor(phi)
-            M = np.einsum('i, ijkm, m, ijom, j->jko', ws, aphi, d, phi, self.measure, optimize=True)
+            def kernel(idx):
+                phi = tspace.basis(bcs, cellidx=idx)
+                aphi = self.pde.compliance_tensor(phi)
+                return np.einsum('i, ijkm, m, ijom, j->jko', ws, aphi, d, phi,
+                        self.measure[idx], optimize=True)
+            M = np.concatenate(block_map(kernel, self.cell_blocks(),
+                workers=self.workers), axis=0)
 
         tcell2dof = tspace.cell_to_dof()
         I = np.einsum('ij, k->ijk', tcell2dof, np.ones(tldof))
@@ -127,9 +118,13 @@ class LinearElasticityFEMModel:
                 B += ws[i]*np.einsum('km, jom->jko', uphi, dphi, optimize=True)
             B *= self.measure[..., np.newaxis, np.newaxis]
         else:
-            dphi = tspace.div_basis(bcs)
             uphi = vspace.basis(bcs)
-            B = np.einsum('i, ikm, ijom, j->jko', ws, uphi, dphi, self.measure, optimize=True)
+            def kernel(idx):
+                dphi = tspace.div_basis(bcs, cellidx=idx)
+                return np.einsum('i, ikm, ijom, j->jko', ws, uphi, dphi,
+                        self.measure[idx], optimize=True)
+            B = np.concatenate(block_map(kernel, self.cell_blocks(),
+                workers=self.workers), axis=0)
 
         I = np.einsum('ij, k->ijk', vspace.cell_to_dof(), np.ones(tldof))
         J = np.einsum('ij, k->ikj', tspace.cell_to_dof(), np.ones(vldof))
@@ -142,9 +137,12 @@ class LinearElasticityFEMModel:
 
         bcs, ws = self.integrator.quadpts, self.integrator.weights
         pp = vspace.mesh.bc_to_point(bcs)
-        fval = self.pde.source(pp)
         phi = vspace.basis(bcs)
-        bb = np.einsum('i, ikm, ijm, k->kj', ws, fval, phi, self.measure)
+        def kernel(idx):
+            fval = self.pde.source(pp[:, idx])
+            return np.einsum('i, ikm, ijm, k->kj', ws, fval, phi, self.measure[idx])
+        bb = np.concatenate(block_map(kernel, self.cell_blocks(),
+            workers=self.workers), axis=0)
 
         cell2dof = vspace.cell_to_dof()
         vgdof = vspace.number_of_global_dofs()
@@ -171,66 +169,34 @@ class LinearElasticityFEMModel:
         self.sh[:] = x[0:tgdof]
         self.uh[:] = x[tgdof:]
 
-    def fast_solve(self):
+    def fast_solve(self, structure='diagonal', tol=1e-10):
+        """ Solve by MINRES (or GMRES for the triangular preconditioners)
 
+        The stress block `M` is approximated by the diagonal `D` of
+        `precondieitoner`, and the Schur complement by `S = B D^{-1} B^T`,
+        which is preconditioned in the auxiliary continuous P1 space, one
+        AMG cycle for each component of the displacement.
+        """
         self.precondieitoner()
 
         tgdof = self.tensorspace.number_of_global_dofs()
-        vgdof = self.vectorspace.number_of_global_dofs()
-        gdof = tgdof + vgdof
 
         start = timer()
         print("Construting linear system ......!")
         self.M, self.B = self.get_left_matrix()
-        S = self.B@spdiags(1/self.D, 0, tgdof, tgdof)@self.B.transpose()
-        self.SL = tril(S).tocsc()
-        self.SU = triu(S, k=1).tocsr()
-
-        self.SUT = self.SL.transpose().tocsr()
-        self.SLT = self.SU.transpose().tocsr()
-
         b = self.get_right_vector()
-
-        AA = bmat([[self.M, self.B.transpose()], [self.B, None]]).tocsr()
-        bb = np.r_[np.zeros(tgdof), b]
+        S = schur_complement(self.B, self.D)
+        gdim = self.tensorspace.geo_dimension()
+        PI = kron(p_prolongation(self.cspace, self.vectorspace.scalarspace), eye(gdim))
+        self.aux = AuxiliarySpacePreconditioner(S, PI, ncomponent=gdim)
         end = timer()
         print("Construct linear system time:", end - start)
 
-
-        start = timer()
-        P = LinearOperator((gdof, gdof), matvec=self.linear_operator)
-        x, exitCode = gmres(AA, bb, M=P, tol=1e-8)
-        print(exitCode)
-        end = timer()
-
-        print("Solve time:", end-start)
-        self.sh[:] = x[0:tgdof]
-        self.uh[:] = x[tgdof:]
-
-    def linear_operator(self, r):
-        tgdof = self.tensorspace.number_of_global_dofs()
-        vgdof = self.vectorspace.number_of_global_dofs()
-        gdof = tgdof + vgdof
-        gdim = self.tensorspace.geo_dimension()
-
-        r0 = r[0:tgdof]
-        r1 = r[tgdof:]
-
-        u0 = r0/self.D
-        u1 = np.zeros(vgdof, dtype=np.float)
-        r2 = r1 - self.B@u0
-
-        for i in range(3):
-            u1[:] = spsolve(self.SL, r2 - self.SU@u1, permc_spec="NATURAL") 
-
-        r3 = r2 - (self.SL@u1 + self.SU@u1)
-        for i in range(gdim):
-            u1[i::gdim] = self.PI@self.ml.solve(self.PI.transpose()@r3[i::gdim], tol=1e-8, accel='cg')
-
-        for i in range(3):
-            u1[:] = spsolve(self.SUT, r2 - self.SLT@u1, permc_spec="NATURAL")
-
-        return np.r_[u0 + self.B.transpose()@u1, -u1]
+        P = BlockPreconditioner(self.B, self.D, self.aux, structure=structure)
+        sh, uh, info = saddle_point_solve(self.M, self.B, np.zeros(tgdof), b, P,
+                tol=tol, verbose=True)
+        self.sh[:] = sh
+        self.uh[:] = uh
 
     def error(self):
 
@@ -16,7 +16,7 @@ from timeit import default_timer as timer
 
 
 class PoissonFEMModel(object):
-    def __init__(self, pde, mesh, p, integrator):
+    def __init__(self, pde, mesh, p, integrator, workers=None):
         self.femspace = LagrangeFiniteElementSpace(mesh, p) 
         self.mesh = self.femspace.mesh
         self.pde = pde 
@@ -25,6 +25,7 @@ class PoissonFEMModel(object):
         self.cellmeasure = mesh.entity_measure('cell')
         self.integrator = integrator 
         self.integralalg = IntegralAlg(self.integrator, self.mesh, self.cellmeasure)
+        self.workers = workers
 
     def recover_estimate(self,rguh):
         if self.femspace.p > 1:
@@ -54,10 +55,12 @@ class PoissonFEMModel(object):
     
 
     def get_left_matrix(self):
-        return doperator.stiff_matrix(self.femspace, self.integrator, self.cellmeasure)
+        return doperator.stiff_matrix(self.femspace, self.integrator,
+                self.cellmeasure, workers=self.workers)
 
     def get_right_vector(self):
-        return doperator.source_vector(self.pde.source, self.femspace, self.integrator, self.cellmeasure)
+        return doperator.source_vector(self.pde.source, self.femspace,
+                self.integrator, self.cellmeasure, workers=self.workers)
 
     def solve(self):
         bc = DirichletBC(self.femspace, self.pde.dirichlet)
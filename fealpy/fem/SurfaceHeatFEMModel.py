@@ -1,15 +1,22 @@
+import os
 import numpy as np
 
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye
 from scipy.sparse.linalg import cg, inv, dsolve, spsolve
-from ..femmodel import doperator 
+from . import doperator 
+from ..solver.context import SolverContext
 
 
 class TimeModel():
-    def __init__(self, w, q0):
+    def __init__(self, w, q0, timeline):
+        """
+        w : the coefficient of the reaction term, a finite element function
+        q0 : the initial value at the dofs
+        timeline : the time points
+        """
         self.w = w
         self.q0 = q0
-        self.timeline 
+        self.timeline = timeline
         self.current = 0
 
     def get_number_of_time_steps(self):
@@ -30,7 +37,7 @@ class TimeModel():
 
 
 class SurfaceHeatFEMModel():
-    def __init__(self, tmodel, V, method='FM', integrator):
+    def __init__(self, tmodel, V, integrator, method='FM'):
         """
         surface parabolic equation
         """
@@ -40,16 +47,24 @@ class SurfaceHeatFEMModel():
         self.V = V
         self.mesh = self.V.mesh
 
-        self.uh = self.V.function(dim=NT) 
-        self.solution = [self.uh]
+        # only the solutions of the current and the previous step are kept,
+        # the others go to the `writer` of `run`
+        self.uh = self.V.function() 
+        self.uh[:] = tmodel.q0
+        self.uh0 = self.V.function()
         self.integrator = integrator 
-        self.area = self.V.mesh.area(integrator)
+        self.area = self.V.mesh.area()
 
         self.M = doperator.mass_matrix(self.V, self.integrator, self.area)
         self.A = doperator.stiff_matrix(self.V, self.integrator, self.area)
         self.F = doperator.mass_matrix(self.V, self.integrator, self.area,
                 cfun=tmodel.w.value)
 
+        # with a uniform time step the matrix is the same in every step, so
+        # it is factorized only once
+        self.context = SolverContext(method='direct')
+        self.dt = None
+
 
     def get_current_linear_system(self):
         
@@ -57,29 +72,57 @@ class SurfaceHeatFEMModel():
         S = self.A
         F = self.F
         dt = self.tmodel.get_time_step_length()
+        if (self.dt is not None) and np.isclose(dt, self.dt, rtol=1e-10, atol=0):
+            # the steps of a uniform timeline only differ by the round-off 
+            dt = self.dt
+        self.dt = dt
+        u0 = self.uh
         # there have diffconDiffusion coefficient and Radius of gyration
-        if self.method is 'FM':
-            b = -dt*(S + F)@self.solution[-1] + M@self.solution[-1]
+        if self.method == 'FM':
+            b = -dt*(S + F)@u0 + M@u0
             A = M                                                         
             return A, b
-        if self.method is 'BM':
-            b = M@self.solution[-1]
+        if self.method == 'BM':
+            b = M@u0
             A = M + dt*(S + F)
             return A, b
-        if self.method is 'CN':
-            b = -0.5*dt(S + F)@self.solution[-1] + M@self.solution[-1]
-            A = M + 0.5*dt(S + F)
+        if self.method == 'CN':
+            b = -0.5*dt*(S + F)@u0 + M@u0
+            A = M + 0.5*dt*(S + F)
             return A, b
+        raise ValueError("I don't know the time discretization {}!".format(self.method))
 
-    def run(self):
-        while ~self.tmodel.stop(): 
+    def run(self, writer=None, path='./results'):
+        """
+        Parameters
+        ----------
+        writer : AsyncWriter, optional
+            if given, the solution of every step, the initial value
+            included, is saved into `path/surfaceHeat<i>.npz` in the
+            background
+        path : str
+            the directory of the output files, it is created if needed
+        """
+        timeline = self.tmodel.timeline
+        if writer is not None:
             current = self.tmodel.get_current_time_step()
+            fileName = os.path.join(path, 'surfaceHeat{}.npz'.format(current))
+            writer.save(fileName, uh=self.uh, t=timeline[current])
+        while not self.tmodel.stop(): 
             A, b = self.get_current_linear_system()
-            self.uh[:, self.tmodel.current] = spsolve(A, b)
+            self.uh0[:] = self.uh
+            # the matrix only depends on the time step
+            self.uh[:] = self.context.solve(A, b, version=self.dt)
             self.tmodel.step()
+            if writer is not None:
+                current = self.tmodel.get_current_time_step()
+                fileName = os.path.join(path, 'surfaceHeat{}.npz'.format(current))
+                writer.save(fileName, uh=self.uh, t=timeline[current])
+        if writer is not None:
+            writer.flush()
     
     def solve(self, A, b):
-        uh  = spsolve(A, b)
+        uh  = self.context.solve(A, b)
         return uh 
 
 
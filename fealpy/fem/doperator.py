@@ -1,27 +1,375 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye
+from scipy.sparse.linalg import LinearOperator
 from timeit import default_timer as timer
 from itertools import combinations
+from threading import Lock
+from ..common import block_slices, block_map
 
-def stiff_matrix(space, qf, measure, cfun=None, barycenter=True):
+
+class Assembler():
+    """ The global assembler of a finite element space
+
+    The CSR sparsity pattern of the global matrix and the scatter map from
+    the element-local entries into `A.data` only depend on `cell2dof`. They
+    are built once here, and every later assembly on the same space is just
+    one `np.bincount` into the data array, without any COO to CSR
+    conversion.
+
+    Parameters
+    ----------
+    space : the test space, gives the rows of the global matrix 
+    space1 : the trial space, gives the columns of the global matrix,
+        default is `space` 
+
+    Notes
+    -----
+    The assembler must be rebuilt when the mesh or the space is changed.
+    """
+    def __init__(self, space, space1=None):
+        if space1 is None:
+            space1 = space
+
+        cell2dof0 = space.cell_to_dof()
+        cell2dof1 = space1.cell_to_dof()
+        gdof0 = space.number_of_global_dofs()
+        gdof1 = space1.number_of_global_dofs()
+        NC = cell2dof0.shape[0]
+        ldof0 = cell2dof0.shape[1]
+        ldof1 = cell2dof1.shape[1]
+
+        # key = I*gdof1 + J sorts the entries in the CSR order 
+        key = np.zeros((NC, ldof0, ldof1), dtype=np.int64)
+        key += cell2dof0[:, :, np.newaxis]
+        key *= gdof1
+        key += cell2dof1[:, np.newaxis, :]
+        key, self.index = np.unique(key.flat, return_inverse=True)
+
+        self.shape = (gdof0, gdof1)
+        self.nnz = len(key)
+        self.ldof = (ldof0, ldof1)
+        itype = np.int32 if max(self.nnz, gdof0, gdof1) < 2**31 else np.int64 
+        self.indices = (key % gdof1).astype(itype)
+        self.indptr = np.zeros(gdof0+1, dtype=itype)
+        np.cumsum(np.bincount(key//gdof1, minlength=gdof0), out=self.indptr[1:])
+
+    def number_of_nonzeros(self):
+        return self.nnz
+
+    def assemble(self, A):
+        """ Assemble the element matrices `A` into the global CSR matrix
+
+        Parameters
+        ----------
+        A : numpy.array
+            the element matrices with shape `(NC, ldof0, ldof1)`
+
+        Returns
+        -------
+        M : scipy.sparse.csr_matrix
+        """
+        data = np.bincount(self.index, weights=A.flat, minlength=self.nnz)
+        M = csr_matrix((data, self.indices.copy(), self.indptr.copy()),
+                shape=self.shape)
+        M.has_canonical_format = True
+        return M
+
+
+class MatrixFreeOperator(LinearOperator):
+    """ The matrix-free stiffness or mass operator of a Lagrange space
+
+    The operator is applied by gather (`u[cell2dof]`), the element kernel
+    and scatter (`np.bincount` over `cell2dof`), and the global sparse
+    matrix is never formed. Only `grad_lambda` products and the quadrature
+    weights are stored, so the memory is far less than the CSR matrix for
+    high order spaces. It can be passed to `scipy.sparse.linalg.cg` as `A`.
+
+    Parameters
+    ----------
+    space : LagrangeFiniteElementSpace
+    qf : the quadrature, exact for the integrand of the operator
+    measure : the cell measure 
+    optype : 'stiff' or 'mass'
+    cfun : the coefficient function, evaluated as in `mass_matrix`,
+        `optype='stiff'` with `cfun` is the weighted Laplace operator
+    c : a constant or piecewise constant coefficient with shape `(NC,)` 
+    isBdDof : the Dirichlet dof flags, the rows and columns of these dofs are
+        replaced by the identity, as `DirichletBC.apply` does for matrices 
+    """
+    def __init__(self, space, qf, measure, optype='stiff', cfun=None,
+            barycenter=True, c=None, isBdDof=None):
+        gdof = space.number_of_global_dofs()
+        super(MatrixFreeOperator, self).__init__(
+                dtype=space.ftype, shape=(gdof, gdof))
+
+        self.space = space
+        self.optype = optype
+        self.cell2dof = space.cell_to_dof()
+        self.isBdDof = isBdDof
+
+        bcs, ws = qf.quadpts, qf.weights
+        if c is not None:
+            measure = c*measure
+
+        # the quadrature weights on every cell, with shape (NC, NQ)
+        if cfun is None:
+            self.W = np.einsum('q, k->kq', ws, measure)
+        else:
+            if barycenter is True:
+                val = cfun(bcs)
+            else:
+                pp = space.mesh.bc_to_point(bcs)
+                val = cfun(pp)
+            self.W = np.einsum('q, qk, k->kq', ws, val, measure)
+
+        self.affine = (cfun is None) and hasattr(space, 'is_affine') and space.is_affine()
+        if optype == 'stiff':
+            Dlambda = space.mesh.grad_lambda()
+            self.G = np.einsum('kam, kbm->kab', Dlambda, Dlambda)
+            self.R = space.barycentric_grad_basis(bcs)
+        elif optype == 'mass':
+            if self.affine:
+                self.M = space.reference_mass_matrix()
+                self.cm = measure
+            else:
+                self.phi = space.basis(bcs)
+        else:
+            raise ValueError("I have not coded the operator {}".format(optype))
+
+    def element_apply(self, U):
+        """ Apply the element matrices on the local vectors `U` with shape
+        `(NC, ldof)`
+        """
+        NC, ldof = U.shape
+        if self.optype == 'stiff':
+            R = self.R
+            NQ, _, n = R.shape
+            RT = R.transpose(1, 0, 2).reshape(ldof, NQ*n)
+            g = (U@RT).reshape(NC, NQ, n)
+            g *= self.W[..., np.newaxis]
+            g = np.matmul(g, self.G)
+            return g.reshape(NC, NQ*n)@RT.T
+        elif self.affine:
+            return self.cm[:, np.newaxis]*(U@self.M)
+        else:
+            phi = self.phi
+            return ((U@phi.T)*self.W)@phi
+
+    def _matvec(self, u):
+        u = np.asarray(u).reshape(-1)
+        cell2dof = self.cell2dof
+        isBdDof = self.isBdDof
+        if isBdDof is not None:
+            u0 = u.copy()
+            u0[isBdDof] = 0
+        else:
+            u0 = u
+        y = self.element_apply(u0[cell2dof])
+        r = np.bincount(cell2dof.flat, weights=y.flat, minlength=self.shape[0])
+        if isBdDof is not None:
+            r[isBdDof] = u[isBdDof]
+        return r
+
+    def _rmatvec(self, u):
+        return self._matvec(u)
+
+    def diagonal(self):
+        """ The diagonal of the operator, without forming the matrix 
+        """
+        cell2dof = self.cell2dof
+        if self.optype == 'stiff':
+            R = self.R
+            T = np.einsum('qia, qib->qiab', R, R)
+            d = np.einsum('kq, qiab, kab->ki', self.W, T, self.G, optimize=True)
+        elif self.affine:
+            d = np.einsum('i, k->ki', np.diag(self.M), self.cm)
+        else:
+            d = np.einsum('kq, qi->ki', self.W, self.phi**2)
+        d = np.bincount(cell2dof.flat, weights=d.flat, minlength=self.shape[0])
+        if self.isBdDof is not None:
+            d[self.isBdDof] = 1
+        return d
+
+def stiff_operator(space, qf, measure, cfun=None, barycenter=True, c=None,
+        isBdDof=None):
+    """ The matrix-free (weighted) Laplace operator, see `MatrixFreeOperator`
+    """
+    return MatrixFreeOperator(space, qf, measure, optype='stiff', cfun=cfun,
+            barycenter=barycenter, c=c, isBdDof=isBdDof)
+
+def mass_operator(space, qf, measure, cfun=None, barycenter=True, c=None,
+        isBdDof=None):
+    """ The matrix-free mass operator, see `MatrixFreeOperator`
+    """
+    return MatrixFreeOperator(space, qf, measure, optype='mass', cfun=cfun,
+            barycenter=barycenter, c=c, isBdDof=isBdDof)
+
+def cell_chunk_size(space, qf, maxmemory):
+    """ The number of cells assembled at once such that the temporary arrays
+    of one chunk take at most `maxmemory` bytes 
+    """
+    NC = space.mesh.number_of_cells()
+    NQ = len(qf.weights)
+    ldof = space.number_of_local_dofs()
+    GD = space.mesh.geo_dimension()
+
+    # the basis gradients, the einsum intermediate and the element matrices,
+    # and the int64 keys, positions and inverse of `unique` of the entries
+    nbytes = np.dtype(space.ftype).itemsize*(2*NQ*ldof*GD + ldof*ldof)
+    nbytes += 3*8*ldof*ldof
+    return int(min(max(maxmemory//nbytes, 1), NC))
+
+def sparsity_pattern(cell2dof0, gdof0, cell2dof1=None, gdof1=None, nrow=None):
+    """ The CSR pattern `(indptr, indices)` of the matrix coupling the dofs of
+    the same cell
+
+    It is the pattern of `C0.T@C1`, where `C0` and `C1` are the cell-dof
+    incidence matrices, so only arrays of the size of `cell2dof` and of the
+    pattern are made, not the `(NC, ldof0, ldof1)` index arrays. If `nrow` is
+    given, the product is made for `nrow` rows at a time, so that the
+    workspace of scipy, which is as large as the products of the row sizes,
+    stays small too.
+    """
+    if cell2dof1 is None:
+        cell2dof1, gdof1 = cell2dof0, gdof0
+    NC, ldof0 = cell2dof0.shape
+    ldof1 = cell2dof1.shape[1]
+    C0 = csr_matrix((np.ones(NC*ldof0, dtype=np.bool_), cell2dof0.reshape(-1),
+        ldof0*np.arange(NC+1)), shape=(NC, gdof0))
+    C1 = csr_matrix((np.ones(NC*ldof1, dtype=np.bool_), cell2dof1.reshape(-1),
+        ldof1*np.arange(NC+1)), shape=(NC, gdof1))
+    C0 = C0.T.tocsr()
+    nrow = gdof0 if nrow is None else nrow
+    indptr = [np.zeros(1, dtype=np.int64)]
+    indices = []
+    for idx in block_slices(gdof0, nrow):
+        P = C0[idx]@C1
+        P.sort_indices()
+        indptr.append(P.indptr[1:] + indptr[-1][-1])
+        indices.append(P.indices)
+    indptr = np.concatenate(indptr)
+    itype = np.int32 if max(indptr[-1], gdof0, gdof1) < 2**31 else np.int64
+    return indptr.astype(itype), np.concatenate(indices).astype(itype, copy=False)
+
+def stiff_matrix(space, qf, measure, cfun=None, barycenter=True,
+        assembler=None, maxmemory=None, workers=None, c=None,
+        returnchunk=False):
+    """ Assemble the stiffness matrix
+
+    `c` is a constant or a piecewise constant coefficient with shape `(NC,)`.
+
+    On affine simplicial meshes the element matrices of the Lagrange space
+    are computed in closed form from the reference tensor of the space (see
+    `LagrangeFiniteElementSpace.reference_stiff_tensor`), one small
+    contraction with `grad_lambda` per cell, instead of evaluating the basis
+    gradients at every quadrature point.
+
+    If `maxmemory` (in bytes) is given, the cells are walked in chunks whose
+    temporary arrays fit into `maxmemory` (see `cell_chunk_size`), and the
+    element matrices of every chunk are added into the data array of the
+    CSR matrix, whose pattern is built once by `sparsity_pattern` (or taken
+    from `assembler`). Neither the `(NC, ldof, ldof)` element matrices nor
+    their index arrays are made, only the CSR arrays are as large as the
+    whole problem.
+
+    If `workers` is given, the cells are split into blocks whose element
+    matrices are computed in a thread pool with `workers` threads. The
+    global matrix is the same as the one of the serial path.
+
+    If `returnchunk` is True, the number of the cells in one chunk is
+    returned with the matrix.
+    """
     bcs, ws = qf.quadpts, qf.weights
-    gphi = space.grad_basis(bcs)
+    if c is not None:
+        measure = c*measure
+
+    if (cfun is None) and hasattr(space, 'is_affine') and space.is_affine():
+        S = space.reference_stiff_tensor()
+        Dlambda = space.mesh.grad_lambda()
+        def element_matrix(idx):
+            G = np.einsum('kam, kbm->kab', Dlambda[idx], Dlambda[idx])
+            return np.einsum('ijab, kab, k->kij', S, G, measure[idx], optimize=True)
+    else:
+        if cfun is not None:
+            if barycenter is True:
+                val = cfun(bcs)
+            else:
+                pp = space.mesh.bc_to_point(bcs)
+                val = cfun(pp)
+
+        def element_matrix(idx):
+            gphi = space.grad_basis(bcs, cellidx=idx)
+            if cfun is None:
+                return np.einsum('i, ijkm, ijpm, j->jkp', ws, gphi, gphi,
+                        measure[idx], optimize=True)
+            else:
+                return np.einsum('i, ij, ijkm, ijpm, j->jkp', ws, val[:, idx],
+                        gphi, gphi, measure[idx], optimize=True)
+
+    NC = space.mesh.number_of_cells()
+    cell2dof = space.cell_to_dof()
+    ldof = space.number_of_local_dofs()
+    gdof = space.number_of_global_dofs()
+    nc = NC
+    if maxmemory is not None:
+        nc = cell_chunk_size(space, qf, maxmemory)
+    if workers is not None:
+        nc = min(nc, -(-NC//workers))
+
+    if maxmemory is not None:
+        if assembler is not None:
+            indptr, indices = assembler.indptr.copy(), assembler.indices.copy()
+        else:
+            # about as many entries of the pattern in one product as in one
+            # chunk of the element matrices
+            indptr, indices = sparsity_pattern(cell2dof, gdof,
+                    nrow=max(gdof*nc//NC, 1))
+        # the entries of the pattern in the CSR order
+        key = np.repeat(np.arange(gdof, dtype=np.int64), np.diff(indptr))
+        key *= gdof
+        key += indices
+        data = np.zeros(len(indices), dtype=space.ftype)
+        lock = Lock()
+        def kernel(idx):
+            A = element_matrix(idx)
+            k = np.zeros(A.shape, dtype=np.int64)
+            k += cell2dof[idx, :, np.newaxis]
+            k *= gdof
+            k += cell2dof[idx, np.newaxis, :]
+            k, i = np.unique(k, return_inverse=True)
+            pos = np.searchsorted(key, k)
+            val = np.bincount(i, weights=A.flat)
+            with lock:
+                data[pos] += val
+        start = timer()
+        block_map(kernel, block_slices(NC, nc), workers=workers)
+        end = timer()
+        print('einsum time:', end - start)
+        A = csr_matrix((data, indices, indptr), shape=(gdof, gdof))
+        A.has_canonical_format = True
+        return (A, nc) if returnchunk else A
 
     # Compute the element sitffness matrix
     start = timer()
-    A = np.einsum('i, ijkm, ijpm, j->jkp', ws, gphi, gphi, measure, optimize=True)
+    if workers is None:
+        A = element_matrix(slice(None))
+    else:
+        A = np.zeros((NC, ldof, ldof), dtype=space.ftype)
+        def kernel(idx):
+            A[idx] = element_matrix(idx)
+        block_map(kernel, block_slices(NC, nc), workers=workers)
     end = timer()
     print('einsum time:', end - start)
-    
-    cell2dof = space.cell_to_dof()
-    ldof = space.number_of_local_dofs()
-    I = np.einsum('k, ij->ijk', np.ones(ldof), cell2dof)
-    J = I.swapaxes(-1, -2)
-    gdof = space.number_of_global_dofs()
 
-    # Construct the stiffness matrix
-    A = csr_matrix((A.flat, (I.flat, J.flat)), shape=(gdof, gdof))
-    return A
+    if assembler is not None:
+        A = assembler.assemble(A)
+    else:
+        I = np.einsum('k, ij->ijk', np.ones(ldof), cell2dof)
+        J = I.swapaxes(-1, -2)
+
+        # Construct the stiffness matrix
+        A = csr_matrix((A.flat, (I.flat, J.flat)), shape=(gdof, gdof))
+    return (A, nc) if returnchunk else A
 
 def stiff_matrix_1(space, qf, measure):
     bcs, ws = qf.quadpts, qf.weights
@@ -40,19 +388,41 @@ def stiff_matrix_1(space, qf, measure):
     return A.tocsr() 
 
 
-def mass_matrix(space, qf, measure, cfun=None, barycenter=True):
+def mass_matrix(space, qf, measure, cfun=None, barycenter=True,
+        assembler=None, workers=None, c=None):
 
     bcs, ws = qf.quadpts, qf.weights
-    phi = space.basis(bcs)
-    if cfun is None:
-        A = np.einsum('m, mj, mk, i->ijk', ws, phi, phi, measure)
+    if c is not None:
+        measure = c*measure
+
+    if (cfun is None) and hasattr(space, 'is_affine') and space.is_affine():
+        M = space.reference_mass_matrix()
+        def kernel(idx):
+            return np.einsum('ij, k->kij', M, measure[idx])
     else:
-        if barycenter is True:
-            val = cfun(bcs)
-        else:
-            pp = space.mesh.bc_to_point(bcs)
-            val = cfun(pp)
-        A = np.einsum('m, mi, mj, mk, i->ijk', ws, val, phi, phi, measure)
+        phi = space.basis(bcs)
+        if cfun is not None:
+            if barycenter is True:
+                val = cfun(bcs)
+            else:
+                pp = space.mesh.bc_to_point(bcs)
+                val = cfun(pp)
+
+        def kernel(idx):
+            if cfun is None:
+                return np.einsum('m, mj, mk, i->ijk', ws, phi, phi, measure[idx])
+            else:
+                return np.einsum('m, mi, mj, mk, i->ijk', ws, val[:, idx], phi, phi, measure[idx])
+
+    if workers is None:
+        A = kernel(slice(None))
+    else:
+        NC = space.mesh.number_of_cells()
+        A = np.concatenate(block_map(kernel, 
+            block_slices(NC, -(-NC//workers)), workers=workers), axis=0)
+
+    if assembler is not None:
+        return assembler.assemble(A)
 
     cell2dof = space.cell_to_dof()
     ldof = space.number_of_local_dofs()
@@ -63,14 +433,23 @@ def mass_matrix(space, qf, measure, cfun=None, barycenter=True):
     A = csr_matrix((A.flat, (I.flat, J.flat)), shape=(gdof, gdof))
     return A
 
-def source_vector(f, space, qf, measure, surface=None):
+def source_vector(f, space, qf, measure, surface=None, workers=None):
     bcs, ws = qf.quadpts, qf.weights
     pp = space.mesh.bc_to_point(bcs)
     if surface is not None:
         pp, _ = surface.project(pp)
-    fval = f(pp)
     phi = space.basis(bcs)
-    bb = np.einsum('i, ik, i..., k->k...', ws, fval, phi, measure)
+
+    def kernel(idx):
+        fval = f(pp[:, idx])
+        return np.einsum('i, ik, i..., k->k...', ws, fval, phi, measure[idx])
+
+    if workers is None:
+        bb = kernel(slice(None))
+    else:
+        NC = space.mesh.number_of_cells()
+        bb = np.concatenate(block_map(kernel,
+            block_slices(NC, -(-NC//workers)), workers=workers), axis=0)
 
     cell2dof = space.dof.cell2dof
     gdof = space.number_of_global_dofs()
@@ -35,7 +35,7 @@ class CPLFEMDof1d():
             NN = mesh.number_of_nodes()
             NC = mesh.number_of_cells()
             ldof = self.number_of_local_dofs()
-            cell2dof = np.zeros((NC, ldof), dtype=np.int)
+            cell2dof = np.zeros((NC, ldof), dtype=mesh.itype)
             cell2dof[:, [0, -1]] = cell
             cell2dof[:, 1:-1] = NN + np.arange(NC*(p-1)).reshape(NC, p-1)
             return cell2dof
@@ -123,7 +123,7 @@ class CPLFEMDof2d():
         N = mesh.number_of_nodes()
 
         edge = mesh.ds.edge
-        edge2dof = np.zeros((NE, p+1), dtype=np.int) 
+        edge2dof = np.zeros((NE, p+1), dtype=mesh.itype) 
         edge2dof[:, [0, -1]] = edge 
         if p > 1:
             edge2dof[:, 1:-1] = N + np.arange(NE*(p-1)).reshape(NE, p-1)
@@ -144,7 +144,7 @@ class CPLFEMDof2d():
             cell2dof = cell
 
         if p > 1:
-            cell2dof = np.zeros((NC, ldof), dtype=np.int)
+            cell2dof = np.zeros((NC, ldof), dtype=mesh.itype)
 
             isEdgeDof = self.is_on_edge_local_dof()
             edge2dof = self.edge_to_dof()
@@ -284,7 +284,7 @@ class CPLFEMDof3d():
 
         base = N
         edge = mesh.ds.edge
-        edge2dof = np.zeros((NE, p+1), dtype=np.int) 
+        edge2dof = np.zeros((NE, p+1), dtype=mesh.itype) 
         edge2dof[:, [0, -1]] = edge 
         if p > 1:
             edge2dof[:,1:-1] = base + np.arange(NE*(p-1)).reshape(NE, p-1)
@@ -310,7 +310,7 @@ class CPLFEMDof3d():
 
         edge2dof = self.edge_to_dof()
 
-        face2dof = np.zeros((NF, fdof), dtype=np.int)
+        face2dof = np.zeros((NF, fdof), dtype=mesh.itype)
         faceIdx = self.faceMultiIndex
         isEdgeDof = (faceIdx == 0) 
 
@@ -356,7 +356,7 @@ class CPLFEMDof3d():
 
         cell2face = mesh.ds.cell_to_face()
 
-        cell2dof = np.zeros((NC, ldof), dtype=np.int)
+        cell2dof = np.zeros((NC, ldof), dtype=mesh.itype)
 
         face2dof = self.face_to_dof()
         isFaceDof = self.is_on_face_local_dof()
@@ -472,7 +472,7 @@ class DPLFEMDof():
 
         NC = mesh.number_of_cells()
         ldof = self.number_of_local_dofs()
-        cell2dof = np.arange(NC*ldof).reshape(NC, ldof)
+        cell2dof = np.arange(NC*ldof, dtype=mesh.itype).reshape(NC, ldof)
         return cell2dof 
 
     def number_of_global_dofs(self):
@@ -1,9 +1,18 @@
 import numpy as np
+from collections import OrderedDict
+from threading import Lock
 
 from .function import Function
 from .dof import *
+from ..quadrature import SimplexQuadrature
 
 class LagrangeFiniteElementSpace():
+    referenceTensors = {}
+
+    # the number of the cached basis tabulations, and the largest `bc` (in
+    # number of entries) whose tabulation is cached
+    maxtabulations = 16
+    maxtabulationsize = 4096
     def __init__(self, mesh, p=1, spacetype='C'):
         self.mesh = mesh
         self.p = p 
@@ -31,6 +40,8 @@ class LagrangeFiniteElementSpace():
         self.spacetype = spacetype
         self.itype = mesh.itype
         self.ftype = mesh.ftype
+        self.tabulations = OrderedDict()
+        self.tabulationlock = Lock()
 
     def __str__(self):
         return "Lagrange finite element space!"
@@ -56,6 +67,32 @@ class LagrangeFiniteElementSpace():
     def top_dimension(self):
         return self.dim
 
+    def tabulate(self, name, bc, f):
+        """
+        Return `f(bc)` from a LRU cache keyed by `name` and the data of `bc`
+
+        The basis values and the barycentric derivatives on the reference
+        element only depend on `bc`, and they are asked again and again with
+        the same quadrature points. A read-only view of the cached array is
+        returned, copy it before changing it.
+        """
+        if bc.size > self.maxtabulationsize:
+            return f(bc)
+        key = (name, bc.shape, bc.tobytes())
+        tabulations = self.tabulations
+        with self.tabulationlock:
+            val = tabulations.get(key)
+            if val is not None:
+                tabulations.move_to_end(key)
+                return val.view()
+        val = f(bc)
+        val.flags.writeable = False
+        with self.tabulationlock:
+            tabulations[key] = val
+            if len(tabulations) > self.maxtabulations:
+                tabulations.popitem(last=False)
+        return val.view()
+
     def basis(self, bc):
         """
         compute the basis function values at barycentric point bc 
@@ -75,8 +112,11 @@ class LagrangeFiniteElementSpace():
 
         Notes
         -----
-
+        The values are cached, see `tabulate`.
         """
+        return self.tabulate('basis', np.asarray(bc), self._basis)
+
+    def _basis(self, bc):
         p = self.p   # the degree of polynomial basis function
 
         if p == 0 and self.spacetype == 'D':
@@ -100,9 +140,10 @@ class LagrangeFiniteElementSpace():
         phi = (p**p)*np.prod(A[..., multiIndex, idx], axis=-1)
         return phi
 
-    def grad_basis(self, bc, cellidx=None):
+    def barycentric_grad_basis(self, bc):
         """
-        compute the basis function values at barycentric point bc 
+        compute the derivatives of the basis functions with respect to the
+        barycentric coordinates at barycentric point bc 
 
         Parameters
         ----------
@@ -111,16 +152,17 @@ class LagrangeFiniteElementSpace():
 
         Returns
         -------
-        gphi : numpy.array
-            the shape of `gphi` can b `(NC, ldof, gdim)' or `(NQ, NC, ldof, gdim)'
-
-        See also
-        --------
+        R : numpy.array
+            the shape of `R` can be `(ldof, tdim+1)` or `(NQ, ldof, tdim+1)`
 
         Notes
         -----
-
+        The values are cached, see `tabulate`, so only the contraction with
+        `grad_lambda` is left to `grad_basis`.
         """
+        return self.tabulate('grad', np.asarray(bc), self._barycentric_grad_basis)
+
+    def _barycentric_grad_basis(self, bc):
         p = self.p   # the degree of polynomial basis function
         dim = self.dim 
 
@@ -155,13 +197,76 @@ class LagrangeFiniteElementSpace():
             R[..., i] = M[..., i]*np.prod(Q[..., idx], axis=-1)
 
         pp = p**p
+        return pp*R
+
+    def grad_basis(self, bc, cellidx=None):
+        """
+        compute the basis function values at barycentric point bc 
+
+        Parameters
+        ----------
+        bc : numpy.array
+            the shape of `bc` can be `(tdim+1,)` or `(NQ, tdim+1)`         
+
+        Returns
+        -------
+        gphi : numpy.array
+            the shape of `gphi` can b `(NC, ldof, gdim)' or `(NQ, NC, ldof, gdim)'
+
+        See also
+        --------
+
+        Notes
+        -----
+
+        """
+        R = self.barycentric_grad_basis(bc)
         Dlambda = self.mesh.grad_lambda()
         if cellidx is None:
-            gphi = np.einsum('...ij, kjm->...kim', pp*R, Dlambda)
+            gphi = np.einsum('...ij, kjm->...kim', R, Dlambda)
         else:
-            gphi = np.einsum('...ij, kjm->...kim', pp*R, Dlambda[cellidx, :, :])
+            gphi = np.einsum('...ij, kjm->...kim', R, Dlambda[cellidx, :, :])
         return gphi 
 
+    def is_affine(self):
+        """ 
+        Return True if the element matrices are fixed reference tensors
+        contracted with `mesh.grad_lambda()` and the cell measure
+        """
+        return (self.p > 0) and (self.mesh.meshtype in ['tri', 'tet'])
+
+    def reference_stiff_tensor(self):
+        """
+        The reference stiffness tensor 
+
+            S[i, j, a, b] = 1/|K| int_K dphi_i/dlambda_a dphi_j/dlambda_b dx
+
+        It only depends on `(p, dim)`, so it is computed once and shared by all
+        the spaces. On an affine cell `K` the element stiffness matrix is
+
+            A_K = |K| S[i, j, a, b] (grad lambda_a . grad lambda_b)
+        """
+        key = ('stiff', self.p, self.dim, self.spacetype)
+        if key not in self.referenceTensors:
+            qf = SimplexQuadrature(self.dim, 2*self.p)
+            bcs, ws = qf.quadpts, qf.weights
+            R = self.barycentric_grad_basis(bcs)
+            self.referenceTensors[key] = np.einsum('q, qia, qjb->ijab', ws, R, R)
+        return self.referenceTensors[key]
+
+    def reference_mass_matrix(self):
+        """
+        The reference mass matrix M[i, j] = 1/|K| int_K phi_i phi_j dx, the
+        element mass matrix on an affine cell `K` is |K| M
+        """
+        key = ('mass', self.p, self.dim, self.spacetype)
+        if key not in self.referenceTensors:
+            qf = SimplexQuadrature(self.dim, 2*self.p)
+            bcs, ws = qf.quadpts, qf.weights
+            phi = self.basis(bcs)
+            self.referenceTensors[key] = np.einsum('q, qi, qj->ij', ws, phi, phi)
+        return self.referenceTensors[key]
+
     def value(self, uh, bc, cellidx=None):
         phi = self.basis(bc)
         cell2dof = self.dof.cell2dof
@@ -239,7 +344,7 @@ class VectorLagrangeFiniteElementSpace():
     def cell_to_dof(self):
         dim = self.dim
         cell2dof = self.dof.cell2dof[..., np.newaxis]
-        cell2dof = dim*cell2dof + np.arange(dim)
+        cell2dof = dim*cell2dof + np.arange(dim, dtype=cell2dof.dtype)
         NC = cell2dof.shape[0]
         return cell2dof.reshape(NC, -1)
 
@@ -332,7 +437,7 @@ class SymmetricTensorLagrangeFiniteElementSpace():
     def cell_to_dof(self):
         tdim = self.tensor_dim()
         cell2dof = self.dof.cell2dof[..., np.newaxis]
-        cell2dof = tdim*cell2dof + np.arange(tdim)
+        cell2dof = tdim*cell2dof + np.arange(tdim, dtype=cell2dof.dtype)
         NC = cell2dof.shape[0]
         return cell2dof.reshape(NC, -1)
 
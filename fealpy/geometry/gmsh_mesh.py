@@ -3,8 +3,8 @@ import os
 import subprocess
 import tempfile
 
-import meshio
 import numpy as np
+from ..mesh.gmshio import read_msh
 
 def generate_mesh(geo_object, dim=3, verbose=True, 
         optimize=True, 
@@ -39,7 +39,11 @@ def generate_mesh(geo_object, dim=3, verbose=True,
     assert p.returncode == 0, \
         'Gmsh exited with error (return code {}).'.format(p.returncode)
 
-    point, cell, point_data, cell_data, field_data = meshio.read(msh_filename, 'gmsh')
+    point, cells, physicalnames = read_msh(msh_filename)
+    cell = {name:c for name, (c, _, _) in cells.items()}
+    cell_data = {name:{'physical':p, 'geometrical':e} for name, (_, p, e) in cells.items()}
+    point_data = {}
+    field_data = {name:np.array([tag, dim]) for tag, (dim, name) in physicalnames.items()}
 
     # clean up
     #os.remove(geo_filename)
@@ -12,6 +12,9 @@ class IntervalMesh():
         self.ds = IntervalMeshDataStructure(len(node), cell)
         self.meshtype = 'interval'
 
+        self.itype = cell.dtype
+        self.ftype = node.dtype
+
         self.nodedata = {}
         self.celldata = {}
 
@@ -172,6 +175,7 @@ class IntervalMeshDataStructure():
         self.NN = NN
         self.NC = len(cell)
         self.cell = cell
+        self.itype = cell.dtype
         self.construct()
 
     def reinit(self, NN, cell):
@@ -186,9 +190,9 @@ class IntervalMeshDataStructure():
         cell = self.cell
 
         _, i0, j = np.unique(cell.reshape(-1), return_index=True, return_inverse=True)
-        self.node2cell = np.zeros((NN, 4), dtype=np.int)
+        self.node2cell = np.zeros((NN, 4), dtype=self.itype)
 
-        i1 = np.zeros(NN, dtype=np.int) 
+        i1 = np.zeros(NN, dtype=self.itype) 
         i1[j] = np.arange(2*NC)
 
         self.node2cell[:, 0] = i0//2 
@@ -202,7 +206,7 @@ class IntervalMeshDataStructure():
     def cell_to_cell(self):
         NC = self.NC
         node2cell = self.node2cell
-        cell2cell = np.zeros((NC, 2), dtype=np.int)
+        cell2cell = np.zeros((NC, 2), dtype=self.itype)
         cell2cell[node2cell[:, 0], node2cell[:, 2]] = node2cell[:, 1]
         cell2cell[node2cell[:, 1], node2cell[:, 3]] = node2cell[:, 0]
         return cell2cell
@@ -1,7 +1,8 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye, tril, triu
-from .mesh_tools import unique_row, find_node, find_entity, show_mesh_2d
-from ..common import ranges
+from .mesh_tools import unique_row, unique_row_int, find_node, find_entity, show_mesh_2d
+from ..common import ranges, new_version, versioned_cache
+from .ordering import node_ordering, cell_ordering, entity_permutation
 from types import ModuleType
 
 class Mesh2d():
@@ -9,6 +10,31 @@ class Mesh2d():
         
         The class is just a abstract class, and you can not use it directly.
     """
+    @property
+    def node(self):
+        return self._node
+
+    @node.setter
+    def node(self, node):
+        self._node = node
+        self.nodeversion = new_version()
+
+    def modified(self):
+        """ Tell the mesh that `node` has been changed in place, which drops
+        the cached geometric arrays 
+        """
+        self.nodeversion = new_version()
+
+    def version(self):
+        """ The version of the mesh, changed by every new `node`, every
+        `ds.reinit` and `modified()`. The geometric arrays (`grad_lambda`,
+        the measures, the barycenters, `bc_to_point`) are cached against it. 
+        """
+        dsversion = getattr(self.ds, 'version', None)
+        if dsversion is None:
+            return None
+        return (self.nodeversion, dsversion)
+
     def number_of_nodes(self):
         return self.ds.NN
 
@@ -30,6 +56,7 @@ class Mesh2d():
     def top_dimension(self):
         return 2
 
+    @versioned_cache
     def barycenter(self, etype='cell', index=None):
         node = self.node
         if etype in ['cell', 2]:
@@ -54,6 +81,50 @@ class Mesh2d():
         return bc
 
 
+    def reorder(self, method='rcm'):
+        """ Renumber the nodes and the cells for the locality of the data
+
+        Parameters
+        ----------
+        method : 'rcm', 'hilbert' or 'morton'
+            'rcm' is the reverse Cuthill-McKee ordering of the nodes, and the
+            cells are sorted by their smallest new node index. 'hilbert' and
+            'morton' sort the nodes and the cell barycenters along a space
+            filling curve.
+
+        Returns
+        -------
+        perm : dict, the new entity `i` of type `etype` is the old entity
+            `perm[etype][i]`. The arrays in `nodedata`, `edgedata`,
+            and `celldata` are permuted in the same way, and e.g. a linear finite
+            element function is remapped by `uh[perm['node']]`.
+        """
+        perm = {}
+        perm['node'] = node_ordering(self, method)
+        perm['cell'] = cell_ordering(self, perm['node'], method)
+        entity = {etype:self.entity(etype) for etype in ['edge']}
+        self.renumber(perm['node'], perm['cell'])
+        for etype in entity:
+            perm[etype] = entity_permutation(entity[etype], perm['node'][self.entity(etype)])
+
+        for etype in perm:
+            data = getattr(self, etype + 'data', {})
+            for key, val in data.items():
+                if isinstance(val, np.ndarray) and (len(val) == len(perm[etype])):
+                    data[key] = val[perm[etype]]
+        return perm
+
+    def renumber(self, nodeperm, cellperm):
+        """ The new node `i` is the old node `nodeperm[i]`, and the new cell
+        `i` is the old cell `cellperm[i]`
+        """
+        NN = self.number_of_nodes()
+        node2new = np.zeros(NN, dtype=self.itype)
+        node2new[nodeperm] = np.arange(NN, dtype=self.itype)
+        self.node = self.node[nodeperm]
+        cell = node2new[self.ds.cell[cellperm]]
+        self.ds.reinit(NN, cell)
+
     def entity(self, etype=2):
         if etype in ['cell', 2]:
             return self.ds.cell
@@ -74,6 +145,7 @@ class Mesh2d():
         else:
             raise ValueError("`entitytype` is wrong!")
 
+    @versioned_cache
     def entity_barycenter(self, etype=2, index=None):
         node = self.node
         if etype in ['cell', 2]:
@@ -98,6 +170,7 @@ class Mesh2d():
         return bc
 
 
+    @versioned_cache
     def edge_length(self, index=None):
         node = self.entity('node')
         edge = self.entity('edge')
@@ -221,15 +294,125 @@ class Mesh2dDataStructure():
         self.itype = cell.dtype
         self.construct()
 
-    def reinit(self, NN, cell):
+    def reinit(self, NN, cell, cell2edge=None):
         self.NN = NN
         self.NC = cell.shape[0]
         self.cell = cell
-        self.construct()
+        self.construct(cell2edge=cell2edge)
+
+    def update(self, NN, cell, index=None):
+        """ Update the topology after the cells `index` of `cell` have been
+        changed in place and the cells `cell[NC:]` have been appended, where
+        `NC` is the old number of cells. 
+
+        Only the edges touching the nodes of these cells are regrouped. The
+        other edges keep their indices, the new edges first take the places
+        of the removed edges and are then appended, and if fewer edges are
+        added than removed, the last edges are moved to the free places.
+
+        Notes
+        -----
+            `changedCell` and `changedEdge` are the indices of the cells and
+            the edges whose entries have changed, and `edgeIdxMap` maps the
+            old edge indices to the new ones (-1 for the removed edges).
+        """
+        NC0 = self.NC
+        NE0 = self.NE
+        NC = cell.shape[0]
+        E = self.E
+
+        isChangedCell = np.zeros(NC, dtype=np.bool_)
+        isChangedCell[NC0:] = True
+        if index is not None:
+            isChangedCell[index] = True
+        changedCell, = np.nonzero(isChangedCell)
+
+        edge = self.edge
+        edge2cell = self.edge2cell
+
+        # the old edges which can be changed
+        isTouchedNode = np.zeros(NN, dtype=np.bool_)
+        isTouchedNode[cell[changedCell]] = True
+        isInvalid0 = isChangedCell[edge2cell[:, 0]]
+        isInvalid1 = isChangedCell[edge2cell[:, 1]]
+        isTouchedEdge = isTouchedNode[edge[:, 0]] | isTouchedNode[edge[:, 1]] 
+        isTouchedEdge |= isInvalid0 | isInvalid1
+        touchedEdge, = np.nonzero(isTouchedEdge)
+
+        # the still valid sides of the touched edges and the edges of the
+        # changed cells
+        e2c = edge2cell[touchedEdge]
+        flag0 = ~isInvalid0[touchedEdge]
+        flag1 = ~isInvalid1[touchedEdge] & (
+                (e2c[:, 0] != e2c[:, 1]) | (e2c[:, 2] != e2c[:, 3]))
+        NCC = len(changedCell)
+        c = np.r_[e2c[flag0, 0], e2c[flag1, 1], np.repeat(changedCell, E)]
+        l = np.r_[e2c[flag0, 2], e2c[flag1, 3], np.tile(np.arange(E), NCC)]
+        eidx = np.r_[touchedEdge[flag0], touchedEdge[flag1],
+                -np.ones(E*NCC, dtype=self.itype)]
+        idx = np.argsort(c.astype(np.int64)*E + l, kind='mergesort')
+        c = c[idx]
+        l = l[idx]
+        eidx = eidx[idx]
+
+        totalEdge = cell[c.reshape(-1, 1), self.localEdge[l]]
+        _, i0, j = unique_row_int(np.sort(totalEdge, axis=1), NN)
+        n = len(i0)
+        i1 = np.zeros(n, dtype=self.itype)
+        i1[j] = np.arange(len(j))
+        gidx = -np.ones(n, dtype=self.itype)
+        isOld = eidx >= 0
+        gidx[j[isOld]] = eidx[isOld]
+
+        # the new edges take the places of the removed edges, and the last
+        # edges fill the remaining places
+        isRemovedEdge = isTouchedEdge
+        isRemovedEdge[gidx[gidx >= 0]] = False
+        removedEdge, = np.nonzero(isRemovedEdge)
+        isNewEdge = gidx < 0
+        NNE = isNewEdge.sum()
+        NE = NE0 - len(removedEdge) + NNE
+
+        edgeIdxMap = np.arange(NE0, dtype=self.itype)
+        edgeIdxMap[removedEdge] = -1
+        newEdge = np.r_[removedEdge[:NNE], np.arange(NE0, NE)].astype(self.itype)
+        hole = removedEdge[NNE:]
+        hole = hole[hole < NE]
+        isMovedEdge = ~isRemovedEdge[NE:]
+        movedEdge = NE + np.nonzero(isMovedEdge)[0]
+        edgeIdxMap[movedEdge] = hole
+
+        changedEdge = np.zeros(n, dtype=self.itype)
+        changedEdge[~isNewEdge] = edgeIdxMap[gidx[~isNewEdge]]
+        changedEdge[isNewEdge] = newEdge 
+
+        N = min(NE, NE0)
+        self.edge = np.zeros((NE, 2), dtype=self.itype)
+        self.edge[:N] = edge[:N]
+        self.edge[hole] = edge[movedEdge]
+        self.edge[changedEdge] = totalEdge[i0]
+        self.edge2cell = np.zeros((NE, 4), dtype=self.itype)
+        self.edge2cell[:N] = edge2cell[:N]
+        self.edge2cell[hole] = edge2cell[movedEdge]
+        self.edge2cell[changedEdge, 0] = c[i0]
+        self.edge2cell[changedEdge, 1] = c[i1]
+        self.edge2cell[changedEdge, 2] = l[i0]
+        self.edge2cell[changedEdge, 3] = l[i1]
+        changedEdge = np.r_[changedEdge, hole]
+
+        self.NN = NN
+        self.NC = NC
+        self.NE = NE
+        self.cell = cell
+        self.changedCell = changedCell
+        self.changedEdge = changedEdge
+        self.edgeIdxMap = edgeIdxMap
+        self.version = new_version()
 
     def clear(self):
         self.edge = None
         self.edge2cell = None
+        self.version = new_version()
 
     def number_of_vertices_of_cells(self):
         return self.V
@@ -249,15 +432,32 @@ class Mesh2dDataStructure():
     def local_edge(self):
         return self.localEdge
 
-    def construct(self):  
+    def construct(self, cell2edge=None):  
         """ Construct edge and edge2cell from cell
+
+        Parameters
+        ----------
+        cell2edge : numpy.ndarray, (NC, E), optional 
+            the edge indices of the cells when they are already known, e.g.
+            after a uniform refinement, then no sorting is needed
         """
         NC = self.NC
         E = self.E
 
+        self.version = new_version()
+        self.changedCell = None
+        self.changedEdge = None
+        self.edgeIdxMap = None
+
         totalEdge = self.total_edge()
-        _, i0, j = unique_row(np.sort(totalEdge, axis=1))
-        NE = i0.shape[0]
+        if cell2edge is None:
+            _, i0, j = unique_row_int(np.sort(totalEdge, axis=1), self.NN)
+            NE = i0.shape[0]
+        else:
+            j = cell2edge.reshape(-1)
+            NE = j.max() + 1
+            i0 = np.zeros(NE, dtype=self.itype)
+            i0[j[-1::-1]] = np.arange(E*NC-1, -1, -1, dtype=self.itype)
         self.NE = NE
 
         self.edge2cell = np.zeros((NE, 4), dtype=self.itype)
@@ -272,6 +472,7 @@ class Mesh2dDataStructure():
 
         self.edge = totalEdge[i0, :]
 
+    @versioned_cache
     def cell_to_node(self):
         """ 
         """
@@ -286,6 +487,7 @@ class Mesh2dDataStructure():
         cell2node = csr_matrix((val, (I, cell.flatten())), shape=(NC, NN), dtype=np.bool)
         return cell2node
 
+    @versioned_cache
     def cell_to_edge(self, sparse=False):
         """ The neighbor information of cell to edge
         """
@@ -309,6 +511,7 @@ class Mesh2dDataStructure():
                     shape=(NC, NE), dtype=np.bool)
             return cell2edge 
 
+    @versioned_cache
     def cell_to_edge_sign(self, sparse=False):
         NC = self.NC
         E = self.E
@@ -324,6 +527,7 @@ class Mesh2dDataStructure():
                     shape=(NC, NE), dtype=np.bool)
         return cell2edgeSign
 
+    @versioned_cache
     def cell_to_cell(self, return_sparse=False, return_boundary=True, return_array=False):
         """ Consctruct the neighbor information of cells
         """
@@ -368,6 +572,7 @@ class Mesh2dDataStructure():
                 adjLocation[1:] = np.cumsum(nn)
                 return adj.astype(np.int32), adjLocation
 
+    @versioned_cache
     def edge_to_node(self, sparse=False):
         NN = self.NN
         NE = self.NE
@@ -382,19 +587,23 @@ class Mesh2dDataStructure():
             edge2node = csr_matrix((val, (I, J)), shape=(NE, NN), dtype=np.bool)
             return edge2node
 
+    @versioned_cache
     def edge_to_edge(self, sparse=False):
         edge2node = self.edge_to_node(sparse=True)
         return edge2node*edge2node.transpose(0, 1)
 
+    @versioned_cache
     def edge_to_edge(self, sparse=False):
         edge2node = self.edge_to_node()
         return edge2node*edge2node.transpose()
 
+    @versioned_cache
     def edge_to_edge(self):
         edge2node = self.edge_to_node(sparse=True)
         return edge2node*edge2node.transpose()
 
 
+    @versioned_cache
     def edge_to_cell(self, sparse=False):
         if sparse==False:
             return self.edge2cell
@@ -407,6 +616,7 @@ class Mesh2dDataStructure():
             face2cell = csr_matrix((val, (I, J)), shape=(NE, NC), dtype=np.bool)
             return face2cell 
 
+    @versioned_cache
     def node_to_node(self, return_array=False):
         """ The neighbor information of nodes
         """
@@ -433,6 +643,7 @@ class Mesh2dDataStructure():
         node2node = csr_matrix((val, (I, J)), shape=(NN, NN), dtype=np.bool)
         return node2node
 
+    @versioned_cache
     def node_to_edge(self):
         NN = self.NN
         NE = self.NE
@@ -444,6 +655,7 @@ class Mesh2dDataStructure():
         node2edge = csr_matrix((val, (I, J)), shape=(NN, NE), dtype=np.bool)
         return node2edge
 
+    @versioned_cache
     def node_to_cell(self, localidx=False):
         """
         """
@@ -465,6 +677,7 @@ class Mesh2dDataStructure():
         return node2cell
 
 
+    @versioned_cache
     def boundary_node_flag(self):
         NN = self.NN
         edge = self.edge
@@ -473,14 +686,17 @@ class Mesh2dDataStructure():
         isBdPoint[edge[isBdEdge,:]] = True
         return isBdPoint
 
+    @versioned_cache
     def boundary_edge_flag(self):
         edge2cell = self.edge2cell
         return edge2cell[:, 0] == edge2cell[:, 1]
 
+    @versioned_cache
     def boundary_edge(self):
         edge = self.edge
         return edge[self.boundary_edge_index()]
 
+    @versioned_cache
     def boundary_cell_flag(self):
         NC = self.NC
         edge2cell = self.edge2cell
@@ -489,16 +705,19 @@ class Mesh2dDataStructure():
         isBdCell[edge2cell[isBdEdge,0]] = True
         return isBdCell 
 
+    @versioned_cache
     def boundary_node_index(self):
         isBdPoint = self.boundary_node_flag()
         idx, = np.nonzero(isBdPoint)
         return idx 
 
+    @versioned_cache
     def boundary_edge_index(self):
         isBdEdge = self.boundary_edge_flag()
         idx, = np.nonzero(isBdEdge)
         return idx 
 
+    @versioned_cache
     def boundary_cell_index(self):
         isBdCell = self.boundary_cell_flag()
         idx, = np.nonzero(isBdCell)
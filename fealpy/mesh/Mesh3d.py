@@ -2,14 +2,40 @@ import numpy as np
 
 from types import ModuleType
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye, tril, triu
-import mpl_toolkits.mplot3d as a3
-from .mesh_tools import unique_row, find_entity, show_mesh_3d, find_node
+from .mesh_tools import unique_row, unique_row_int, find_entity, show_mesh_3d, find_node
+from ..common import new_version, versioned_cache
+from .ordering import node_ordering, cell_ordering, entity_permutation
 
 
 class Mesh3d():
     def __init__(self):
         pass
 
+    @property
+    def node(self):
+        return self._node
+
+    @node.setter
+    def node(self, node):
+        self._node = node
+        self.nodeversion = new_version()
+
+    def modified(self):
+        """ Tell the mesh that `node` has been changed in place, which drops
+        the cached geometric arrays 
+        """
+        self.nodeversion = new_version()
+
+    def version(self):
+        """ The version of the mesh, changed by every new `node`, every
+        `ds.reinit` and `modified()`. The geometric arrays (`grad_lambda`,
+        the measures, the barycenters, `bc_to_point`) are cached against it. 
+        """
+        dsversion = getattr(self.ds, 'version', None)
+        if dsversion is None:
+            return None
+        return (self.nodeversion, dsversion)
+
     def number_of_nodes(self):
         return self.node.shape[0]
 
@@ -37,6 +63,50 @@ class Mesh3d():
     def top_dimension(self):
         return 3
 
+    def reorder(self, method='rcm'):
+        """ Renumber the nodes and the cells for the locality of the data
+
+        Parameters
+        ----------
+        method : 'rcm', 'hilbert' or 'morton'
+            'rcm' is the reverse Cuthill-McKee ordering of the nodes, and the
+            cells are sorted by their smallest new node index. 'hilbert' and
+            'morton' sort the nodes and the cell barycenters along a space
+            filling curve.
+
+        Returns
+        -------
+        perm : dict, the new entity `i` of type `etype` is the old entity
+            `perm[etype][i]`. The arrays in `nodedata`, `edgedata`,
+            `facedata` and `celldata` are permuted in the same way, and e.g.
+            a linear finite element function is remapped by `uh[perm['node']]`.
+        """
+        perm = {}
+        perm['node'] = node_ordering(self, method)
+        perm['cell'] = cell_ordering(self, perm['node'], method)
+        entity = {etype:self.entity(etype) for etype in ['edge', 'face']}
+        self.renumber(perm['node'], perm['cell'])
+        for etype in entity:
+            perm[etype] = entity_permutation(entity[etype], perm['node'][self.entity(etype)])
+
+        for etype in perm:
+            data = getattr(self, etype + 'data', {})
+            for key, val in data.items():
+                if isinstance(val, np.ndarray) and (len(val) == len(perm[etype])):
+                    data[key] = val[perm[etype]]
+        return perm
+
+    def renumber(self, nodeperm, cellperm):
+        """ The new node `i` is the old node `nodeperm[i]`, and the new cell
+        `i` is the old cell `cellperm[i]`
+        """
+        NN = self.number_of_nodes()
+        node2new = np.zeros(NN, dtype=self.itype)
+        node2new[nodeperm] = np.arange(NN, dtype=self.itype)
+        self.node = self.node[nodeperm]
+        cell = node2new[self.ds.cell[cellperm]]
+        self.ds.reinit(NN, cell)
+
     def entity(self, etype='cell'):
         if etype in ['cell', 3]:
             return self.ds.cell
@@ -62,6 +132,7 @@ class Mesh3d():
         else:
             raise ValueError("`entitytype` is wrong!")
 
+    @versioned_cache
     def entity_barycenter(self, etype='cell'):
         node = self.node
         if etype in ['cell', 3]:
@@ -157,6 +228,17 @@ class Mesh3d():
 
 
 class Mesh3dDataStructure():
+    """ The topology data structure of mesh 3d
+
+    Notes
+    -----
+        `construct` always builds `face` and `face2cell`. When `eager` is
+        `False`, `edge`, `cell2edge` and `NE` are only built on the first
+        access. The other relations are computed on the first call and
+        cached until the next `reinit`.
+    """
+    eager = True
+
     def __init__(self, NN, cell):
         self.itype = cell.dtype
         self.NN = NN
@@ -175,6 +257,13 @@ class Mesh3dDataStructure():
         self.face2cell = None
         self.edge = None
         self.cell2edge = None
+        self.version = new_version()
+
+    def __getattr__(self, name):
+        if (name in {'edge', 'cell2edge', 'NE'}) and ('cell' in self.__dict__):
+            self.construct_edge()
+            return self.__dict__[name]
+        raise AttributeError("'%s' object has no attribute '%s'"%(type(self).__name__, name))
 
     def number_of_nodes_of_cells(self):
         return self.V
@@ -201,10 +290,11 @@ class Mesh3dDataStructure():
         
     def construct(self):
         NC = self.NC
+        self.version = new_version()
 
         totalFace = self.total_face()
 
-        _, i0, j = unique_row(np.sort(totalFace, axis=1))
+        _, i0, j = unique_row_int(np.sort(totalFace, axis=1), self.NN)
         self.face = totalFace[i0]
 
         NF = i0.shape[0]
@@ -221,13 +311,21 @@ class Mesh3dDataStructure():
         self.face2cell[:, 2] = i0%F 
         self.face2cell[:, 3] = i1%F 
 
+        if self.eager:
+            self.construct_edge()
+        else:
+            for name in ['edge', 'cell2edge', 'NE']:
+                self.__dict__.pop(name, None)
 
+    def construct_edge(self):
+        NC = self.NC
         totalEdge = self.total_edge()
-        self.edge, i2, j = unique_row(np.sort(totalEdge, axis=1))
+        self.edge, i2, j = unique_row_int(np.sort(totalEdge, axis=1), self.NN)
         E = self.E
-        self.cell2edge = np.reshape(j, (NC, E))
+        self.cell2edge = np.reshape(j, (NC, E)).astype(self.itype)
         self.NE = self.edge.shape[0]
 
+    @versioned_cache
     def cell_to_node(self):
         """ 
         """
@@ -242,6 +340,7 @@ class Mesh3dDataStructure():
         cell2node = csr_matrix((val, (I, cell.flatten())), shape=(NC, NN), dtype=np.bool)
         return cell2node
 
+    @versioned_cache
     def cell_to_edge(self, sparse=False):
         """ The neighbor information of cell to edge
         """
@@ -257,6 +356,7 @@ class Mesh3dDataStructure():
             cell2edge = csr_matrix((val, (I, self.cell2edge.flatten())), shape=(NC, NE), dtype=np.bool)
             return cell2edge
 
+    @versioned_cache
     def cell_to_edge_sign(self, cell):
         NC = self.NC
         E = self.E
@@ -266,6 +366,7 @@ class Mesh3dDataStructure():
             cell2edgeSign[:, i] = cell[:, j] < cell[:, k] 
         return cell2edgeSign
 
+    @versioned_cache
     def cell_to_face(self, sparse=False):
         NC = self.NC
         NF = self.NF
@@ -283,6 +384,7 @@ class Mesh3dDataStructure():
             cell2face = csr_matrix((val, (I, J)), shape=(NC, NF), dtype=np.bool)
             return cell2face
 
+    @versioned_cache
     def cell_to_cell(self, return_sparse=False, 
             return_boundary=True, return_array=False):
         """ Get the adjacency information of cells
@@ -328,6 +430,7 @@ class Mesh3dDataStructure():
                 adjLocation[1:] = np.cumsum(nn)
                 return adj.astype(np.int32), adjLocation
 
+    @versioned_cache
     def face_to_node(self, return_sparse=False):
 
         face = self.face
@@ -342,6 +445,7 @@ class Mesh3dDataStructure():
             face2node = csr_matrix((val, (I, face)), shape=(NF, N), dtype=np.bool)
             return face2node
 
+    @versioned_cache
     def face_to_edge(self, return_sparse=False):
         cell2edge = self.cell2edge
         face2cell = self.face2cell
@@ -359,10 +463,12 @@ class Mesh3dDataStructure():
             f2e = csr_matrix((val, (I, J)), shape=(NF, NE), dtype=np.bool)
             return f2e
 
+    @versioned_cache
     def face_to_face(self):
         face2edge = self.face_to_edge()
         return face2edge*face2edge.transpose()
 
+    @versioned_cache
     def face_to_cell(self, return_sparse=False):
         if return_sparse==False:
             return self.face2cell
@@ -375,6 +481,7 @@ class Mesh3dDataStructure():
             face2cell = csr_matrix((val, (I, J)), shape=(NF, NC), dtype=np.bool)
             return face2cell 
 
+    @versioned_cache
     def edge_to_node(self, return_sparse=False):
         NN = self.NN
         NE = self.NE
@@ -389,10 +496,12 @@ class Mesh3dDataStructure():
             edge2node = csr_matrix((val, (I, J)), shape=(NE, NN), dtype=np.bool)
             return edge2node
 
+    @versioned_cache
     def edge_to_edge(self):
         edge2node = self.edge_to_node()
         return edge2node*edge2node.transpose()
 
+    @versioned_cache
     def edge_to_face(self):
         NF = self.NF
         NE = self.NE
@@ -404,6 +513,7 @@ class Mesh3dDataStructure():
         edge2face = csr_matrix((val, (I, J)), shap=(NE, NF), dtype=np.bool)
         return edge2face
 
+    @versioned_cache
     def edge_to_cell(self, localidx=False):
         NC = self.NC
         NE = self.NE
@@ -415,6 +525,7 @@ class Mesh3dDataStructure():
         edge2cell = csr_matrix((val, (I, J)), shape=(NE, NC), dtype=np.bool)
         return edge2cell
 
+    @versioned_cache
     def node_to_node(self):
         """ The neighbor information of nodes
         """
@@ -427,6 +538,7 @@ class Mesh3dDataStructure():
         node2node = csr_matrix((val, (I, J)), shape=(NN, NN),dtype=np.bool)
         return node2node
 
+    @versioned_cache
     def node_to_edge(self):
         NN = self.NN
         NE = self.NE
@@ -438,6 +550,7 @@ class Mesh3dDataStructure():
         node2edge = csr_matrix((val, (I, J)), shape=(NE, NN), dtype=np.bool)
         return node2edge
 
+    @versioned_cache
     def node_to_face(self):
         NN = self.NN
         NF = self.NF
@@ -451,6 +564,7 @@ class Mesh3dDataStructure():
         node2face = csr_matrix((val, (I, J)), shape=(NF, NN), dtype=np.bool)
         return node2face
 
+    @versioned_cache
     def node_to_cell(self, return_local_index=False):
         """
         """
@@ -472,6 +586,7 @@ class Mesh3dDataStructure():
             node2cell = csr_matrix((val, (I, J)), shape=(NN, NC), dtype=np.bool)
         return node2cell
 
+    @versioned_cache
     def boundary_node_flag(self):
         NN = self.NN
         face = self.face
@@ -480,6 +595,7 @@ class Mesh3dDataStructure():
         isBdPoint[face[isBdFace,:]] = True 
         return isBdPoint 
 
+    @versioned_cache
     def boundary_edge_flag(self):
         NE = self.NE
         face2edge = self.face_to_edge()
@@ -488,11 +604,13 @@ class Mesh3dDataStructure():
         isBdEdge[face2edge[isBdFace, :]] = True
         return isBdEdge 
 
+    @versioned_cache
     def boundary_face_flag(self):
         NF = self.NF
         face2cell = self.face_to_cell()
         return face2cell[:, 0] == face2cell[:, 1] 
 
+    @versioned_cache
     def boundary_cell_flag(self):
         NC = self.NC
         face2cell = self.face_to_cell()
@@ -501,21 +619,25 @@ class Mesh3dDataStructure():
         isBdCell[face2cell[isBdFace, 0]] = True
         return isBdCell 
 
+    @versioned_cache
     def boundary_node_index(self):
         isBdPoint = self.boundary_node_flag()
         idx, = np.nonzero(isBdPoint)
         return idx
 
+    @versioned_cache
     def boundary_edge_index(self):
         isBdEdge = self.boundary_edge_flag()
         idx, = np.nonzero(isBdPoint)
         return idx
 
+    @versioned_cache
     def boundary_face_index(self):
         isBdFace = self.boundary_face_flag()
         idx, = np.nonzero(isBdFace)
         return idx 
 
+    @versioned_cache
     def boundary_cell_index(self):
         isBdCell = self.boundary_cell_flag()
         idx, = np.nonzero(isBdCell)
@@ -1,7 +1,7 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye, tril, triu
-from ..common import ranges
-from .mesh_tools import unique_row, find_entity, show_mesh_2d
+from ..common import ranges, new_version, versioned_cache
+from .mesh_tools import unique_row, unique_row_int, find_entity, show_mesh_2d
 from ..quadrature import TriangleQuadrature
 from .Mesh2d import Mesh2d
 
@@ -28,6 +28,21 @@ class PolygonMesh(Mesh2d):
     def integrator(self, k):
         return TriangleQuadrature(k)
 
+    def renumber(self, nodeperm, cellperm):
+        NN = self.number_of_nodes()
+        node2new = np.zeros(NN, dtype=self.itype)
+        node2new[nodeperm] = np.arange(NN, dtype=self.itype)
+
+        cell = self.ds.cell
+        cellLocation = self.ds.cellLocation
+        NV = self.ds.number_of_vertices_of_cells()[cellperm]
+        location = np.zeros(len(NV)+1, dtype=cellLocation.dtype)
+        location[1:] = np.cumsum(NV)
+        idx = ranges(NV) + np.repeat(cellLocation[cellperm], NV)
+
+        self.node = self.node[nodeperm]
+        self.ds.reinit(NN, node2new[cell[idx]], location)
+
     def number_of_vertices_of_cells(self):
         return self.ds.number_of_vertices_of_cells()
 
@@ -36,7 +51,7 @@ class PolygonMesh(Mesh2d):
         cell = self.ds.cell
         cellLocation = self.ds.cellLocation
         NV = self.ds.number_of_vertices_of_cells()
-        cells = np.zeros(len(cell) + NC, dtype=np.int)
+        cells = np.zeros(len(cell) + NC, dtype=self.itype)
         isIdx = np.ones(len(cell) + NC, dtype=np.bool)
         isIdx[0] = False
         isIdx[np.add.accumulate(NV+1)[:-1]] = False
@@ -78,8 +93,8 @@ class PolygonMesh(Mesh2d):
         cell = self.ds.cell
         cellLocation = self.ds.cellLocation
 
-        idx1 = np.zeros(cell.shape[0], dtype=np.int)
-        idx2 = np.zeros(cell.shape[0], dtype=np.int)
+        idx1 = np.zeros(cell.shape[0], dtype=self.itype)
+        idx2 = np.zeros(cell.shape[0], dtype=self.itype)
 
         idx1[0:-1] = cell[1:]
         idx1[cellLocation[1:]-1] = cell[cellLocation[:-1]]
@@ -97,8 +112,8 @@ class PolygonMesh(Mesh2d):
         cell = self.ds.cell
         cellLocation = self.ds.cellLocation
 
-        idx1 = np.zeros(cell.shape[0], dtype=np.int)
-        idx2 = np.zeros(cell.shape[0], dtype=np.int)
+        idx1 = np.zeros(cell.shape[0], dtype=self.itype)
+        idx2 = np.zeros(cell.shape[0], dtype=self.itype)
 
         idx1[0:-1] = cell[1:]
         idx1[cellLocation[1:]-1] = cell[cellLocation[:-1]]
@@ -155,10 +170,11 @@ class PolygonMeshDataStructure():
 
         self.cell = cell
         self.cellLocation = cellLocation
+        self.itype = cell.dtype
         self.construct()
 
-    def reinit(self, N, cell, cellLocation):
-        self.N = N
+    def reinit(self, NN, cell, cellLocation):
+        self.NN = NN
         self.NC = cellLocation.shape[0] - 1
 
         self.cell = cell
@@ -168,6 +184,7 @@ class PolygonMeshDataStructure():
     def clear(self):
         self.edge = None
         self.edge2cell = None
+        self.version = new_version()
 
     def number_of_vertices_of_cells(self):
         cellLocation = self.cellLocation 
@@ -185,7 +202,7 @@ class PolygonMeshDataStructure():
         NC = self.NC
         NV = self.number_of_vertices_of_cells() 
 
-        totalEdge = np.zeros((cell.shape[0], 2), dtype=np.int)
+        totalEdge = np.zeros((cell.shape[0], 2), dtype=self.itype)
         totalEdge[:, 0] = cell
         totalEdge[:-1, 1] = cell[1:] 
         totalEdge[cellLocation[1:] - 1, 1] = cell[cellLocation[:-1]]
@@ -193,19 +210,20 @@ class PolygonMeshDataStructure():
 
     def construct(self):  
         NC = self.NC
+        self.version = new_version()
         
         cell = self.cell
         cellLocation = self.cellLocation
         NV = self.number_of_vertices_of_cells() 
 
         totalEdge = self.total_edge()
-        _, i0, j = unique_row(np.sort(totalEdge, axis=1))
+        _, i0, j = unique_row_int(np.sort(totalEdge, axis=1), self.NN)
 
         NE = i0.shape[0]
         self.NE = NE
-        self.edge2cell = np.zeros((NE, 4), dtype=np.int)
+        self.edge2cell = np.zeros((NE, 4), dtype=self.itype)
 
-        i1 = np.zeros(NE, dtype=np.int) 
+        i1 = np.zeros(NE, dtype=self.itype) 
         i1[j] = np.arange(len(cell))
 
         self.edge = totalEdge[i0]
@@ -219,6 +237,7 @@ class PolygonMeshDataStructure():
         self.edge2cell[:, 2] = localIdx[i0] 
         self.edge2cell[:, 3] = localIdx[i1] 
 
+    @versioned_cache
     def cell_to_node(self):
         NN = self.NN
         NC = self.NC
@@ -234,6 +253,7 @@ class PolygonMeshDataStructure():
         cell2node = csr_matrix((val, (I, J)), shape=(NC, NN), dtype=np.bool)
         return cell2node
 
+    @versioned_cache
     def cell_to_edge(self, sparse=True):
         NE = self.NE
         NC = self.NC
@@ -249,11 +269,12 @@ class PolygonMeshDataStructure():
             cell2edge += coo_matrix((val, (edge2cell[:,1], J)), shape=(NC, NE), dtype=np.bool)
             return cell2edge.tocsr()
         else:
-            cell2edge = np.zeros(cell.shape[0], dtype=np.int)
+            cell2edge = np.zeros(cell.shape[0], dtype=self.itype)
             cell2edge[cellLocation[:-1]+edge2cell[:, 2]] = range(NE)
             cell2edge[cellLocation[:-1]+edge2cell[:, 3]] = range(NE)
             return cell2edge
 
+    @versioned_cache
     def cell_to_edge_sign(self):
         NE = self.NE
         NC = self.NC
@@ -262,6 +283,7 @@ class PolygonMeshDataStructure():
         cell2edgeSign = csr_matrix((val, (edge2cell[:,0], range(NE))), shape=(NC,NE), dtype=np.bool)
         return cell2edgeSign
 
+    @versioned_cache
     def cell_to_cell(self):
         NC = self.NC
         edge2cell = self.edge2cell
@@ -275,6 +297,7 @@ class PolygonMeshDataStructure():
                 shape=(NC,NC), dtype=np.bool)
         return cell2cell.tocsr()
 
+    @versioned_cache
     def edge_to_node(self, sparse=False):
         NN = self.NN
         NE = self.NE
@@ -288,10 +311,12 @@ class PolygonMeshDataStructure():
             edge2node+= coo_matrix((val, (edge[:,1], edge[:,0])), shape=(NE, NN), dtype=np.bool)
             return edge2node.tocsr()
 
+    @versioned_cache
     def edge_to_edge(self):
         edge2node = self.edge_to_node()
         return edge2node*edge2node.tranpose()
 
+    @versioned_cache
     def edge_to_cell(self, sparse=False):
         NE = self.NE
         NC = self.NC
@@ -304,11 +329,13 @@ class PolygonMeshDataStructure():
             edge2cell+= coo_matrix((val, (range(NE), edge2cell[:,1])), shape=(NE, NC), dtype=np.bool)
             return edge2cell.tocsr()
 
+    @versioned_cache
     def node_to_node(self):
         NN = self.NN
         edge = self.edge
         return node_to_node_in_edge(NN, edge)
 
+    @versioned_cache
     def node_to_node_in_edge(self, NN, edge):
         I = edge.flatten()
         J = edge[:, [1, 0]].flatten()
@@ -316,6 +343,7 @@ class PolygonMeshDataStructure():
         node2node = csr_matrix((val, (I, J)), shape=(NN, NN), dtype=np.bool)
         return node2node
 
+    @versioned_cache
     def node_to_edge(self):
         NN = self.NN
         NE = self.NE
@@ -327,6 +355,7 @@ class PolygonMeshDataStructure():
         node2edge+= coo_matrix((val, (edge[:,1], range(NE))), shape=(NE, NN), dtype=np.bool)
         return node2edge.tocsr()
 
+    @versioned_cache
     def node_to_cell(self):
         NN = self.NN
         NC = self.NC
@@ -340,6 +369,7 @@ class PolygonMeshDataStructure():
         node2cell = csr_matrix((val, (I, J)), shape=(NN, NC), dtype=np.bool)
         return node2cell
 
+    @versioned_cache
     def boundary_node_flag(self):
         NN = self.NN
         edge = self.edge
@@ -348,15 +378,18 @@ class PolygonMeshDataStructure():
         isBdNode[edge[isBdEdge,:]] = True
         return isBdNode
 
+    @versioned_cache
     def boundary_edge_flag(self):
         NE = self.NE
         edge2cell = self.edge2cell
         return edge2cell[:,0] == edge2cell[:,1]
 
+    @versioned_cache
     def boundary_edge(self):
         edge = self.edge
         return edge[self.boundary_edge_index()]
 
+    @versioned_cache
     def boundary_cell_flag(self):
         NC = self.NC
         edge2cell = self.edge2cell
@@ -366,16 +399,19 @@ class PolygonMeshDataStructure():
         isBdCell[edge2cell[isBdEdge,0]] = True
         return isBdCell 
 
+    @versioned_cache
     def boundary_node_index(self):
         isBdNode = self.boundary_node_flag()
         idx, = np.nonzero(isBdNode)
         return idx 
 
+    @versioned_cache
     def boundary_edge_index(self):
         isBdEdge = self.boundary_edge_flag()
         idx, = np.nonzero(isBdEdge)
         return idx
 
+    @versioned_cache
     def boundary_cell_index(self):
         isBdCell = self.boundary_cell_flag()
         idx, = np.nonzero(isBdCell)
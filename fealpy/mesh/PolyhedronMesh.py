@@ -1,7 +1,7 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye, tril, triu
 from scipy.sparse import triu, tril, find, hstack
-from .mesh_tools import unique_row
+from .mesh_tools import unique_row, unique_row_int
 
 
 class PolyhedronMesh():
@@ -150,7 +150,7 @@ class PolyhedronMeshDataStructure():
     def construct(self):
 
         totalEdge = self.total_edge()
-        _, i0, j = unique_row(np.sort(totalEdge, axis=1))
+        _, i0, j = unique_row_int(np.sort(totalEdge, axis=1), self.N)
 
         self.NE = len(i0) 
 
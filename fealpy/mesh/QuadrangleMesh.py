@@ -82,14 +82,14 @@ class QuadrangleMesh(Mesh2d):
             edgeCenter = self.barycenter(entity='edge')
             cellCenter = self.barycenter(entity='cell')
 
-            edge2center = np.arange(N, N+NE) 
+            edge2center = np.arange(N, N+NE, dtype=self.itype) 
 
             cell = self.ds.cell
             cp = [cell[:, i].reshape(-1, 1) for i in range(4)]
             ep = [edge2center[cell2edge[:, i]].reshape(-1, 1) for i in range(4)]
-            cc = np.arange(N + NE, N + NE + NC).reshape(-1, 1)
+            cc = np.arange(N + NE, N + NE + NC, dtype=self.itype).reshape(-1, 1)
             
-            cell = np.zeros((4*NC, 4), dtype=np.int)
+            cell = np.zeros((4*NC, 4), dtype=self.itype)
             cell[0::4, :] = np.r_['1', cp[0], ep[0], cc, ep[3]] 
             cell[1::4, :] = np.r_['1', ep[0], cp[1], ep[1], cc]
             cell[2::4, :] = np.r_['1', cc, ep[1], cp[2], ep[2]]
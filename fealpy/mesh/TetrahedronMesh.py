@@ -1,8 +1,9 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye, tril, triu
-from .mesh_tools import unique_row
+from .mesh_tools import unique_row, prolongation_matrix
 from .Mesh3d import Mesh3d, Mesh3dDataStructure
 from ..quadrature import TetrahedronQuadrature
+from ..common import versioned_cache
 
 class TetrahedronMeshDataStructure(Mesh3dDataStructure):
     localFace = np.array([(1, 2, 3),  (0, 3, 2), (0, 1, 3), (0, 2, 1)])
@@ -66,6 +67,7 @@ class TetrahedronMesh(Mesh3d):
 
         return l1*np.cross(v20, v30) + l2*np.cross(v30, v10) + l3*np.cross(v10, v20)
 
+    @versioned_cache
     def volume(self):
         cell = self.ds.cell
         node = self.node
@@ -75,6 +77,7 @@ class TetrahedronMesh(Mesh3d):
         volume = np.sum(v03*np.cross(v01, v02), axis=1)/6.0
         return volume
 
+    @versioned_cache
     def cell_volume(self):
         cell = self.ds.cell
         node = self.node
@@ -84,6 +87,7 @@ class TetrahedronMesh(Mesh3d):
         volume = np.sum(v03*np.cross(v01, v02), axis=1)/6.0
         return volume
 
+    @versioned_cache
     def face_area(self):
         face = self.ds.face
         node = self.node
@@ -94,6 +98,7 @@ class TetrahedronMesh(Mesh3d):
         area = np.sqrt(np.square(nv).sum(axis=1))/2.0
         return area 
 
+    @versioned_cache
     def edge_length(self):
         edge = self.ds.edge
         node = self.node
@@ -116,6 +121,7 @@ class TetrahedronMesh(Mesh3d):
         return np.array(angle).T
 
 
+    @versioned_cache
     def bc_to_point(self, bc):
         node = self.node
         cell = self.ds.cell
@@ -198,6 +204,7 @@ class TetrahedronMesh(Mesh3d):
 
         return grad/wgt.reshape(-1, 1)
 
+    @versioned_cache
     def grad_lambda(self):
         localFace = self.ds.localFace
         node = self.node
@@ -212,7 +219,15 @@ class TetrahedronMesh(Mesh3d):
             Dlambda[:,i,:] = np.cross(vjm, vjk)/(6*volume.reshape(-1,1))
         return Dlambda
 
-    def uniform_refine(self, n=1):
+    def uniform_refine(self, n=1, returnim=False):
+        """ Refine every cell into 8 by the edge midpoints
+
+        If `returnim` is True, the list of the interpolation matrices of the
+        P1 functions from each mesh to the next finer one is returned, see
+        `prolongation_matrix`. The children of the cell `i` are `j*NC + i`.
+        """
+        if returnim:
+            IM = []
         for i in range(n):
             N = self.number_of_nodes()
             NC = self.number_of_cells()
@@ -222,8 +237,10 @@ class TetrahedronMesh(Mesh3d):
             edge = self.ds.edge
             cell = self.ds.cell
             cell2edge = self.ds.cell_to_edge()
+            if returnim:
+                IM.append(prolongation_matrix(N, edge))
 
-            edge2newNode = np.arange(N, N+NE)
+            edge2newNode = np.arange(N, N+NE, dtype=self.itype)
             newNode = (node[edge[:,0],:]+node[edge[:,1],:])/2.0
 
             self.node = np.concatenate((node, newNode), axis=0)
@@ -273,6 +290,8 @@ class TetrahedronMesh(Mesh3d):
 
             N = self.number_of_nodes()
             self.ds.reinit(N, newCell)
+        if returnim:
+            return IM
 
     def is_valid(self):
         vol = self.volume()
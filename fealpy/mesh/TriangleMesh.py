@@ -1,7 +1,9 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye
 from .Mesh2d import Mesh2d, Mesh2dDataStructure
+from .mesh_tools import prolongation_matrix
 from ..quadrature import TriangleQuadrature
+from ..common import versioned_cache
 
 
 class TriangleMeshDataStructure(Mesh2dDataStructure):
@@ -116,7 +118,15 @@ class TriangleMesh(Mesh2d):
                 N = self.number_of_nodes()
                 self.ds.reinit(N, cell)
 
-    def uniform_refine(self, n=1, surface=None):
+    def uniform_refine(self, n=1, surface=None, returnim=False):
+        """ Refine every cell into 4 by the edge midpoints
+
+        If `returnim` is True, the list of the interpolation matrices of the
+        P1 functions from each mesh to the next finer one is returned, see
+        `prolongation_matrix`. The child `j` of the cell `i` is `j*NC + i`.
+        """
+        if returnim:
+            IM = []
         for i in range(n):
             NN = self.number_of_nodes()
             NC = self.number_of_cells()
@@ -125,15 +135,32 @@ class TriangleMesh(Mesh2d):
             edge = self.entity('edge')
             cell = self.entity('cell')
             cell2edge = self.ds.cell_to_edge()
-            edge2newNode = np.arange(NN, NN+NE)
+            if returnim:
+                IM.append(prolongation_matrix(NN, edge))
+            edge2newNode = np.arange(NN, NN+NE, dtype=self.itype)
             newNode = (node[edge[:,0],:]+node[edge[:,1],:])/2.0
             if surface is not None:
                 newNode, _ = surface.project(newNode)
             self.node = np.concatenate((node, newNode), axis=0)
             p = np.r_['-1', cell, edge2newNode[cell2edge]] 
             cell = np.r_['0', p[:, [0, 5, 4]], p[:, [5, 1, 3]], p[:, [4, 3, 2]], p[:, [3, 4, 5]]]
+
+            # the edges of the new cells: the half of the edge `i` containing
+            # edge[i, 0] is `i` and the other one is `NE + i`, the edge
+            # between the child `j` and the center child is `2*NE + j*NC + k`
+            # for the cell `k`
+            newCell2edge = np.zeros((4*NC, 3), dtype=self.itype)
+            for j in range(3):
+                cidx = 2*NE + j*NC + np.arange(NC, dtype=self.itype)
+                newCell2edge[j*NC:(j+1)*NC, j] = cidx
+                newCell2edge[3*NC:, j] = cidx
+                for l in set(range(3)) - {j}:
+                    e = cell2edge[:, l]
+                    newCell2edge[j*NC:(j+1)*NC, l] = e + NE*(edge[e, 0] != p[:, j])
             NN = self.node.shape[0]
-            self.ds.reinit(NN, cell)
+            self.ds.reinit(NN, cell, cell2edge=newCell2edge)
+        if returnim:
+            return IM
 
     def uniform_bisect(self, n=1):
         for i in range(n):
@@ -148,7 +175,7 @@ class TriangleMesh(Mesh2d):
             cell2edge0 = np.zeros((2*NC,), dtype=self.itype)
             cell2edge0[0:NC] = cell2edge[:,0]
 
-            edge2newNode = np.arange(NN, NN+NE)
+            edge2newNode = np.arange(NN, NN+NE, dtype=self.itype)
             newNode = (node[edge[:,0],:]+node[edge[:,1],:])/2.0
             self.node = np.concatenate((node, newNode), axis=0)
             for k in range(2):
@@ -182,7 +209,7 @@ class TriangleMesh(Mesh2d):
         cell2edge = self.ds.cell_to_edge()
         cell2cell = self.ds.cell_to_cell()
 
-        isCutEdge = np.zeros((NE,), dtype=np.bool)
+        isCutEdge = np.zeros((NE,), dtype=np.bool_)
         while len(markedCell)>0:
             isCutEdge[cell2edge[markedCell, 0]]=True
             refineNeighbor = cell2cell[markedCell, 0]
@@ -196,6 +223,7 @@ class TriangleMesh(Mesh2d):
         self.node = np.concatenate((node, newNode), axis=0)
         cell2edge0 = cell2edge[:, 0]
 
+        changedCell = []
         for k in range(2):
             idx, = np.nonzero(edge2newNode[cell2edge0]>0)
             nc = len(idx)
@@ -214,6 +242,7 @@ class TriangleMesh(Mesh2d):
             cell[R,0] = p3 
             cell[R,1] = p2 
             cell[R,2] = p0 
+            changedCell.append(L)
             if k == 0:
                 cell2edge0 = np.zeros((NC+nc,), dtype=self.itype)
                 cell2edge0[0:NC] = cell2edge[:,0]
@@ -221,7 +250,11 @@ class TriangleMesh(Mesh2d):
                 cell2edge0[R] = cell2edge[idx,1]
             NC = NC+nc
 
-        # reconstruct the  data structure
+        # update the data structure
+        NN = self.node.shape[0]
+        if len(changedCell) > 0:
+            self.ds.update(NN, cell, np.concatenate(changedCell))
+
         if u is not None:                                                       
             eu = 0.5*np.sum(u[edge[isCutEdge]], axis=1)                         
             Iu = np.concatenate((u, eu), axis=0)                                
@@ -229,9 +262,8 @@ class TriangleMesh(Mesh2d):
             return True                                                         
         else:                                                                   
             return(Iu, True) 
-        NN = self.node.shape[0]
-        self.ds.reinit(NN, cell)
 
+    @versioned_cache
     def grad_lambda(self):
         node = self.node
         cell = self.ds.cell
@@ -294,6 +326,7 @@ class TriangleMesh(Mesh2d):
             Rlambda[:,2,:] = v2/length.reshape((-1, 1))
         return Rlambda
 
+    @versioned_cache
     def area(self, index=None):
         node = self.node
         cell = self.ds.cell
@@ -311,6 +344,7 @@ class TriangleMesh(Mesh2d):
             a = np.sqrt(np.square(nv).sum(axis=1))/2.0
         return a
 
+    @versioned_cache
     def cell_area(self, index=None):
         node = self.node
         cell = self.ds.cell
@@ -328,6 +362,7 @@ class TriangleMesh(Mesh2d):
             a = np.sqrt(np.square(nv).sum(axis=1))/2.0
         return a
 
+    @versioned_cache
     def bc_to_point(self, bc):
         node = self.node
         cell = self.ds.cell
@@ -218,7 +218,7 @@ class Tritree(TriangleMesh):
             J = edge2cell[flag0, 2]                                              
             edge2center[flag1] = cell[I, J]
             
-            edge2center = np.zeros(NE, dtype=np.int)
+            edge2center = np.zeros(NE, dtype=self.itype)
             ec = self.entity_barycenter('edge', isNeedCutEdge)
             NEC = len(ec)
             edge2center[isNeedCutEdge] = np.arange(NN, NN+NEC)
@@ -25,4 +25,5 @@ from .sizing_function import huniform
 
 from .mesh_tools import *
 
-from .meshio import load_mat_mesh
+from .meshio import load_mat_mesh, write_npy_mesh, load_npy_mesh
+from .gmshio import load_msh_mesh
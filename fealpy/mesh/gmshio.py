@@ -0,0 +1,346 @@
+"""Gmsh IO
+
+Read the ASCII and binary `.msh` files of the format 2.2 and 4.1 without
+gmsh or meshio. The binary blocks are read by `np.fromfile`, and the ASCII
+blocks are split as a whole and reshaped.
+"""
+import numpy as np
+from .mesh_tools import unique_row_int
+
+# element type : (name, number of nodes, dimension)
+gmshElementType = {
+    1:('line', 2, 1),
+    2:('triangle', 3, 2),
+    3:('quad', 4, 2),
+    4:('tetra', 4, 3),
+    5:('hexahedron', 8, 3),
+    6:('wedge', 6, 3),
+    7:('pyramid', 5, 3),
+    8:('line3', 3, 1),
+    9:('triangle6', 6, 2),
+    10:('quad9', 9, 2),
+    11:('tetra10', 10, 3),
+    12:('hexahedron27', 27, 3),
+    15:('vertex', 1, 0),
+    16:('quad8', 8, 2),
+    17:('hexahedron20', 20, 3)}
+
+class MshReader():
+    def __init__(self, fp):
+        self.fp = fp
+        self.version = None
+        self.binary = False
+        self.size = 8
+
+    def line(self):
+        return self.fp.readline().decode('utf-8').strip()
+
+    def ints(self):
+        return [int(a) for a in self.line().split()]
+
+    def text_array(self, nlines, dtype):
+        """ Read `nlines` lines and split them as a whole
+        """
+        fp = self.fp
+        text = b''.join([fp.readline() for i in range(nlines)])
+        return np.array(text.split(), dtype=dtype)
+
+    def binary_array(self, dtype, count):
+        return np.fromfile(self.fp, dtype=dtype, count=count)
+
+    def binary_ints(self, dtype, count):
+        return [int(a) for a in np.fromfile(self.fp, dtype=dtype, count=count)]
+
+    def read(self):
+        self.node = None
+        self.nodetag = None
+        self.cell = {}
+        self.physicalnames = {}
+        self.entities = {}
+        while True:
+            line = self.fp.readline()
+            if not line:
+                break
+            section = line.decode('utf-8', errors='ignore').strip()
+            if section == '$MeshFormat':
+                self.read_format()
+            elif section == '$PhysicalNames':
+                self.read_physical_names()
+            elif section == '$Entities':
+                self.read_entities()
+            elif section == '$Nodes':
+                if self.version < 4:
+                    self.read_nodes_v2()
+                else:
+                    self.read_nodes_v4()
+            elif section == '$Elements':
+                if self.version < 4:
+                    self.read_elements_v2()
+                else:
+                    self.read_elements_v4()
+            elif section.startswith('$'):
+                self.skip(section)
+                continue
+            else:
+                continue
+            self.skip(section)
+
+        # gmsh node tags to the node indices
+        tag2idx = -np.ones(self.nodetag.max() + 1, dtype=np.int_)
+        tag2idx[self.nodetag] = range(len(self.nodetag))
+        cell = {}
+        for name, (c, physical, elementary) in self.cell.items():
+            c = np.concatenate(c)
+            cell[name] = (tag2idx[c], np.concatenate(physical), np.concatenate(elementary))
+        return self.node, cell, self.physicalnames
+
+    def skip(self, section):
+        end = '$End' + section[1:]
+        while True:
+            line = self.fp.readline()
+            if (not line) or line.decode('utf-8', errors='ignore').strip() == end:
+                return
+
+    def read_format(self):
+        a = self.line().split()
+        self.version = float(a[0])
+        self.binary = (a[1] == '1')
+        self.size = int(a[2])
+        if self.version not in [2.2, 4.1]:
+            raise ValueError("I can only read the msh format 2.2 and 4.1, not {}!".format(a[0]))
+        if self.binary:
+            one = np.fromfile(self.fp, dtype='<i4', count=1)
+            if one[0] != 1:
+                raise ValueError("The byte order of the msh file is not supported!")
+            self.fp.readline()
+        self.isize = np.dtype('<i4')
+        self.usize = np.dtype('<u{}'.format(self.size))
+
+    def read_physical_names(self):
+        n = int(self.line())
+        for i in range(n):
+            a = self.line().split(maxsplit=2)
+            self.physicalnames[int(a[1])] = (int(a[0]), a[2].strip('"'))
+
+    def add_cell(self, etype, cell, physical, elementary):
+        name, nn, dim = gmshElementType[etype]
+        c, p, e = self.cell.setdefault(name, ([], [], []))
+        c.append(cell)
+        p.append(physical)
+        e.append(elementary)
+
+    def add_v2_cell(self, etype, data, ntags):
+        """ `data` is the tags and the nodes of the elements, the first tag
+        is the physical one and the second is the elementary one
+        """
+        n = data.shape[0]
+        zeros = np.zeros(n, dtype=np.int_)
+        physical = data[:, 0] if ntags > 0 else zeros
+        elementary = data[:, 1] if ntags > 1 else zeros
+        self.add_cell(etype, data[:, ntags:], physical, elementary)
+
+    def read_nodes_v2(self):
+        NN = int(self.line())
+        if self.binary:
+            dtype = np.dtype([('tag', '<i4'), ('x', '<f8', (3,))])
+            data = self.binary_array(dtype, NN)
+            self.nodetag = data['tag'].astype(np.int_)
+            self.node = data['x']
+        else:
+            data = self.text_array(NN, np.float64).reshape(NN, 4)
+            self.nodetag = data[:, 0].astype(np.int_)
+            self.node = data[:, 1:]
+
+    def read_elements_v2(self):
+        NC = int(self.line())
+        if self.binary:
+            n = 0
+            while n < NC:
+                etype, m, ntags = self.binary_ints('<i4', 3)
+                nn = gmshElementType[etype][1]
+                data = self.binary_array('<i4', m*(1 + ntags + nn)).reshape(m, -1)
+                self.add_v2_cell(etype, data[:, 1:], ntags)
+                n += m
+        else:
+            data = self.text_array(NC, np.int_)
+            p = 0
+            n = 0
+            while n < NC:
+                # take the rows of the same type and the same number of tags
+                etype, ntags = data[p+1], data[p+2]
+                L = 3 + ntags + gmshElementType[etype][1]
+                m = min(NC - n, (len(data) - p)//L)
+                block = data[p:p+m*L].reshape(m, L)
+                isSame = (block[:, 1] == etype) & (block[:, 2] == ntags)
+                if not np.all(isSame):
+                    m = np.argmin(isSame)
+                    block = block[:m]
+                self.add_v2_cell(etype, block[:, 3:], ntags)
+                p += m*L
+                n += m
+
+    def read_entities(self):
+        """ The first physical tag of every (dim, tag) entity
+        """
+        if self.binary:
+            fp = self.fp
+            num = self.binary_ints(self.usize, 4)
+            for dim in range(4):
+                for i in range(num[dim]):
+                    tag, = self.binary_ints(self.isize, 1)
+                    np.fromfile(fp, dtype='<f8', count=3 if dim == 0 else 6)
+                    n, = self.binary_ints(self.usize, 1)
+                    physical = self.binary_ints(self.isize, n)
+                    if dim > 0:
+                        n, = self.binary_ints(self.usize, 1)
+                        np.fromfile(fp, dtype=self.isize, count=n)
+                    self.entities[(dim, tag)] = physical[0] if len(physical) > 0 else 0
+        else:
+            num = self.ints()
+            for dim in range(4):
+                for i in range(num[dim]):
+                    a = self.line().split()
+                    k = 4 if dim == 0 else 7
+                    n = int(a[k])
+                    physical = a[k+1:k+1+n]
+                    self.entities[(dim, int(a[0]))] = int(physical[0]) if n > 0 else 0
+
+    def read_nodes_v4(self):
+        if self.binary:
+            nblock, NN, mintag, maxtag = self.binary_ints(self.usize, 4)
+        else:
+            nblock, NN, mintag, maxtag = self.ints()
+        node = []
+        nodetag = []
+        for i in range(nblock):
+            if self.binary:
+                dim, tag, parametric = self.binary_ints(self.isize, 3)
+                n, = self.binary_ints(self.usize, 1)
+                nodetag.append(self.binary_array(self.usize, n).astype(np.int_))
+                x = self.binary_array('<f8', n*(3 + parametric*dim)).reshape(n, -1)
+            else:
+                dim, tag, parametric, n = self.ints()
+                nodetag.append(self.text_array(n, np.int_))
+                x = self.text_array(n, np.float64).reshape(n, -1)
+            node.append(x[:, :3])
+        self.node = np.concatenate(node)
+        self.nodetag = np.concatenate(nodetag)
+
+    def read_elements_v4(self):
+        if self.binary:
+            nblock, NC, mintag, maxtag = self.binary_ints(self.usize, 4)
+        else:
+            nblock, NC, mintag, maxtag = self.ints()
+        for i in range(nblock):
+            if self.binary:
+                dim, tag, etype = self.binary_ints(self.isize, 3)
+                n, = self.binary_ints(self.usize, 1)
+                nn = gmshElementType[etype][1]
+                data = self.binary_array(self.usize, n*(1 + nn)).reshape(n, -1).astype(np.int_)
+            else:
+                dim, tag, etype, n = self.ints()
+                nn = gmshElementType[etype][1]
+                data = self.text_array(n, np.int_).reshape(n, -1)
+            physical = np.full(n, self.entities.get((dim, tag), 0), dtype=np.int_)
+            elementary = np.full(n, tag, dtype=np.int_)
+            self.add_cell(etype, data[:, 1:], physical, elementary)
+
+
+def read_msh(fileName):
+    """ Read the gmsh file `fileName`
+
+    Returns
+    -------
+    node : (NN, 3)
+    cell : dict, the element name ('line', 'triangle', 'tetra', ...) to the
+        tuple of the node indices, the physical tags and the elementary tags
+        of the elements
+    physicalnames : dict, the physical tag to (dimension, name)
+    """
+    with open(fileName, 'rb') as fp:
+        return MshReader(fp).read()
+
+def entity_index(entity, sub):
+    """ The indices of the rows of `sub` in `entity` (with the vertices in any
+    order), -1 for the rows which are not there
+    """
+    N = entity.shape[0]
+    a = np.sort(np.r_['0', entity, sub], axis=1)
+    _, i0, j = unique_row_int(a)
+    g2e = -np.ones(len(i0), dtype=np.int_)
+    g2e[j[:N]] = range(N)
+    return g2e[j[N:]]
+
+def load_msh_mesh(fileName):
+    """ Load the gmsh file `fileName` as a fealpy mesh
+
+    The tetrahedra, the hexahedra, the triangles or the quadrilaterals (the
+    first ones found in this order) are the cells, the nodes which are not on
+    the cells are removed, and the cells are turned to the positive
+    orientation. The physical tags are put into `celldata['physical']` and
+    into `facedata['physical']` and `edgedata['physical']` from the lower
+    dimensional elements (0 for the entities without a tag), the elementary
+    tags of the cells into `celldata['elementary']`, and the physical names
+    into `mesh.physicalnames`.
+    """
+    from .TriangleMesh import TriangleMesh
+    from .QuadrangleMesh import QuadrangleMesh
+    from .TetrahedronMesh import TetrahedronMesh
+    from .HexahedronMesh import HexahedronMesh
+
+    node, cells, physicalnames = read_msh(fileName)
+    for name, Mesh in [('tetra', TetrahedronMesh), ('hexahedron', HexahedronMesh),
+            ('triangle', TriangleMesh), ('quad', QuadrangleMesh)]:
+        if name in cells:
+            break
+    else:
+        raise ValueError("There are no cells in {}!".format(fileName))
+    cell, physical, elementary = cells[name]
+
+    isUsedNode = np.zeros(len(node), dtype=np.bool_)
+    isUsedNode[cell] = True
+    idxMap = np.zeros(len(node), dtype=np.int_)
+    idxMap[isUsedNode] = range(isUsedNode.sum())
+    node = node[isUsedNode]
+    cell = idxMap[cell]
+    if (name in ['triangle', 'quad']) and np.all(node[:, 2] == node[0, 2]):
+        node = node[:, :2]
+
+    if node.shape[1] == 2:
+        if name == 'triangle':
+            v1 = node[cell[:, 1]] - node[cell[:, 0]]
+            v2 = node[cell[:, 2]] - node[cell[:, 0]]
+            flag = np.cross(v1, v2) < 0
+            cell[flag] = cell[flag][:, [0, 2, 1]]
+        elif name == 'quad':
+            x = node[cell, 0]
+            y = node[cell, 1]
+            flag = np.sum(x*np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1)*y, axis=1) < 0
+            cell[flag] = cell[flag][:, [0, 3, 2, 1]]
+    elif name == 'tetra':
+        v = node[cell[:, 1:]] - node[cell[:, [0]]]
+        flag = np.sum(np.cross(v[:, 0], v[:, 1])*v[:, 2], axis=1) < 0
+        cell[flag] = cell[flag][:, [0, 2, 1, 3]]
+
+    mesh = Mesh(node, cell)
+    for data in ['nodedata', 'edgedata', 'facedata', 'celldata']:
+        if not hasattr(mesh, data):
+            setattr(mesh, data, {})
+    mesh.celldata['physical'] = physical
+    mesh.celldata['elementary'] = elementary
+    mesh.physicalnames = physicalnames
+
+    TD = 3 if name in ['tetra', 'hexahedron'] else 2
+    sub = [('line', 'edge', 'edgedata')]
+    if TD == 3:
+        sub += [('triangle', 'face', 'facedata'), ('quad', 'face', 'facedata')]
+    for ename, etype, data in sub:
+        if ename in cells:
+            c, p, _ = cells[ename]
+            isOnMesh = np.all(isUsedNode[c], axis=1)
+            entity = mesh.entity(etype)
+            idx = entity_index(entity, idxMap[c[isOnMesh]])
+            flag = idx > -1
+            val = getattr(mesh, data).setdefault('physical', np.zeros(len(entity), dtype=np.int_))
+            val[idx[flag]] = p[isOnMesh][flag]
+    return mesh
@@ -1,19 +1,15 @@
 import numpy as np
+from scipy.sparse import csr_matrix
 
-import matplotlib.pyplot as plt
-import mpl_toolkits.mplot3d as a3
-from mpl_toolkits.mplot3d.art3d import Line3DCollection
-import matplotlib.colors as colors
-from matplotlib.tri import Triangulation
-
-from matplotlib.collections import PolyCollection, LineCollection, PatchCollection
-import matplotlib.cm as cm 
-from matplotlib.patches import Polygon
+# matplotlib is imported in the drawing functions, it takes longer to import
+# than the rest of fealpy.mesh
 
 
 def find_node(axes, node, index=None, 
         showindex=False, color='r', 
         markersize=20, fontsize=24, fontcolor='k'):
+    import matplotlib.colors as colors
+    import matplotlib.cm as cm
 
     if len(node.shape) == 1:
         node = np.r_['1', node.reshape(-1, 1), np.zeros((len(node), 1))]
@@ -54,6 +50,8 @@ def find_entity(axes, mesh, entity=None,
         index=None, showindex=False,
         color='r', markersize=20, 
         fontsize=24, fontcolor='k'):
+    import matplotlib.colors as colors
+    import matplotlib.cm as cm
 
     bc = mesh.entity_barycenter(entity)
     if (index is None) or ( index is 'all') :
@@ -106,6 +104,9 @@ def show_mesh_1d(axes, mesh,
         aspect='equal', 
         linewidths=1, markersize=20,
         showaxis=False):
+    from matplotlib.collections import LineCollection
+    from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
     axes.set_aspect(aspect)
     if showaxis == False :
         axes.set_axis_off()
@@ -134,6 +135,11 @@ def show_mesh_2d(axes, mesh,
         cellcolor='grey', aspect='equal',
         linewidths=1, markersize=20,
         showaxis=False, showcolorbar=False, cmap='rainbow'):
+    import matplotlib.colors as colors
+    import matplotlib.cm as cm
+    from matplotlib.collections import PolyCollection, PatchCollection
+    from matplotlib.patches import Polygon
+    import mpl_toolkits.mplot3d as a3
     
     axes.set_aspect(aspect)
     if showaxis == False:
@@ -199,6 +205,10 @@ def show_mesh_3d(axes, mesh,
         aspect='equal',
         linewidths=1, markersize=20,  
         showaxis=False, alpha=0.8):
+    import matplotlib.colors as colors
+    import matplotlib.cm as cm
+    import mpl_toolkits.mplot3d as a3
+
 
     axes.set_aspect('equal')
     if showaxis == False:
@@ -231,6 +241,80 @@ def unique_row(a):
     b = a[i]
     return (b, i, j)
 
+def unique_row_int(a, NN=None):
+    """ The same as `unique_row`, but for the rows of a nonnegative integer
+    array, e.g. the sorted vertices of the edges or faces of a mesh.
+
+    Parameters
+    ----------
+    a : numpy.ndarray, (n, k)
+    NN : int, the upper bound of the entries of `a`, default `a.max() + 1`
+
+    Returns
+    -------
+    b, i, j : `b = a[i]` are the unique rows of `a` in lexicographic order,
+        `i` are the first occurrences, and `a = b[j]`
+
+    Notes
+    -----
+        Each row is packed into one int64 key `a0*NN**(k-1) + ... + a(k-1)`,
+        so the rows are grouped by one stable sort of integers instead of the
+        bytewise sort of `np.void` rows in `unique_row`. When `NN**k` does not
+        fit into int64, the rows are grouped by `np.lexsort`.
+    """
+    n, k = a.shape
+    if NN is None:
+        NN = a.max() + 1 if n > 0 else 1
+    # a Python int, so that `NN**k` can not overflow
+    NN = int(NN)
+    if NN**k < 2**63:
+        key = a[:, 0].astype(np.int64)
+        for c in range(1, k):
+            key *= NN
+            key += a[:, c]
+        _, i, j = np.unique(key, return_index=True, return_inverse=True)
+    else:
+        idx = np.lexsort(a.T[::-1])
+        b = a[idx]
+        isNew = np.ones(n, dtype=np.bool_)
+        isNew[1:] = np.any(b[1:] != b[:-1], axis=1)
+        i = idx[isNew]
+        j = np.zeros(n, dtype=np.int64)
+        j[idx] = np.cumsum(isNew) - 1
+    b = a[i]
+    return (b, i, j)
+
+def prolongation_matrix(NN, *entities):
+    """ The interpolation matrix of the P1 (Q1) functions from the old nodes
+    to the old and the new nodes of a refined mesh
+
+    Parameters
+    ----------
+    NN : int, the number of the old nodes
+    entities : the `(n, k)` arrays of old nodes, one array for each group of
+        the new nodes in the order they are appended to the node array; the
+        new node `i` of a group is the center of the `k` nodes in its row `i`
+
+    Returns
+    -------
+    IM : csr_matrix, `(NN + n0 + n1 + ..., NN)`, the identity on the old
+        nodes and the average of the `k` nodes on the new nodes
+    """
+    I = [np.arange(NN)]
+    J = [np.arange(NN)]
+    val = [np.ones(NN)]
+    start = NN
+    for entity in entities:
+        n, k = entity.shape
+        I.append(np.repeat(np.arange(start, start + n), k))
+        J.append(entity.reshape(-1))
+        val.append(np.broadcast_to(1/k, n*k))
+        start += n
+    I = np.concatenate(I)
+    J = np.concatenate(J)
+    val = np.concatenate(val)
+    return csr_matrix((val, (I, J)), shape=(start, NN))
+
 
 def show_point(axes, point):
     axes.plot(point[:, 0], point[:, 1], 'ro')
@@ -279,6 +363,7 @@ def show_mesh_angle(axes, mesh, angle=None):
     return mina, maxa, meana
 
 def show_solution(axes, mesh, u):
+    from matplotlib.tri import Triangulation
     points = mesh.points
     cells = mesh.cells
     tri = Triangulation(points[:,0], points[:,1], cells)
@@ -1,7 +1,15 @@
 """Mesh IO
 """
+import os
+import sys
+import json
+import struct
+import zipfile
+import importlib
+import numpy as np
 import scipy.io as sio
 from .TriangleMesh import TriangleMesh
+from ..common import DynamicArray, new_version
 
 def write_obj_mesh(trimesh, f):
     from openmesh import TriMesh, write_mesh 
@@ -34,3 +42,216 @@ def write_mat_linear_system(f, AD, b):
     data = {'AD':AD, 'b':b}
     sio.matlab.savemat(f, data)
 
+# The native format
+# -----------------
+#
+# A mesh is saved as a directory, or an uncompressed zip file, of `.npy` blocks
+# with a `header.json`, e.g.
+#
+#     mesh/header.json
+#     mesh/node.npy
+#     mesh/ds.cell.npy
+#     mesh/ds.edge.npy
+#     mesh/ds.edge2cell.npy
+#     mesh/celldata.mu.npy
+#     mesh/function.uh.npy
+#
+# The blocks are loaded by `np.load(mmap_mode='r')` (or mapped directly out of
+# the zip file), so a large mesh opens without reading the data, and the pages
+# of the file are shared by all the processes which open it.
+
+NPY_FORMAT = 'fealpy-npy'
+NPY_VERSION = 1
+
+meshArrays = ['node', 'parent', 'child']
+meshData = ['nodedata', 'edgedata', 'facedata', 'celldata']
+dsArrays = ['cell', 'cellLocation', 'edge', 'edge2cell', 'face', 'face2cell', 'cell2edge']
+dsTopology = ['edge', 'edge2cell', 'face', 'face2cell', 'cell2edge']
+dsScalars = ['NN', 'NC', 'NE', 'NF']
+
+def write_npy_mesh(f, mesh, functions=None, topology=True, compress=False):
+    """ Save `mesh` in the native format
+
+    Parameters
+    ----------
+    f : str
+        a directory, or a zip file if the name ends with `.zip`
+    mesh : the mesh object 
+    functions : dict, optional
+        the `Function`s (or any arrays) to be saved with the mesh
+    topology : bool
+        if True, `edge`, `edge2cell` (and `face`, `face2cell`, `cell2edge` in
+        3d) are saved, then the loading needs no sorting at all
+    compress : bool
+        deflate the zip members, the data can not be mapped then
+    """
+    header = {'format':NPY_FORMAT, 'version':NPY_VERSION}
+    blocks = {}
+
+    cls = type(mesh)
+    header['mesh'] = {'module':cls.__module__, 'class':cls.__name__}
+    header['mesh']['attributes'] = {key:val for key, val in mesh.__dict__.items()
+            if isinstance(val, (str, int, float, bool)) and (key != 'nodeversion')}
+    header['mesh']['dtypes'] = {key:np.dtype(mesh.__dict__[key]).str
+            for key in ['itype', 'ftype', 'dtype'] if key in mesh.__dict__}
+    for name in meshArrays:
+        val = getattr(mesh, name, None)
+        if isinstance(val, np.ndarray):
+            blocks[name] = val
+
+    ds = mesh.ds
+    cls = type(ds)
+    header['ds'] = {'module':cls.__module__, 'class':cls.__name__}
+    for name in dsScalars:
+        if name in ds.__dict__:
+            header['ds'][name] = int(ds.__dict__[name])
+    for name in dsArrays:
+        if (name in dsTopology) and (not topology):
+            continue
+        val = ds.__dict__.get(name)
+        if isinstance(val, np.ndarray):
+            blocks['ds.' + name] = val
+    header['ds']['topology'] = topology
+
+    for data in meshData:
+        for key, val in getattr(mesh, data, {}).items():
+            blocks[data + '.' + key] = np.asarray(val)
+
+    header['functions'] = {}
+    if functions is not None:
+        for key, val in functions.items():
+            space = getattr(val, 'space', None)
+            if space is None:
+                header['functions'][key] = {}
+            else:
+                header['functions'][key] = {'space':type(space).__name__,
+                        'p':getattr(space, 'p', None)}
+            blocks['function.' + key] = np.asarray(val)
+
+    header['blocks'] = sorted(blocks.keys())
+    if f.endswith('.zip'):
+        method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        with zipfile.ZipFile(f, mode='w', compression=method, allowZip64=True) as zf:
+            zf.writestr('header.json', json.dumps(header, indent=2))
+            for key, val in blocks.items():
+                with zf.open(key + '.npy', mode='w', force_zip64=True) as fp:
+                    np.lib.format.write_array(fp, np.ascontiguousarray(val), allow_pickle=False)
+    else:
+        os.makedirs(f, exist_ok=True)
+        with open(os.path.join(f, 'header.json'), 'w') as fp:
+            json.dump(header, fp, indent=2)
+        for key, val in blocks.items():
+            np.save(os.path.join(f, key + '.npy'), val, allow_pickle=False)
+
+def load_zip_array(f, zf, name, mmap_mode='r'):
+    """ Map the array `name` of the zip file `f` without extracting it
+    """
+    info = zf.getinfo(name)
+    if (info.compress_type != zipfile.ZIP_STORED) or (mmap_mode is None):
+        with zf.open(info) as fp:
+            return np.lib.format.read_array(fp, allow_pickle=False)
+
+    with open(f, 'rb') as fp:
+        # skip the local file header of the member
+        fp.seek(info.header_offset)
+        h = fp.read(30)
+        n, m = struct.unpack('<HH', h[26:30])
+        fp.seek(info.header_offset + 30 + n + m)
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(fp)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(fp)
+        offset = fp.tell()
+    if np.prod(shape) == 0:
+        return np.zeros(shape, dtype=dtype)
+    order = 'F' if fortran else 'C'
+    return np.memmap(f, dtype=dtype, mode=mmap_mode, offset=offset,
+            shape=shape, order=order)
+
+def load_npy_mesh(f, mmap_mode='r'):
+    """ Load a mesh saved by `write_npy_mesh`
+
+    Parameters
+    ----------
+    f : str
+        the directory or the zip file
+    mmap_mode : None, 'r', 'r+' or 'c'
+        passed to `np.load`, None reads everything into memory. The arrays
+        are read only with 'r', use 'c' (copy on write) if the mesh will be
+        changed in place, e.g. refined.
+
+    Returns
+    -------
+    mesh : the mesh object
+    functions : dict of the saved function arrays, a `Function` is
+        recovered by `Function(space, array=functions[name])`
+    """
+    if f.endswith('.zip'):
+        zf = zipfile.ZipFile(f)
+        header = json.loads(zf.read('header.json').decode('utf-8'))
+        load = lambda key: load_zip_array(f, zf, key + '.npy', mmap_mode=mmap_mode)
+    else:
+        zf = None
+        with open(os.path.join(f, 'header.json')) as fp:
+            header = json.load(fp)
+        load = lambda key: np.load(os.path.join(f, key + '.npy'),
+                mmap_mode=mmap_mode, allow_pickle=False)
+
+    if header.get('format') != NPY_FORMAT:
+        raise ValueError("{} is not a fealpy npy mesh!".format(f))
+
+    blocks = {key:load(key) for key in header['blocks']}
+    if zf is not None:
+        zf.close()
+
+    h = header['mesh']
+    cls = getattr(importlib.import_module(h['module']), h['class'])
+    if header['ds']['topology']:
+        # restore the data structure without constructing it again
+        h = header['ds']
+        dscls = getattr(importlib.import_module(h['module']), h['class'])
+        ds = dscls.__new__(dscls)
+        for name in dsScalars:
+            if name in h:
+                setattr(ds, name, h[name])
+        for name in dsArrays:
+            if 'ds.' + name in blocks:
+                setattr(ds, name, blocks['ds.' + name])
+        ds.itype = ds.cell.dtype
+        ds.version = new_version()
+        ds.changedCell = None
+        ds.changedEdge = None
+        ds.edgeIdxMap = None
+
+        h = header['mesh']
+        mesh = cls.__new__(cls)
+        mesh.ds = ds
+        for key, val in h['attributes'].items():
+            # the code compares `meshtype` by `is`, so the strings are interned
+            setattr(mesh, key, sys.intern(val) if isinstance(val, str) else val)
+        for key, val in h['dtypes'].items():
+            setattr(mesh, key, np.dtype(val))
+        for name in meshArrays:
+            if name in blocks:
+                setattr(mesh, name, blocks[name])
+        if 'parent' in blocks:
+            mesh.buffers = {name:DynamicArray() for name in ['node', 'cell', 'parent', 'child']}
+    else:
+        args = [blocks['node'], blocks['ds.cell']]
+        if 'ds.cellLocation' in blocks:
+            args.append(blocks['ds.cellLocation'])
+        mesh = cls(*args)
+        for name in ['parent', 'child']:
+            if name in blocks:
+                setattr(mesh, name, blocks[name])
+
+    for data in meshData:
+        if not hasattr(mesh, data):
+            setattr(mesh, data, {})
+        for key in blocks:
+            if key.startswith(data + '.'):
+                getattr(mesh, data)[key[len(data)+1:]] = blocks[key]
+
+    functions = {key:blocks['function.' + key] for key in header['functions']}
+    return mesh, functions
@@ -0,0 +1,138 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+from .mesh_tools import unique_row_int
+
+
+def quantize(point, order):
+    """ Map the points in their bounding box to the integer grid
+    [0, 2**order)^d
+    """
+    pmin = np.min(point, axis=0)
+    pmax = np.max(point, axis=0)
+    h = pmax - pmin
+    h[h == 0] = 1
+    n = 2**order - 1
+    X = np.floor((point - pmin)/h*n).astype(np.uint64)
+    return np.minimum(X, n)
+
+def interleave(X, order):
+    """ Interleave the bits of the columns of X, the most significant bit of
+    X[:, 0] first
+    """
+    NP, dim = X.shape
+    key = np.zeros(NP, dtype=np.uint64)
+    one = np.uint64(1)
+    for b in range(order-1, -1, -1):
+        for i in range(dim):
+            key = (key << one) | ((X[:, i] >> np.uint64(b)) & one)
+    return key
+
+def morton_index(point, order=None):
+    """ The index of the points along the Morton (Z-order) curve
+    """
+    dim = point.shape[1]
+    order = 63//dim if order is None else order
+    X = quantize(point, order)
+    return interleave(X, order)
+
+def hilbert_index(point, order=None):
+    """ The index of the points along the Hilbert curve
+
+    Notes
+    -----
+        The coordinates are transformed into the transposed Hilbert index by
+        the algorithm of J. Skilling, Programming the Hilbert curve, AIP
+        Conference Proceedings 707, 2004, and then interleaved.
+    """
+    dim = point.shape[1]
+    order = 63//dim if order is None else order
+    X = quantize(point, order)
+
+    M = np.uint64(1 << (order - 1))
+    Q = M
+    while Q > 1:
+        P = Q - np.uint64(1)
+        for i in range(dim):
+            flag = (X[:, i] & Q) != 0
+            X[flag, 0] ^= P
+            flag = ~flag
+            t = (X[flag, 0] ^ X[flag, i]) & P
+            X[flag, 0] ^= t
+            X[flag, i] ^= t
+        Q >>= np.uint64(1)
+
+    # Gray encode
+    for i in range(1, dim):
+        X[:, i] ^= X[:, i-1]
+    t = np.zeros(X.shape[0], dtype=np.uint64)
+    Q = M
+    while Q > 1:
+        flag = (X[:, dim-1] & Q) != 0
+        t[flag] ^= Q - np.uint64(1)
+        Q >>= np.uint64(1)
+    X ^= t.reshape(-1, 1)
+    return interleave(X, order)
+
+def curve_ordering(point, method='hilbert'):
+    if method == 'hilbert':
+        key = hilbert_index(point)
+    elif method == 'morton':
+        key = morton_index(point)
+    else:
+        raise ValueError("I don't know the ordering method {}!".format(method))
+    return np.argsort(key, kind='mergesort')
+
+def node_ordering(mesh, method='rcm'):
+    """ The new order of the nodes of `mesh`
+
+    Parameters
+    ----------
+    method : 'rcm', 'hilbert' or 'morton'
+        'rcm' is the reverse Cuthill-McKee ordering of the graph of the
+        edges, the others sort the nodes along a space filling curve.
+
+    Returns
+    -------
+    nodeperm : the new node `i` is the old node `nodeperm[i]`
+    """
+    if method == 'rcm':
+        NN = mesh.number_of_nodes()
+        edge = mesh.entity('edge')
+        val = np.ones(2*edge.shape[0], dtype=np.bool_)
+        node2node = csr_matrix((val, (edge.flat, edge[:, [1, 0]].flat)),
+                shape=(NN, NN))
+        return reverse_cuthill_mckee(node2node, symmetric_mode=True)
+    else:
+        return curve_ordering(mesh.entity('node'), method)
+
+def cell_ordering(mesh, nodeperm, method='rcm'):
+    """ The new order of the cells of `mesh`
+
+    For 'rcm' the cells are sorted by the smallest new index of their
+    nodes, otherwise by their barycenters along the space filling curve.
+    """
+    if method == 'rcm':
+        NN = mesh.number_of_nodes()
+        node2new = np.zeros(NN, dtype=np.int_)
+        node2new[nodeperm] = range(NN)
+        cell = mesh.ds.cell
+        if hasattr(mesh.ds, 'cellLocation'):
+            key = np.minimum.reduceat(node2new[cell], mesh.ds.cellLocation[:-1])
+        else:
+            key = np.min(node2new[cell], axis=1)
+        return np.argsort(key, kind='mergesort')
+    else:
+        return curve_ordering(mesh.entity_barycenter('cell'), method)
+
+def entity_permutation(entity, newEntity):
+    """ The permutation `perm` with `newEntity[i]` and `entity[perm[i]]`
+    being the same entity (with the vertices in any order)
+    """
+    N = entity.shape[0]
+    a = np.sort(np.r_['0', entity, newEntity], axis=1)
+    _, _, j = unique_row_int(a)
+    g2e = np.zeros(N, dtype=np.int_)
+    g2e[j[:N]] = range(N)
+    return g2e[j[N:]]
@@ -5,7 +5,8 @@ from .QuadrangleMesh import QuadrangleMesh
 from .HexahedronMesh import HexahedronMesh 
 from .PolygonMesh import PolygonMesh
 from .PolyhedronMesh import PolyhedronMesh 
-from ..common import ranges
+from ..common import ranges, DynamicArray
+from .mesh_tools import prolongation_matrix
 
 from fealpy.mesh import TriangleMesh 
 
@@ -18,6 +19,17 @@ class Tritree(TriangleMesh):
         self.child = -np.ones((NC, 4), dtype=self.itype)
         self.irule = irule              # irregular rule  
         self.meshtype = 'tritree'
+        self.buffers = {name:DynamicArray() for name in ['node', 'cell', 'parent', 'child']}
+
+    def renumber(self, nodeperm, cellperm):
+        super(Tritree, self).renumber(nodeperm, cellperm)
+        NC = self.number_of_cells()
+        cell2new = -np.ones(NC+1, dtype=self.itype)
+        cell2new[cellperm] = np.arange(NC, dtype=self.itype)
+        parent = self.parent[cellperm]
+        parent[:, 0] = cell2new[parent[:, 0]]
+        self.parent = parent
+        self.child = cell2new[self.child[cellperm]]
 
     def leaf_cell_index(self):
         child = self.child
@@ -41,7 +53,13 @@ class Tritree(TriangleMesh):
         else:
             return self.parent[idx, 0] == -1
 
-    def refine(self, marker=None, surface=None):
+    def refine(self, marker=None, surface=None, returnim=False):
+        """ Refine the marked leaf cells, all the leaf cells if `marker` is
+        None
+
+        If `returnim` is True, the interpolation matrix of the P1 functions
+        from the old nodes to the new node array is returned instead of True.
+        """
         if marker == None:
             idx = self.leaf_cell_index()
         else:
@@ -145,11 +163,14 @@ class Tritree(TriangleMesh):
             if surface is not None:
                 ec, _ = surface.project(ec)
 
-            self.node = np.r_['0', node, ec]
-            cell = np.r_['0', cell, cell4]                      
-            self.parent = np.r_['0', self.parent, parent4]           
-            self.child = np.r_['0', self.child, child4]              
-            self.ds.reinit(NN + NNN, cell)
+            buffers = self.buffers
+            self.node = buffers['node'].extend(node, ec)
+            cell = buffers['cell'].extend(cell, cell4)
+            self.parent = buffers['parent'].extend(self.parent, parent4)
+            self.child = buffers['child'].extend(self.child, child4)
+            self.ds.update(NN + NNN, cell)
+            if returnim:
+                return prolongation_matrix(NN, edge[refineFlag])
             return True
         else:
             return False
@@ -264,9 +285,20 @@ class Quadtree(QuadrangleMesh):
         super(Quadtree, self).__init__(node, cell, dtype=dtype)
         self.dtype = dtype
         NC = self.number_of_cells()
-        self.parent = -np.ones((NC, 2), dtype=np.int) 
-        self.child = -np.ones((NC, 4), dtype=np.int)
+        self.parent = -np.ones((NC, 2), dtype=self.itype) 
+        self.child = -np.ones((NC, 4), dtype=self.itype)
         self.meshType = 'quadtree'
+        self.buffers = {name:DynamicArray() for name in ['node', 'cell', 'parent', 'child']}
+
+    def renumber(self, nodeperm, cellperm):
+        super(Quadtree, self).renumber(nodeperm, cellperm)
+        NC = self.number_of_cells()
+        cell2new = -np.ones(NC+1, dtype=self.itype)
+        cell2new[cellperm] = np.arange(NC, dtype=self.itype)
+        parent = self.parent[cellperm]
+        parent[:, 0] = cell2new[parent[:, 0]]
+        self.parent = parent
+        self.child = cell2new[self.child[cellperm]]
 
     def leaf_cell_index(self):
         child = self.child
@@ -293,14 +325,22 @@ class Quadtree(QuadrangleMesh):
         else:
             return self.parent[idx, 0] == -1
     
-    def uniform_refine(self, r=1):
+    def uniform_refine(self, r=1, returnim=False):
+        if returnim:
+            return [self.refine(returnim=True) for i in range(r)]
         for i in range(r):
             self.refine()
 
     def sizing_adaptive(self, eta):
         pass 
 
-    def refine(self, marker=None, u=None):
+    def refine(self, marker=None, u=None, returnim=False):
+        """ Refine the marked leaf cells, all the leaf cells if `marker` is
+        None
+
+        If `returnim` is True, the interpolation matrix of the Q1 functions
+        from the old nodes to the new node array is returned instead of True.
+        """
         if marker == None:
             idx = self.leaf_cell_index()
         else:
@@ -344,8 +384,8 @@ class Quadtree(QuadrangleMesh):
 
             # 找到每条非叶子边对应的单元编号， 及在该单元中的局部编号 
             I, J = np.nonzero(isCuttedEdge[cell2edge])
-            cellIdx = np.zeros(NE, dtype=np.int)
-            localIdx = np.zeros(NE, dtype=np.int)
+            cellIdx = np.zeros(NE, dtype=self.itype)
+            localIdx = np.zeros(NE, dtype=self.itype)
             I1 = I[~isLeafCell[I]]
             J1 = J[~isLeafCell[I]]
             cellIdx[cell2edge[I1, J1]] = I1 # the cell idx 
@@ -358,7 +398,7 @@ class Quadtree(QuadrangleMesh):
             cellIdx = child[cellIdx, self.localEdge2childCell[localIdx, 0]]
             localIdx = self.localEdge2childCell[localIdx, 1]
 
-            edge2center = np.zeros(NE, dtype=np.int)
+            edge2center = np.zeros(NE, dtype=self.itype)
             edge2center[isCuttedEdge] = cell[cellIdx, localIdx]  
 
             edgeCenter = 0.5*np.sum(node[edge[isNeedCutEdge]], axis=1) 
@@ -381,26 +421,31 @@ class Quadtree(QuadrangleMesh):
             ep = [edge2center[cell2edge[isNeedCutCell, i]].reshape(-1, 1) for i in range(4)]
             cc = np.arange(N + NEC, N + NEC + NCC).reshape(-1, 1)
             
-            newCell = np.zeros((4*NCC, 4), dtype=np.int)
-            newChild = -np.ones((4*NCC, 4), dtype=np.int)
-            newParent = -np.ones((4*NCC, 2), dtype=np.int)
+            newCell = np.zeros((4*NCC, 4), dtype=self.itype)
+            newChild = -np.ones((4*NCC, 4), dtype=self.itype)
+            newParent = -np.ones((4*NCC, 2), dtype=self.itype)
             newCell[0::4, :] = np.concatenate((cp[0], ep[0], cc, ep[3]), axis=1) 
             newCell[1::4, :] = np.concatenate((ep[0], cp[1], ep[1], cc), axis=1)
             newCell[2::4, :] = np.concatenate((cc, ep[1], cp[2], ep[2]), axis=1)
             newCell[3::4, :] = np.concatenate((ep[3], cc, ep[2], cp[3]), axis=1)
             newParent[:, 0] = np.repeat(idx, 4)
-            newParent[:, 1] = ranges(4*np.ones(NCC, dtype=np.int)) 
+            newParent[:, 1] = ranges(4*np.ones(NCC, dtype=self.itype)) 
             child[idx, :] = np.arange(NC, NC + 4*NCC).reshape(NCC, 4)
 
-            cell = np.concatenate((cell, newCell), axis=0)
-            self.node = np.concatenate((node, edgeCenter, cellCenter), axis=0)
-            self.parent = np.concatenate((parent, newParent), axis=0)
-            self.child = np.concatenate((child, newChild), axis=0)
-            self.ds.reinit(N + NEC + NCC, cell)
+            buffers = self.buffers
+            cell = buffers['cell'].extend(cell, newCell)
+            self.node = buffers['node'].extend(node, edgeCenter, cellCenter)
+            self.parent = buffers['parent'].extend(parent, newParent)
+            self.child = buffers['child'].extend(child, newChild)
+            self.ds.update(N + NEC + NCC, cell)
+            flag = True
+            if returnim:
+                flag = prolongation_matrix(N, edge[isNeedCutEdge],
+                        cell[:NC][isNeedCutCell])
             if u is None:
-                return True
+                return flag
             else:
-                return (Iu,True)
+                return (Iu, flag)
         else:
             return False
         
@@ -440,9 +485,10 @@ class Quadtree(QuadrangleMesh):
             isRemainNode = np.zeros(N, dtype=np.bool)
             isRemainNode[cell[isRemainCell, :]] = True
 
-            cell = cell[isRemainCell]
-            child = child[isRemainCell]
-            parent = parent[isRemainCell]
+            buffers = self.buffers
+            cell = buffers['cell'].compact(cell, isRemainCell)
+            child = buffers['child'].compact(child, isRemainCell)
+            parent = buffers['parent'].compact(parent, isRemainCell)
 
             # 子单元不需要保留的单元， 是新的叶子单元
 
@@ -450,7 +496,7 @@ class Quadtree(QuadrangleMesh):
             isNewLeafCell = np.sum(isRemainCell[child[childIdx, :]], axis=1) == 0 
             child[childIdx[isNewLeafCell], :] = -1
 
-            cellIdxMap = np.zeros(NC, dtype=np.int)
+            cellIdxMap = np.zeros(NC, dtype=self.itype)
             NNC = isRemainCell.sum()
             cellIdxMap[isRemainCell] = np.arange(NNC)
             child[child > -1] = cellIdxMap[child[child > -1]]
@@ -458,11 +504,11 @@ class Quadtree(QuadrangleMesh):
             self.child = child
             self.parent = parent
 
-            nodeIdxMap = np.zeros(N, dtype=np.int)
+            nodeIdxMap = np.zeros(N, dtype=self.itype)
             NN = isRemainNode.sum()
             nodeIdxMap[isRemainNode] = np.arange(NN)
-            cell = nodeIdxMap[cell]
-            self.node = node[isRemainNode]
+            cell[:] = nodeIdxMap[cell]
+            self.node = buffers['node'].compact(node, isRemainNode)
             self.ds.reinit(NN, cell)
 
             if cell.shape[0] == NC:
@@ -543,7 +589,7 @@ class Quadtree(QuadrangleMesh):
 
 
             PNC = isLeafCell.sum()
-            cellIdxMap = np.zeros(NC, dtype=np.int)
+            cellIdxMap = np.zeros(NC, dtype=self.itype)
             cellIdxMap[isLeafCell] = np.arange(PNC)
             cellIdxInvMap, = np.nonzero(isLeafCell)
 
@@ -552,15 +598,15 @@ class Quadtree(QuadrangleMesh):
             # 计算每个叶子四边形单元的每条边上有几条叶子边
             # 因为叶子单元的边不一定是叶子边
             isInPEdge = (pedge2cell[:, 0] != pedge2cell[:, 1])
-            cornerLocation = np.zeros((PNC, 5), dtype=np.int)
+            cornerLocation = np.zeros((PNC, 5), dtype=self.itype)
             np.add.at(cornerLocation.ravel(), 5*pedge2cell[:, 0] + pedge2cell[:, 2] + 1, 1)
             np.add.at(cornerLocation.ravel(), 5*pedge2cell[isInPEdge, 1] + pedge2cell[isInPEdge, 3] + 1, 1)
             cornerLocation = cornerLocation.cumsum(axis=1)
 
 
-            pcellLocation = np.zeros(PNC+1, dtype=np.int)
+            pcellLocation = np.zeros(PNC+1, dtype=self.itype)
             pcellLocation[1:] = cornerLocation[:, 4].cumsum()
-            pcell = np.zeros(pcellLocation[-1], dtype=np.int)
+            pcell = np.zeros(pcellLocation[-1], dtype=self.itype)
             cornerLocation += pcellLocation[:-1].reshape(-1, 1) 
             pcell[cornerLocation[:, 0:-1]] = cell[isLeafCell, :]
 
@@ -615,11 +661,22 @@ class Octree(HexahedronMesh):
         (4, 5), (5, 6), (6, 7), (7, 4)], dtype=np.int)
 
     def __init__(self, node, cell, dtype=np.float):
-        super(Octree, self).__init__(node, cell, dtype=dtype)
+        super(Octree, self).__init__(node, cell)
         self.dtype = dtype
         NC = self.number_of_cells()
-        self.parent = -np.ones((NC, 2), dtype=np.int) 
-        self.child = -np.ones((NC, 8), dtype=np.int)
+        self.parent = -np.ones((NC, 2), dtype=self.itype) 
+        self.child = -np.ones((NC, 8), dtype=self.itype)
+        self.buffers = {name:DynamicArray() for name in ['node', 'cell', 'parent', 'child']}
+
+    def renumber(self, nodeperm, cellperm):
+        super(Octree, self).renumber(nodeperm, cellperm)
+        NC = self.number_of_cells()
+        cell2new = -np.ones(NC+1, dtype=self.itype)
+        cell2new[cellperm] = np.arange(NC, dtype=self.itype)
+        parent = self.parent[cellperm]
+        parent[:, 0] = cell2new[parent[:, 0]]
+        self.parent = parent
+        self.child = cell2new[self.child[cellperm]]
 
     def leaf_cell_index(self):
         child = self.child
@@ -638,10 +695,19 @@ class Octree(HexahedronMesh):
         else:
             return self.parent[idx, 0] == -1
     
-    def uniform_refine(self):
-        self.refine()
+    def uniform_refine(self, r=1, returnim=False):
+        if returnim:
+            return [self.refine(returnim=True) for i in range(r)]
+        for i in range(r):
+            self.refine()
 
-    def refine(self, marker=None):
+    def refine(self, marker=None, returnim=False):
+        """ Refine the marked leaf cells, all the leaf cells if `marker` is
+        None
+
+        If `returnim` is True, the interpolation matrix of the Q1 functions
+        from the old nodes to the new node array is returned instead of True.
+        """
         if marker == None:
             idx = self.leaf_cell_index()
         else:
@@ -683,11 +749,11 @@ class Octree(HexahedronMesh):
 
             isNeedCutEdge = ~isCuttedEdge & isCutEdge
 
-            edge2center = np.zeros(NE, dtype=np.int)
+            edge2center = np.zeros(NE, dtype=self.itype)
 
             I, J = np.nonzero(isCuttedEdge[cell2edge])
-            cellIdx = np.zeros(NE, dtype=np.int)
-            localIdx = np.zeros(NE, dtype=np.int)
+            cellIdx = np.zeros(NE, dtype=self.itype)
+            localIdx = np.zeros(NE, dtype=self.itype)
             I1 = I[~isLeafCell[I]]
             J1 = J[~isLeafCell[I]]
             cellIdx[cell2edge[I1, J1]] = I1
@@ -715,11 +781,11 @@ class Octree(HexahedronMesh):
             isNeedCutFace = ~isCuttedFace & isCutFace 
             
 
-            face2center = np.zeros(NF, dtype=np.int)
+            face2center = np.zeros(NF, dtype=self.itype)
 
             I, J = np.nonzero(isCuttedFace[cell2face])
-            cellIdx = np.zeros(NF, dtype=np.int)
-            localIdx = np.zeros(NF, dtype=np.int)
+            cellIdx = np.zeros(NF, dtype=self.itype)
+            localIdx = np.zeros(NF, dtype=self.itype)
             I1 = I[~isLeafCell[I]]
             J1 = J[~isLeafCell[I]]
             cellIdx[cell2face[I1, J1]] = I1
@@ -748,12 +814,12 @@ class Octree(HexahedronMesh):
 
             cc = np.arange(N+NEC+NFC, N+NEC+NFC+NCC).reshape(-1, 1)
 
-            newParent = np.zeros((8*NCC, 2), dtype=np.int)
+            newParent = np.zeros((8*NCC, 2), dtype=self.itype)
             newParent[:, 0] = np.repeat(idx, 8)
-            newParent[:, 1] = ranges(8*np.ones(NCC, dtype=np.int)) 
-            newChild = -np.ones((8*NCC, 8), dtype=np.int)
+            newParent[:, 1] = ranges(8*np.ones(NCC, dtype=self.itype)) 
+            newChild = -np.ones((8*NCC, 8), dtype=self.itype)
 
-            newCell = np.zeros((8*NCC, 8), dtype=np.int)
+            newCell = np.zeros((8*NCC, 8), dtype=self.itype)
             newCell[0::8, :] = np.concatenate(
                     (cp[0], ep[0], fp[0], ep[3], ep[4], fp[4], cc, fp[2]), axis=1)
             newCell[1::8, :] = np.concatenate(
@@ -772,13 +838,17 @@ class Octree(HexahedronMesh):
                     (fp[2], cc, fp[5], ep[7], ep[11], fp[1], ep[10], cp[7]), axis=1)
 
             
-            cell = np.concatenate((cell, newCell), axis=0)
-            self.node = np.concatenate((node, edgeCenter, faceCenter, cellCenter), axis=0)
-            self.parent = np.concatenate((parent, newParent), axis=0)
-            self.child = np.concatenate((child, newChild), axis=0)
+            buffers = self.buffers
+            cell = buffers['cell'].extend(cell, newCell)
+            self.node = buffers['node'].extend(node, edgeCenter, faceCenter, cellCenter)
+            self.parent = buffers['parent'].extend(parent, newParent)
+            self.child = buffers['child'].extend(child, newChild)
             self.child[newParent[:, 0], newParent[:, 1]] = np.arange(NC, NC + 8*NCC) 
-            self.ds.reinit(N + NEC + NCC, cell)
+            self.ds.reinit(N + NEC + NFC + NCC, cell)
 
+            if returnim:
+                return prolongation_matrix(N, edge[isNeedCutEdge],
+                        face[isNeedCutFace], cell[:NC][isNeedCutCell])
             return True
         else:
             return False
@@ -818,14 +888,15 @@ class Octree(HexahedronMesh):
             isRemainNode = np.zeros(N, dtype=np.bool)
             isRemainNode[cell[isRemainCell, :]] = True
 
-            cell = cell[isRemainCell]
-            child = child[isRemainCell]
-            parent = parent[isRemainCell]
+            buffers = self.buffers
+            cell = buffers['cell'].compact(cell, isRemainCell)
+            child = buffers['child'].compact(child, isRemainCell)
+            parent = buffers['parent'].compact(parent, isRemainCell)
             childIdx, = np.nonzero(child[:, 0] > -1)
             isNewLeafCell = np.sum(isRemainCell[child[childIdx, :]], axis=1) == 0 
             child[childIdx[isNewLeafCell], :] = -1
 
-            cellIdxMap = np.zeros(NC, dtype=np.int)
+            cellIdxMap = np.zeros(NC, dtype=self.itype)
             NNC = isRemainCell.sum()
             cellIdxMap[isRemainCell] = np.arange(NNC)
             child[child > -1] = cellIdxMap[child[child > -1]]
@@ -833,11 +904,11 @@ class Octree(HexahedronMesh):
             self.child = child
             self.parent = parent
 
-            nodeIdxMap = np.zeros(N, dtype=np.int)
+            nodeIdxMap = np.zeros(N, dtype=self.itype)
             NN = isRemainNode.sum()
             nodeIdxMap[isRemainNode] = np.arange(NN)
-            cell = nodeIdxMap[cell]
-            self.node = node[isRemainNode]
+            cell[:] = nodeIdxMap[cell]
+            self.node = buffers['node'].compact(node, isRemainNode)
             self.ds.reinit(NN, cell)
 
             if cell.shape[0] == NC:
@@ -925,7 +996,7 @@ class Octree(HexahedronMesh):
 
             NC = self.number_of_cells()
             PNC = isLeafCell.sum()
-            cellIdxMap = np.zeros(NC, dtype=np.int)
+            cellIdxMap = np.zeros(NC, dtype=self.itype)
             cellIdxMap[isLeafCell] = np.arange(PNC)
             pface2cell[:, 0:2] = cellIdxMap[pface2cell[:, 0:2]]
 
@@ -938,7 +1009,7 @@ class Octree(HexahedronMesh):
             pface2edge = face2edge[isLeafFace]
             isLeafEdge[pface2edge] = True
             pedge = edge[isLeafEdge]
-            idxMap = -np.ones(NE, dtype=np.int)
+            idxMap = -np.ones(NE, dtype=self.itype)
             idxMap[isLeafEdge] = range(np.sum(isLeafEdge))
             pface2edge = idxMap[pface2edge]
 
@@ -950,7 +1021,7 @@ class Octree(HexahedronMesh):
             val[:, 1] = 2
             p2e = csr_matrix((val.flatten(), (I, J)), shape=(N, NE), dtype=np.int8)
 
-            NV = np.zeros(PNF, dtype=np.int)
+            NV = np.zeros(PNF, dtype=self.itype)
             node = self.node
             mp = (node[pedge[:, 0]] + node[pedge[:, 1]])/2
             l2 = np.sqrt(np.sum((node[pedge[:, 0]] - node[pedge[:, 1]])**2, axis=1))
@@ -1002,9 +1073,9 @@ class Octree(HexahedronMesh):
                     fp = pedge[pe, lidx%2]
                     NV[fidx] += 1
 
-            pfaceLocation = np.zeros(PNF+1, dtype=np.int)
+            pfaceLocation = np.zeros(PNF+1, dtype=self.itype)
             pfaceLocation[1:] = np.cumsum(NV)
-            pface0 = np.zeros(pfaceLocation[-1], dtype=np.int)
+            pface0 = np.zeros(pfaceLocation[-1], dtype=self.itype)
             currentLocation = pfaceLocation[:-1].copy()
             for i in range(4):
                 print("Current ", i)
@@ -1,60 +1,49 @@
 
-import vtk
-from vtk.numpy_interface import dataset_adapter as dsa
-from .PolygonMesh import PolygonMesh
-
-from tvtk.api import tvtk, write_data
-
 import numpy as np
+from . import vtkio
 
 def load_vtk_mesh(fileName):
-    reader = vtk.vtkUnstructuredGridReader()
-    reader.SetFileName(fileName)
-    reader.Update()
-    mesh = reader.GetOutput()
-    wmesh = dsa.WrapDataObject(mesh)
-    point = wmesh.GetPoints()
-    cell = wmesh.GetCells()
-    cellLocation = wmesh.GetCellLocations()
-    cellType = wmesh.GetCellTypes()
-    pmesh = PolygonMesh(point[:,[0,1]], cell, cellLocation, cellType)
-    return pmesh
+    """ Load the legacy `.vtk` unstructured grid, see `vtkio.load_vtk_mesh`
+    """
+    return vtkio.load_vtk_mesh(fileName)
 
 def write_vtk_mesh(mesh, fileName):
-    point = mesh.point
+    from tvtk.api import tvtk, write_data
+
+    point = mesh.node
     if point.shape[1] == 2:
         point = np.concatenate((point, np.zeros((point.shape[0], 1), dtype=np.float)), axis=1)
     ug = tvtk.UnstructuredGrid(points=point)
 
-    if mesh.meshtype is 'hex':
+    if mesh.meshtype == 'hex':
         cell_type = tvtk.Hexahedron().cell_type
         cell = mesh.ds.cell
-    elif mesh.meshtype is 'tri':
+    elif mesh.meshtype == 'tri':
         cell_type = tvtk.Triangle().cell_type
         cell = mesh.ds.cell
-        for key, value in mesh.cellData.items():
+        for key, value in mesh.celldata.items():
             i = ug.cell_data.add_array(value)
             ug.cell_data.get_array(i).name=key
-        for key, value in mesh.pointData.items():
+        for key, value in mesh.nodedata.items():
             i = ug.point_data.add_array(value)
             ug.point_data.get_array(i).name = key
-    elif mesh.meshtype is 'polyhedron':
+    elif mesh.meshtype == 'polyhedron':
         cell_type = tvtk.Polygon().cell_type
         NF, faces = mesh.to_vtk()
         cell = tvtk.CellArray()
         cell.set_cells(NF, faces)
-    elif mesh.meshtype is 'polygon':
+    elif mesh.meshtype == 'polygon':
        cell_type = tvtk.Polygon().cell_type
        NC, cells = mesh.to_vtk()
        cell = tvtk.CellArray()
        cell.set_cells(NC, cells)
-    elif mesh.meshtype is 'tet':
+    elif mesh.meshtype == 'tet':
         cell_type = tvtk.Tetra().cell_type
         cell = mesh.ds.cell
-        for key, value in mesh.cellData.items():
+        for key, value in mesh.celldata.items():
             i = ug.cell_data.add_array(value)
             ug.cell_data.get_array(i).name = key
-        for key, value in mesh.pointData.items():
+        for key, value in mesh.nodedata.items():
             i = ug.point_data.add_array(value)
             ug.point_data.get_array(i).name = key
     ug.set_cells(cell_type, cell) 
@@ -0,0 +1,463 @@
+"""VTK IO without vtk
+
+The `.vtu` files are written in the XML format with the raw binary data
+appended after the XML header, and the arrays go to the file one by one, so
+no copy of the whole grid is built in the memory.
+
+The legacy `.vtk` unstructured grids, ASCII or binary, are read by
+`np.fromstring` and `np.frombuffer` block by block.
+"""
+import os
+import numpy as np
+from ..common import ranges
+
+VTK_LINE = 3
+VTK_TRIANGLE = 5
+VTK_POLYGON = 7
+VTK_QUAD = 9
+VTK_TETRA = 10
+VTK_HEXAHEDRON = 12
+VTK_POLYHEDRON = 42
+
+vtkCellType = {
+    'interval':VTK_LINE,
+    'tri':VTK_TRIANGLE,
+    'tritree':VTK_TRIANGLE,
+    'polygon':VTK_POLYGON,
+    'quad':VTK_QUAD,
+    'quadtree':VTK_QUAD,
+    'tet':VTK_TETRA,
+    'hex':VTK_HEXAHEDRON,
+    'polyhedron':VTK_POLYHEDRON}
+
+vtkDataType = {
+    'int8':'Int8', 'uint8':'UInt8',
+    'int16':'Int16', 'uint16':'UInt16',
+    'int32':'Int32', 'uint32':'UInt32',
+    'int64':'Int64', 'uint64':'UInt64',
+    'float32':'Float32', 'float64':'Float64'}
+
+def vtk_array(a):
+    """ `a` as a little endian array with a data type known by VTK
+    """
+    a = np.asarray(a)
+    if a.dtype == np.bool_:
+        a = a.astype(np.uint8)
+    if a.dtype.name not in vtkDataType:
+        raise ValueError("VTK has no data type for {}!".format(a.dtype))
+    return np.ascontiguousarray(a, dtype=a.dtype.newbyteorder('<'))
+
+def vtk_cells(mesh, index=None):
+    """ The cell arrays of `mesh` in the VTK layout
+
+    Parameters
+    ----------
+    index : the cells to write, all the cells if None. Only for the meshes
+        with one type of cells, e.g. the leaf cells of a tree mesh.
+
+    Returns
+    -------
+    cells : list of (name, array), `connectivity`, `offsets`, `types` and,
+        for the polyhedron mesh, `faces` and `faceoffsets`
+    """
+    meshtype = mesh.meshtype
+    if meshtype not in vtkCellType:
+        raise ValueError("I don't know how to write the {} mesh!".format(meshtype))
+
+    NC = mesh.number_of_cells()
+    ds = mesh.ds
+    if meshtype == 'polyhedron':
+        # the faces of every cell, each one is listed in the order of its
+        # left cell and reversed for the right cell
+        face = ds.face
+        faceLocation = ds.faceLocation
+        face2cell = ds.face2cell
+        NF = mesh.number_of_faces()
+        NFV = ds.number_of_vertices_of_faces()
+
+        isInFace = face2cell[:, 0] != face2cell[:, 1]
+        f = np.r_[np.arange(NF), np.nonzero(isInFace)[0]]
+        c = np.r_[face2cell[:, 0], face2cell[isInFace, 1]]
+        isRight = np.r_[np.zeros(NF, dtype=np.bool_), np.ones(np.sum(isInFace), dtype=np.bool_)]
+        idx = np.argsort(c, kind='mergesort')
+        f = f[idx]
+        c = c[idx]
+        isRight = isRight[idx]
+
+        nf = np.bincount(c, minlength=NC)
+        nv = NFV[f]
+        L = np.bincount(c, weights=nv + 1, minlength=NC).astype(np.int64) + 1
+        faceoffsets = np.cumsum(L)
+        start = faceoffsets - L
+        cumLen = np.cumsum(nv + 1) - (nv + 1)
+        first = np.cumsum(nf) - nf
+        pos = start[c] + 1 + cumLen - cumLen[first[c]]
+
+        faces = np.zeros(faceoffsets[-1], dtype=np.int64)
+        faces[start] = nf
+        faces[pos] = nv
+        k = ranges(nv)
+        flag = np.repeat(isRight, nv)
+        kk = k.copy()
+        kk[flag] = np.repeat(nv, nv)[flag] - 1 - k[flag]
+        faces[np.repeat(pos + 1, nv) + k] = face[np.repeat(faceLocation[f], nv) + kk]
+
+        cell2node = ds.cell_to_node()
+        connectivity = cell2node.indices
+        offsets = cell2node.indptr[1:]
+        cells = [('connectivity', connectivity), ('offsets', offsets),
+                ('types', np.full(NC, VTK_POLYHEDRON, dtype=np.uint8)),
+                ('faces', faces), ('faceoffsets', faceoffsets)]
+    elif meshtype == 'polygon':
+        cells = [('connectivity', ds.cell), ('offsets', ds.cellLocation[1:]),
+                ('types', np.full(NC, VTK_POLYGON, dtype=np.uint8))]
+    else:
+        cell = ds.cell if index is None else ds.cell[index]
+        NC = cell.shape[0]
+        NV = cell.shape[1]
+        cells = [('connectivity', cell.reshape(-1)),
+                ('offsets', np.arange(NV, (NC+1)*NV, NV, dtype=cell.dtype)),
+                ('types', np.full(NC, vtkCellType[meshtype], dtype=np.uint8))]
+    return cells
+
+def write_vtu_mesh(fileName, mesh, nodedata=None, celldata=None):
+    """ Write `mesh` into the binary `.vtu` file `fileName`
+
+    Parameters
+    ----------
+    nodedata, celldata : dict, optional
+        the arrays on the nodes and the cells, they are written together with
+        `mesh.nodedata` and `mesh.celldata`
+
+    Notes
+    -----
+        Only the leaf cells of the tree meshes (Tritree, Quadtree, Octree)
+        are written, the cell arrays on all the cells are restricted to the
+        leaf cells, and the ones already on the leaf cells are written as
+        they are.
+    """
+    node = mesh.entity('node') if hasattr(mesh, 'entity') else mesh.node
+    NN = node.shape[0]
+    NC = mesh.number_of_cells()
+    index = None
+    if hasattr(mesh, 'leaf_cell_index'):
+        index = mesh.leaf_cell_index()
+    if node.shape[1] < 3:
+        node = np.concatenate((node, np.zeros((NN, 3 - node.shape[1]), dtype=node.dtype)), axis=1)
+
+    pdata = dict(getattr(mesh, 'nodedata', {}))
+    if nodedata is not None:
+        pdata.update(nodedata)
+    cdata = dict(getattr(mesh, 'celldata', {}))
+    if celldata is not None:
+        cdata.update(celldata)
+    if index is not None:
+        cdata = {key:val[index] if len(val) == NC else val for key, val in cdata.items()}
+        NC = len(index)
+
+    sections = [
+        ('PointData', list(pdata.items())),
+        ('CellData', list(cdata.items())),
+        ('Points', [('Points', node)]),
+        ('Cells', vtk_cells(mesh, index))]
+
+    xml = ['<?xml version="1.0"?>',
+        '<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">',
+        '<UnstructuredGrid>',
+        '<Piece NumberOfPoints="{}" NumberOfCells="{}">'.format(NN, NC)]
+    arrays = []
+    offset = 0
+    for section, data in sections:
+        xml.append('<{}>'.format(section))
+        for name, val in data:
+            val = vtk_array(val)
+            ncomp = 1 if val.ndim == 1 else int(np.prod(val.shape[1:]))
+            xml.append(('<DataArray type="{}" Name="{}" NumberOfComponents="{}" '
+                'format="appended" offset="{}"/>').format(
+                    vtkDataType[val.dtype.name], name, ncomp, offset))
+            arrays.append(val)
+            offset += 8 + val.nbytes
+        xml.append('</{}>'.format(section))
+    xml += ['</Piece>', '</UnstructuredGrid>', '<AppendedData encoding="raw">']
+
+    with open(fileName, 'wb') as fp:
+        fp.write('\n'.join(xml).encode('utf-8'))
+        fp.write(b'\n_')
+        for val in arrays:
+            fp.write(np.uint64(val.nbytes).newbyteorder('<').tobytes())
+            val.tofile(fp)
+        fp.write(b'\n</AppendedData>\n</VTKFile>\n')
+
+def write_pvd(fileName, times, files):
+    """ Write the ParaView time series `fileName` of the data `files` at
+    `times`
+    """
+    xml = ['<?xml version="1.0"?>',
+        '<VTKFile type="Collection" version="0.1" byte_order="LittleEndian">',
+        '<Collection>']
+    for t, f in zip(times, files):
+        xml.append('<DataSet timestep="{!r}" part="0" file="{}"/>'.format(float(t), f))
+    xml += ['</Collection>', '</VTKFile>', '']
+    with open(fileName, 'w') as fp:
+        fp.write('\n'.join(xml))
+
+class PVDWriter():
+    """ Write a time series, one `.vtu` file per step and a `.pvd` index
+
+    Example
+    -------
+        writer = PVDWriter('heat.pvd')
+        for t in timeline:
+            ...
+            writer.write(mesh, t, nodedata={'uh':uh})
+
+    The steps go to `heat_000000.vtu`, `heat_000001.vtu`, ... beside the
+    index, and the index is rewritten after every step, so the series can
+    be opened while the computation is still running.
+    """
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.path = os.path.dirname(fileName)
+        self.base = os.path.splitext(os.path.basename(fileName))[0]
+        self.times = []
+        self.files = []
+
+    def step_file(self, i):
+        return '{}_{:06d}.vtu'.format(self.base, i)
+
+    def write(self, mesh, t, nodedata=None, celldata=None):
+        f = self.step_file(len(self.files))
+        write_vtu_mesh(os.path.join(self.path, f), mesh,
+                nodedata=nodedata, celldata=celldata)
+        self.times.append(t)
+        self.files.append(f)
+        write_pvd(self.fileName, self.times, self.files)
+
+
+vtkLegacyType = {
+    'bit':'u1', 'char':'i1', 'unsigned_char':'u1',
+    'short':'i2', 'unsigned_short':'u2',
+    'int':'i4', 'unsigned_int':'u4',
+    'long':'i8', 'unsigned_long':'u8',
+    'vtktypeint64':'i8', 'vtktypeuint64':'u8', 'vtkIdType':'i4',
+    'float':'f4', 'double':'f8'}
+
+class VTKLegacyReader():
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+        self.binary = False
+
+    def line(self):
+        """ The next non empty line
+        """
+        buf = self.buf
+        while self.pos < len(buf):
+            end = buf.find(b'\n', self.pos)
+            end = len(buf) if end == -1 else end
+            line = buf[self.pos:end].decode('utf-8', errors='ignore').strip()
+            self.pos = end + 1
+            if line:
+                return line
+        return None
+
+    def block(self, n, dtype):
+        """ Read `n` values of the legacy type `dtype`
+        """
+        dtype = np.dtype(vtkLegacyType[dtype])
+        buf = self.buf
+        if self.binary:
+            dtype = dtype.newbyteorder('>')
+            a = np.frombuffer(buf, dtype=dtype, count=n, offset=self.pos)
+            self.pos += a.nbytes
+            return a.astype(dtype.newbyteorder('='))
+
+        # find the end of the `n`-th token in a window of the buffer
+        size = max(32*n, 1024)
+        while True:
+            end = min(self.pos + size, len(buf))
+            c = np.frombuffer(buf, dtype=np.uint8, count=end-self.pos, offset=self.pos)
+            isSpace = (c == 32) | (c == 10) | (c == 13) | (c == 9)
+            isStart = ~isSpace
+            isStart[1:] &= isSpace[:-1]
+            start, = np.nonzero(isStart)
+            if len(start) > n:
+                end = self.pos + start[n]
+                break
+            elif end == len(buf):
+                break
+            size *= 2
+        if dtype.kind == 'f':
+            a = np.fromstring(buf[self.pos:end], dtype=dtype, sep=' ')
+        else:
+            a = np.fromstring(buf[self.pos:end], dtype=np.int64, sep=' ').astype(dtype)
+        if len(a) != n:
+            raise ValueError("There are {} values but {} are needed!".format(len(a), n))
+        self.pos = end
+        return a
+
+    def read(self):
+        self.line()
+        self.line()
+        self.binary = (self.line().upper() == 'BINARY')
+        a = self.line().split()
+        if (a[0].upper() != 'DATASET') or (a[1].upper() != 'UNSTRUCTURED_GRID'):
+            raise ValueError("I can only read the unstructured grid, not {}!".format(' '.join(a[1:])))
+
+        node = None
+        cells = None
+        offsets = None
+        cellType = None
+        nodedata = {}
+        celldata = {}
+        data = None
+        n = 0
+        while True:
+            line = self.line()
+            if line is None:
+                break
+            a = line.split()
+            key = a[0].upper()
+            if key == 'POINTS':
+                NN = int(a[1])
+                node = self.block(3*NN, a[2]).reshape(NN, 3)
+            elif key == 'CELLS':
+                NC = int(a[1])
+                size = int(a[2])
+                pos = self.pos
+                b = self.line().split()
+                if b[0].upper() == 'OFFSETS':
+                    # the format 5.x, `NC` is the number of the offsets
+                    offsets = self.block(NC, b[1]).astype(np.int_)
+                    b = self.line().split()
+                    cells = self.block(size, b[1]).astype(np.int_)
+                else:
+                    self.pos = pos
+                    cells = self.block(size, 'int').astype(np.int_)
+                    offsets = None
+            elif key == 'CELL_TYPES':
+                cellType = self.block(int(a[1]), 'int').astype(np.int_)
+            elif key in ['POINT_DATA', 'CELL_DATA']:
+                data = nodedata if key == 'POINT_DATA' else celldata
+                n = int(a[1])
+            elif key == 'SCALARS':
+                ncomp = int(a[3]) if len(a) > 3 else 1
+                pos = self.pos
+                if self.line().split()[0].upper() != 'LOOKUP_TABLE':
+                    self.pos = pos
+                data[a[1]] = self.block(n*ncomp, a[2]).reshape(n, -1).squeeze()
+            elif key in ['VECTORS', 'NORMALS']:
+                data[a[1]] = self.block(3*n, a[2]).reshape(n, 3)
+            elif key == 'TENSORS':
+                data[a[1]] = self.block(9*n, a[2]).reshape(n, 3, 3)
+            elif key == 'LOOKUP_TABLE':
+                self.block(4*int(a[2]), 'float' if not self.binary else 'unsigned_char')
+            elif key == 'FIELD':
+                for i in range(int(a[2])):
+                    b = self.line().split()
+                    ncomp, ntuple = int(b[1]), int(b[2])
+                    val = self.block(ncomp*ntuple, b[3]).reshape(ntuple, -1).squeeze()
+                    if data is None:
+                        continue
+                    data[b[0]] = val
+            elif key == 'METADATA':
+                # skip to the empty line
+                end = self.buf.find(b'\n\n', self.pos)
+                self.pos = len(self.buf) if end == -1 else end + 2
+            else:
+                raise ValueError("I don't know the legacy VTK section {}!".format(a[0]))
+
+        # the vertices of the cells and the cell locations
+        NC = len(cellType)
+        if offsets is not None:
+            cell = cells
+            cellLocation = offsets
+        else:
+            start = cell_starts(cells, NC)
+            NV = cells[start]
+            cellLocation = np.zeros(NC+1, dtype=np.int_)
+            cellLocation[1:] = np.cumsum(NV)
+            isIdx = np.ones(len(cells), dtype=np.bool_)
+            isIdx[start] = False
+            cell = cells[isIdx]
+        return node, cell, cellLocation, cellType, nodedata, celldata
+
+def cell_starts(cells, NC):
+    """ The positions of the leading counts of the `NC` cells in the legacy
+    `CELLS` array `cells`, `n v_1 ... v_n n v_1 ...`
+
+    The position of a cell depends on the counts of all the cells before it,
+    so the chain `j -> j + cells[j] + 1` from `0` is followed by pointer
+    jumping, `log2(NC)` vectorized steps instead of a loop over the cells.
+    """
+    L = len(cells)
+    # `nxt[j]` is the position after the cell whose count is at `j`, `L` is
+    # the end
+    nxt = np.arange(1, L+2, dtype=np.int_)
+    nxt[:L] += np.clip(cells, 0, L)
+    np.minimum(nxt, L, out=nxt)
+    start = np.zeros(NC, dtype=np.int_)
+    m = np.arange(NC)
+    k = 0
+    while (1 << k) < NC:
+        # `nxt` jumps over `2**k` cells
+        flag = ((m >> k) & 1) == 1
+        start[flag] = nxt[start[flag]]
+        k += 1
+        if (1 << k) < NC:
+            nxt = nxt[nxt]
+    if (NC > 0) and ((start[-1] == L) or (start[-1] + cells[start[-1]] + 1 != L)):
+        raise ValueError("The CELLS section does not hold {} cells!".format(NC))
+    return start
+
+def read_vtk(fileName):
+    """ Read the legacy `.vtk` unstructured grid `fileName`
+
+    Returns
+    -------
+    node : (NN, 3)
+    cell : the vertices of all the cells one after the other
+    cellLocation : (NC+1, ), the cell `i` is `cell[cellLocation[i]:cellLocation[i+1]]`
+    cellType : (NC, ), the VTK cell types
+    nodedata, celldata : dict
+    """
+    with open(fileName, 'rb') as fp:
+        buf = fp.read()
+    return VTKLegacyReader(buf).read()
+
+def load_vtk_mesh(fileName):
+    """ Load the legacy `.vtk` unstructured grid `fileName` as a
+    `TriangleMesh`, `QuadrangleMesh`, `TetrahedronMesh`, `HexahedronMesh` or
+    `PolygonMesh` (for the 2d cells of different types), with the point and
+    the cell data in `nodedata` and `celldata`
+    """
+    from .TriangleMesh import TriangleMesh
+    from .QuadrangleMesh import QuadrangleMesh
+    from .TetrahedronMesh import TetrahedronMesh
+    from .HexahedronMesh import HexahedronMesh
+    from .PolygonMesh import PolygonMesh
+
+    node, cell, cellLocation, cellType, nodedata, celldata = read_vtk(fileName)
+    NC = len(cellType)
+    types = set(np.unique(cellType))
+    if types <= {VTK_TRIANGLE, VTK_QUAD, VTK_POLYGON}:
+        if np.all(node[:, 2] == 0):
+            node = node[:, :2]
+        if types == {VTK_TRIANGLE}:
+            mesh = TriangleMesh(node, cell.reshape(NC, 3))
+        elif types == {VTK_QUAD}:
+            mesh = QuadrangleMesh(node, cell.reshape(NC, 4))
+        else:
+            mesh = PolygonMesh(node, cell, cellLocation)
+    elif types == {VTK_TETRA}:
+        mesh = TetrahedronMesh(node, cell.reshape(NC, 4))
+    elif types == {VTK_HEXAHEDRON}:
+        mesh = HexahedronMesh(node, cell.reshape(NC, 8))
+    else:
+        raise ValueError("I can not make a mesh of the VTK cell types {}!".format(types))
+
+    for data, val in [('nodedata', nodedata), ('celldata', celldata)]:
+        if not hasattr(mesh, data):
+            setattr(mesh, data, {})
+        getattr(mesh, data).update(val)
+    return mesh
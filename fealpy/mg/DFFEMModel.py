@@ -6,7 +6,8 @@ from fealpy.fem.integral_alg import IntegralAlg
 from numpy.linalg import norm
 from fealpy.fem import doperator
 from fealpy.mg.DarcyFEMModel import DarcyP0P1
-from scipy.sparse.linalg import cg, inv, dsolve,spsolve
+from scipy.sparse.linalg import cg, inv, dsolve,spsolve, splu
+from fealpy.solver.saddle_point import schur_complement
 from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
 from fealpy.functionspace.lagrange_fem_space import VectorLagrangeFiniteElementSpace
 
@@ -119,9 +120,15 @@ class DarcyForchheimerP0P1():
         FL = np.sqrt(F[:NC]**2 + F[NC:]**2)
         gamma = 1.0/(2*alpha) + np.sqrt((1.0/alpha**2) + 4*(beta/rho)*FL)/2
         uhalf = F/np.r_[gamma,gamma]
-        ## Direct Solver 
-
+        ## Aalpha is diagonal for the P0 velocity, so 1/d is its exact
+        ## inverse, and the Schur complement of the linear Darcy equation is
+        ## exact and it does not change in the iteration
         Aalpha = A11 + spdiags(area/alpha, 0, 2*NC,2*NC)
+        d = Aalpha.diagonal()
+        if (Aalpha - spdiags(d, 0, 2*NC, 2*NC)).count_nonzero() > 0:
+            raise ValueError("The Schur complement needs a diagonal velocity block!")
+        Ap = schur_complement(A21, d, BT=A12)
+        lu = splu(Ap[1:,1:].tocsc())
 
         while ru+rp > tol and n < maxN:
             ## solve the linear Darcy equation
@@ -129,15 +136,12 @@ class DarcyForchheimerP0P1():
             fnew = b[:2*NC] + uhalf*area/alpha\
                     - beta/rho*uhalf*np.r_[uhalfL,uhalfL]*area
 
-            ## Direct Solver
-            Aalphainv = inv(Aalpha)
-            Ap = A21@Aalphainv@A12
-            bp = A21@(Aalphainv@fnew) - b[2*NC:]
+            bp = A21@(fnew/d) - b[2*NC:]
             p = np.zeros(NN,dtype=np.float)
-            p[1:] = spsolve(Ap[1:,1:],bp[1:])
+            p[1:] = lu.solve(bp[1:])
             c = np.sum(np.mean(p[cell],1)*cellmeasure)/np.sum(cellmeasure)
             p = p - c
-            u = Aalphainv@(fnew - A12@p)
+            u = (fnew - A12@p)/d
 
             ## Step1:Solve the nonlinear Darcy equation
 
@@ -6,6 +6,8 @@ from fealpy.fem.integral_alg import IntegralAlg
 from fealpy.fem import doperator
 from scipy.sparse.linalg import cg, inv, dsolve,spsolve
 from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+from fealpy.solver import AMGSolver
+from fealpy.solver.saddle_point import BlockPreconditioner, saddle_point_solve, schur_complement
 
 class DarcyP0P1():
     def __init__(self, pde, mesh, p, integrator):
@@ -107,7 +109,15 @@ class DarcyP0P1():
         
         return np.r_[f,g]
 
-    def solve(self):
+    def solve(self, solver='direct', tol=1e-10):
+        """
+        Parameters
+        ----------
+        solver : 'direct', `spsolve`, or 'minres', MINRES with the block
+            diagonal preconditioner
+        """
+        if solver not in {'direct', 'minres'}:
+            raise ValueError("I don't know the solver {}!".format(solver))
         mesh = self.mesh
         node = self.node
         edge = mesh.ds.edge
@@ -133,11 +143,23 @@ class DarcyP0P1():
                 weights=np.ravel(ii), minlength=NN)
         g = g - b[2*NC:]
 
-        ## Direct Solver
         b1 = np.r_[b[:2*NC],g]
         up = np.zeros(2*NC+NN,dtype=np.float)
         idx = np.arange(2*NC+NN-1)
-        up[idx] = spsolve(A[idx,:][:,idx],b1[idx])
+        if solver == 'direct':
+            up[idx] = spsolve(A[idx,:][:,idx],b1[idx])
+        elif solver == 'minres':
+            # MINRES with the block diagonal preconditioner, the (1, 1) block
+            # is diagonal, so the Schur complement is assembled exactly and
+            # approximated by AMG
+            A11 = A[:2*NC, :2*NC]
+            B = A[2*NC:2*NC+NN-1, :2*NC]
+            d = A11.diagonal()
+            amg = AMGSolver()
+            amg.setup(schur_complement(B, d))
+            P = BlockPreconditioner(B, d, amg)
+            up[:2*NC], up[2*NC:-1], info = saddle_point_solve(A11, B,
+                    b1[:2*NC], b1[2*NC:-1], P, tol=tol)
         u = up[:2*NC]
         p = up[2*NC:]
         c = np.sum(np.mean(p[cell],1)*cellmeasure)/np.sum(cellmeasure)
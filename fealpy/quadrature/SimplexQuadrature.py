@@ -0,0 +1,41 @@
+import numpy as np
+
+class SimplexQuadrature():
+    """ The collapsed Gauss-Legendre rule on the `dim` dimensional simplex 
+
+    The tensor Gauss-Legendre points on the unit cube are collapsed onto the
+    simplex by the Duffy transform. The rule is exact for the polynomials
+    of degree `p`, with no upper bound on `p`, and is used where the fixed
+    tables of `TriangleQuadrature` and `TetrahedronQuadrature` are not
+    enough. The weights sum to one.
+    """
+    def __init__(self, dim, p):
+        n = (p + dim)//2 + 1
+        t, w = np.polynomial.legendre.leggauss(n)
+        t = (t + 1)/2
+        w = w/2
+
+        U = np.meshgrid(*([t]*dim), indexing='ij')
+        W = np.meshgrid(*([w]*dim), indexing='ij')
+        U = [u.flatten() for u in U]
+        W = [v.flatten() for v in W]
+
+        NQ = n**dim
+        self.quadpts = np.zeros((NQ, dim+1), dtype=np.float64)
+        self.weights = np.ones(NQ, dtype=np.float64)
+        s = np.ones(NQ, dtype=np.float64)
+        for k in range(dim):
+            self.quadpts[:, k+1] = s*U[k]
+            self.weights *= W[k]*(1 - U[k])**(dim - k - 1)
+            s *= 1 - U[k]
+        self.quadpts[:, 0] = 1 - np.sum(self.quadpts[:, 1:], axis=1)
+        self.weights *= np.prod(np.arange(1, dim+1))
+
+    def get_number_of_quad_points(self):
+        return self.quadpts.shape[0] 
+
+    def get_gauss_point_and_weight(self, i):
+        return self.quadpts[i,:], self.weights[i] 
+
+    def get_all_gauss_point_and_weight(self):
+        return self.quadpts, self.weights
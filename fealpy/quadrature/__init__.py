@@ -5,3 +5,4 @@ from .TriangleQuadrature import TriangleQuadrature
 from .TetrahedronQuadrature import TetrahedronQuadrature
 from .QuadrangleQuadrature import QuadrangleQuadrature
 
+from .SimplexQuadrature import SimplexQuadrature
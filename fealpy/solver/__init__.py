@@ -1,2 +1,6 @@
-
-from .solve import solve, active_set_solver 
+from .solve import solve, active_set_solver
+from .context import SolverContext
+from .amg import AMGSolver
+from .gmg import GeometricMultigrid, lagrange_prolongation
+from .minres import minres
+from .saddle_point import BlockPreconditioner, AuxiliarySpacePreconditioner, saddle_point_solve
@@ -1,43 +1,378 @@
 import numpy as np
-from scipy.sparse.linalg import cg, inv, dsolve, spsolve
-from scipy.sparse import spdiags
+from scipy.sparse import csr_matrix, spdiags, tril, isspmatrix_csr
+from scipy.sparse.linalg import cg, splu, LinearOperator
 from timeit import default_timer as timer
 
+
+def strength_of_connection(A, theta=0.25):
+    """ The strong connections of `A`
+
+    `i` and `j` are strongly connected if `-a_ij >= theta*max_k(-a_ik)`
+    (classical, for the M-matrices) or the other way around.
+
+    Returns
+    -------
+    S : the symmetric csr matrix of the strong connections, without the
+        diagonal
+    """
+    N = A.shape[0]
+    A = A.tocsr()
+    NV = np.diff(A.indptr)
+    i = np.repeat(np.arange(N), NV)
+    j = A.indices
+    val = -A.data
+    val[i == j] = 0
+    maxVal = np.zeros(N, dtype=A.dtype)
+    isNonEmpty = NV > 0
+    maxVal[isNonEmpty] = np.maximum.reduceat(val, A.indptr[:-1][isNonEmpty])
+    isStrong = (val > 0) & (val >= theta*maxVal[i])
+    S = csr_matrix((np.ones(isStrong.sum(), dtype=np.bool_), (i[isStrong], j[isStrong])),
+            shape=(N, N))
+    return (S + S.T).tocsr()
+
+def independent_set(S, isU=None, priority=None):
+    """ A maximal independent set of the graph `S` in the nodes `isU`
+
+    As in `mesh.coloring.randomcoloring`, in every round a node of `isU`
+    whose random priority is bigger than the ones of all its neighbours in
+    `isU` is selected, and its neighbours are taken out of `isU`.
+
+    Parameters
+    ----------
+    priority : the priority of the nodes, the random numbers in [0, 1) are
+        added to it
+
+    Returns
+    -------
+    isC : bool array, the selected nodes
+    isF : bool array, the neighbours of the selected nodes
+    """
+    N = S.shape[0]
+    isU = np.ones(N, dtype=np.bool_) if isU is None else isU.copy()
+    priority = np.zeros(N) if priority is None else priority
+    S = S.tocoo()
+    edge = np.c_[S.row, S.col]
+    edge = edge[edge[:, 0] < edge[:, 1]]
+    isC = np.zeros(N, dtype=np.bool_)
+    isF = np.zeros(N, dtype=np.bool_)
+    while np.any(isU):
+        r = priority + np.random.random(N)
+        isRemainEdge = isU[edge[:, 0]] & isU[edge[:, 1]]
+        edge = edge[isRemainEdge]
+        isLess = r[edge[:, 0]] < r[edge[:, 1]]
+        flag = np.bincount(edge[isLess, 0], minlength=N)
+        flag += np.bincount(edge[~isLess, 1], minlength=N)
+        isNewC = (flag == 0) & isU
+        isC[isNewC] = True
+        isNewF = (S@isNewC.astype(np.int_) > 0) & isU & ~isNewC
+        isF[isNewF] = True
+        isU[isNewC | isNewF] = False
+    return isC, isF
+
+def coarsen_rs(A, theta=0.25, maxit=10):
+    """ The C/F splitting of `A`
+
+    The coarse nodes are an independent set of the strong graph, where the
+    nodes with more strong connections go first. The nodes without strong
+    connections are fine nodes. Then, as in the second pass of Ruge and
+    Stuben, two strongly connected fine nodes should have a common strong
+    coarse neighbour, an independent set of the pairs which have not is
+    made coarse until there is no such pair.
+    """
+    N = A.shape[0]
+    S = strength_of_connection(A, theta)
+    degree = np.asarray(S.sum(axis=1)).reshape(-1)
+    isU = degree > 0
+    isC, _ = independent_set(S, isU, priority=degree)
+
+    S = S.astype(np.int_)
+    for i in range(maxit):
+        NC = isC.sum()
+        C = csr_matrix((np.ones(NC, dtype=np.int_), (np.nonzero(isC)[0], np.arange(NC))),
+                shape=(N, NC))
+        SC = S@C
+        isF = (~isC).astype(np.int_)
+        SFF = spdiags(isF, 0, N, N)@S@spdiags(isF, 0, N, N)
+        V = (SFF - SFF.multiply((SC@SC.T) > 0)).tocsr()
+        V.eliminate_zeros()
+        if V.nnz == 0:
+            break
+        degree = np.asarray(V.sum(axis=1)).reshape(-1)
+        isNewC, _ = independent_set(V, degree > 0, priority=degree)
+        isC[isNewC] = True
+    return isC, S
+
+def interpolation_rs(A, isC, S):
+    """ The direct interpolation from the coarse nodes
+
+    For a fine node `i` with the strong coarse neighbours `C_i`
+
+        w_ij = - alpha_i a_ij / a_ii, alpha_i = sum_{k != i} a_ik / sum_{j in C_i} a_ij
+    """
+    N = A.shape[0]
+    NC = isC.sum()
+    c2n = np.zeros(N, dtype=np.int_)
+    c2n[isC] = range(NC)
+
+    A = A.tocoo()
+    isOffDiag = A.row != A.col
+    i = A.row[isOffDiag]
+    j = A.col[isOffDiag]
+    val = A.data[isOffDiag]
+    D = A.diagonal()
+
+    S = S.tocoo()
+    key = np.sort(S.row.astype(np.int64)*N + S.col)
+    ij = i.astype(np.int64)*N + j
+    k = np.minimum(np.searchsorted(key, ij), len(key) - 1)
+    isStrong = (len(key) > 0) & (key[k] == ij)
+    isInterp = ~isC[i] & isC[j] & isStrong
+    sumAll = np.bincount(i, weights=val, minlength=N)
+    sumC = np.bincount(i[isInterp], weights=val[isInterp], minlength=N)
+    alpha = np.zeros(N, dtype=A.dtype)
+    flag = sumC != 0
+    alpha[flag] = sumAll[flag]/sumC[flag]
+
+    i = i[isInterp]
+    w = -alpha[i]*val[isInterp]/D[i]
+    I = np.r_[np.nonzero(isC)[0], i]
+    J = np.r_[np.arange(NC), c2n[j[isInterp]]]
+    V = np.r_[np.ones(NC, dtype=A.dtype), w]
+    return csr_matrix((V, (I, J)), shape=(N, NC))
+
+def coarsen_aggregation(A, theta=0.08):
+    """ The aggregates of `A`
+
+    The roots are an independent set of the distance-two strong graph, the
+    other nodes join the aggregate of a strong neighbour, first the roots and
+    then the nodes which have joined.
+
+    Returns
+    -------
+    agg : the aggregate of every node, -1 for the nodes without strong
+        connections (e.g. the Dirichlet nodes), which are left to the smoother
+    """
+    N = A.shape[0]
+    D = np.abs(A.diagonal())
+    A = A.tocoo()
+    isOffDiag = A.row != A.col
+    i = A.row[isOffDiag]
+    j = A.col[isOffDiag]
+    val = np.abs(A.data[isOffDiag])
+    isStrong = (val > 0) & (val >= theta*np.sqrt(D[i]*D[j]))
+    S = csr_matrix((np.ones(isStrong.sum(), dtype=np.bool_), (i[isStrong], j[isStrong])),
+            shape=(N, N))
+    S = (S + S.T).tocsr()
+    S2 = (S@S + S).tocoo()
+    isOffDiag = S2.row != S2.col
+    S2 = csr_matrix((S2.data[isOffDiag], (S2.row[isOffDiag], S2.col[isOffDiag])),
+            shape=(N, N))
+
+    isRoot, _ = independent_set(S2, np.diff(S.indptr) > 0)
+    agg = -np.ones(N, dtype=np.int_)
+    agg[isRoot] = range(isRoot.sum())
+
+    # every node with a strong connection is at most two steps from a root
+    S = S.tocoo()
+    for k in range(2):
+        flag = (agg[S.row] == -1) & (agg[S.col] != -1)
+        agg[S.row[flag]] = agg[S.col[flag]]
+    return agg
+
+def interpolation_aggregation(A, agg, omega=4/3, maxit=10):
+    """ The smoothed aggregation interpolation
+
+        P = (I - omega/rho D^{-1} A) P0
+
+    where `P0` is the piecewise constant interpolation on the aggregates and
+    `rho` is the spectral radius of `D^{-1} A` estimated by the power method.
+    """
+    N = A.shape[0]
+    NC = agg.max() + 1
+    idx, = np.nonzero(agg >= 0)
+    P0 = csr_matrix((np.ones(len(idx), dtype=A.dtype), (idx, agg[idx])), shape=(N, NC))
+    DA = spdiags(1/A.diagonal(), 0, N, N)@A
+    x = np.random.random(N)
+    for i in range(maxit):
+        y = DA@x
+        rho = np.linalg.norm(y)/np.linalg.norm(x)
+        x = y/np.linalg.norm(y)
+    return (P0 - (omega/rho)*(DA@P0)).tocsr()
+
+
 class AMGSolver():
-    def __init__(self):
-        pass
+    """ Algebraic multigrid for the symmetric positive definite matrices
+
+    Parameters
+    ----------
+    theta : the threshold of the strong connections
+    coarsen : 'rs' for the classical (Ruge-Stuben) coarsening with the direct
+        interpolation, or 'aggregation' for the smoothed aggregation
+    smoother : 'gs', Gauss-Seidel, forward before and backward after the
+        coarse grid correction, or 'jacobi' (damped by 2/3)
+    nu : the number of the pre- and the post-smoothing steps
+    cycle : 'V' or 'W'
+    maxcoarse : the size under which the coarsening stops and the coarsest
+        problem is solved by `splu`
+    maxlevel : the largest number of levels
+
+    Example
+    -------
+        amg = AMGSolver(coarsen='aggregation', cycle='V')
+        amg.setup(A)
+        print(amg)
+        x = amg.solve(b, tol=1e-10, accel='cg')
+        M = amg.aspreconditioner()
+    """
+    def __init__(self, theta=None, coarsen='aggregation', smoother='gs', nu=1,
+            cycle='V', maxcoarse=500, maxlevel=20):
+        if theta is None:
+            theta = 0.25 if coarsen == 'rs' else 0.08
+        self.theta = theta
+        self.coarsen = coarsen
+        self.smoother = smoother
+        self.nu = nu
+        self.cycle = cycle
+        self.maxcoarse = maxcoarse
+        self.maxlevel = maxlevel
 
     def setup(self, A):
-        self.A = A
+        """ Build the levels: the matrices `A[k]`, the interpolations `P[k]`
+        from level `k+1` to level `k`, the restrictions `R[k] = P[k].T`, and
+        the smoothers
+        """
+        A = A if isspmatrix_csr(A) else csr_matrix(A)
+        self.A = [A]
+        self.P = []
+        self.R = []
+        self.setupTime = []
+        while (self.A[-1].shape[0] > self.maxcoarse) and (len(self.A) < self.maxlevel):
+            start = timer()
+            A = self.A[-1]
+            if self.coarsen == 'rs':
+                isC, S = coarsen_rs(A, self.theta)
+                P = interpolation_rs(A, isC, S)
+            elif self.coarsen == 'aggregation':
+                agg = coarsen_aggregation(A, self.theta)
+                P = interpolation_aggregation(A, agg)
+            else:
+                raise ValueError("I don't know the coarsening method {}!".format(self.coarsen))
+            if (P.shape[1] == 0) or (P.shape[1] > 0.9*A.shape[0]):
+                break
+            R = P.T.tocsr()
+            self.P.append(P)
+            self.R.append(R)
+            self.A.append((R@A@P).tocsr())
+            self.setupTime.append(timer() - start)
+
+        start = timer()
+        self.setup_smoother()
+        self.coarsest = splu(self.A[-1].tocsc())
+        self.setupTime.append(timer() - start)
+        self.solveTime = np.zeros(len(self.A), dtype=np.float64)
+
+    def setup_smoother(self):
+        """ The lower triangular part of `A[k]` is factorized by `splu` in the
+        natural order, which is the fastest triangular solve scipy has, and
+        the backward sweep solves with its transpose (`A` is symmetric)
+        """
+        self.DL = []
+        self.D = []
+        for A in self.A[:-1]:
+            if self.smoother == 'gs':
+                self.DL.append(splu(tril(A).tocsc(), permc_spec='NATURAL',
+                    diag_pivot_thresh=0, options={'SymmetricMode':True}))
+            elif self.smoother == 'jacobi':
+                self.D.append(A.diagonal())
+            else:
+                raise ValueError("I don't know the smoother {}!".format(self.smoother))
+
+    def number_of_levels(self):
+        return len(self.A)
+
+    def operator_complexity(self):
+        return sum(A.nnz for A in self.A)/self.A[0].nnz
+
+    def grid_complexity(self):
+        return sum(A.shape[0] for A in self.A)/self.A[0].shape[0]
+
+    def __str__(self):
+        s = '{} ({}, {}-cycle, {} smoother)\n'.format(type(self).__name__,
+                self.coarsen, self.cycle, self.smoother)
+        s += '  operator complexity: {:.3f}, grid complexity: {:.3f}\n'.format(
+                self.operator_complexity(), self.grid_complexity())
+        s += '  level        unknowns       nonzeros  setup time  solve time\n'
+        for k, A in enumerate(self.A):
+            s += '  {:5d} {:15d} {:14d} {:11.4f} {:11.4f}\n'.format(k, A.shape[0],
+                    A.nnz, self.setupTime[k], self.solveTime[k])
+        return s
 
-    def solve(self, b):
-        pass
+    def smooth(self, k, b, x, forward=True):
+        A = self.A[k]
+        for i in range(self.nu):
+            r = b - A@x
+            if self.smoother == 'jacobi':
+                x += 2/3*r/self.D[k]
+            elif forward:
+                x += self.DL[k].solve(r)
+            else:
+                x += self.DL[k].solve(r, trans='T')
+        return x
 
+    def vcycle(self, k, b, x):
+        """ One V- or W-cycle on the level `k` with the initial guess `x`
+        """
+        if k == len(self.A) - 1:
+            start = timer()
+            x = self.coarsest.solve(b)
+            self.solveTime[k] += timer() - start
+            return x
 
-    def coarsen_rs(self, theta=0.025):
-        A = self.A
-        N = A.shape[0]
-        MAi = np.min(A, axis=0) # 最小的副对角线的值， 绝对值是是最大的
-        D = spdiags(1/MAi, 0, N, N)
-        Am = D@A
+        start = timer()
+        x = self.smooth(k, b, x, forward=True)
+        r = self.R[k]@(b - self.A[k]@x)
+        self.solveTime[k] += timer() - start
 
-        # 删除弱连续关系
-        i, j = Am.nonzero()
-        val = Am[i, j]
+        e = np.zeros(self.A[k+1].shape[0], dtype=x.dtype)
+        gamma = 2 if (self.cycle == 'W') and (k < len(self.A) - 2) else 1
+        for i in range(gamma):
+            e = self.vcycle(k+1, r, e)
 
-        idx = (-val > theta) 
-        As = csr_matrix((np.ones(len(idx)), (i[idx], j[idx])), 
-                shape=(N, N), dtype=np.double) 
-        Am = csr_matrix((val[idx], (i[idx], j[idx])), 
-                shape=(N, N), dtype=np.double)
-        Ass = (As + As.T)/2
+        start = timer()
+        x += self.P[k]@e
+        x = self.smooth(k, b, x, forward=False)
+        self.solveTime[k] += timer() - start
+        return x
 
-        # 把孤立点放到 F 集合
-        isF = np.zeros(N, dtype=np.bool)
-        valence = A.sum(axis=1)
-        isF[valence == 0] = True
+    def precondition(self, r):
+        return self.vcycle(0, r, np.zeros_like(r))
 
+    def aspreconditioner(self):
+        N = self.A[0].shape[0]
+        return LinearOperator((N, N), matvec=self.precondition, dtype=self.A[0].dtype)
 
-        isC = np.zeros(N, dtype=np.bool)
-        UDNode = np.arange(N)
+    def solve(self, b, x0=None, tol=1e-8, maxit=100, accel=None):
+        """ Solve `A x = b` by the cycles, or by the preconditioned conjugate
+        gradient method if `accel` is 'cg'
 
+        The residual norms are kept in `self.residuals`.
+        """
+        A = self.A[0]
+        x = np.zeros_like(b) if x0 is None else np.array(x0, dtype=b.dtype)
+        bnorm = np.linalg.norm(b)
+        bnorm = 1 if bnorm == 0 else bnorm
+        self.residuals = [np.linalg.norm(b - A@x)]
+        if accel == 'cg':
+            def callback(xk):
+                self.residuals.append(np.linalg.norm(b - A@xk))
+            x, info = cg(A, b, x0=x, tol=tol, atol=0, maxiter=maxit,
+                    M=self.aspreconditioner(), callback=callback)
+            return x
+        elif accel is not None:
+            raise ValueError("I don't know the accelerator {}!".format(accel))
+        for i in range(maxit):
+            if self.residuals[-1]/bnorm < tol:
+                break
+            x = self.vcycle(0, b, x)
+            self.residuals.append(np.linalg.norm(b - A@x))
+        return x
@@ -0,0 +1,193 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse import csr_matrix, isspmatrix_csr
+from scipy.sparse.linalg import splu, cg, gmres, LinearOperator
+
+
+def matrix_hash(*arrays):
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        h.update(np.ascontiguousarray(a).view(np.uint8))
+    return h.hexdigest()
+
+class CachedSolver():
+    """ A factorization or an AMG hierarchy of one matrix
+    """
+    def __init__(self, A, method, key, pattern):
+        self.method = method
+        self.key = key
+        self.pattern = pattern
+        self.A = A
+        if method == 'direct':
+            self.lu = splu(A.tocsc())
+            self.nbytes = self.lu.nnz*(A.dtype.itemsize + 4) + 2*A.shape[0]*4
+        elif method == 'amg':
+            import pyamg
+            self.ml = pyamg.ruge_stuben_solver(A)
+            self.nbytes = 0
+            for level in self.ml.levels:
+                for key in ['A', 'P', 'R']:
+                    M = getattr(level, key, None)
+                    if M is not None:
+                        M = M.tocsr()
+                        self.nbytes += M.data.nbytes + M.indices.nbytes + M.indptr.nbytes
+        else:
+            raise ValueError("I don't know the solver method {}!".format(method))
+
+    def solve(self, b, tol):
+        if self.method == 'direct':
+            return self.lu.solve(b)
+        else:
+            return self.ml.solve(b, tol=tol, accel='cg').reshape(-1)
+
+    def preconditioner(self):
+        if self.method == 'direct':
+            return LinearOperator(self.A.shape, matvec=self.lu.solve, dtype=self.A.dtype)
+        else:
+            return self.ml.aspreconditioner()
+
+class SolverContext():
+    """ Keep the factorizations (`splu`) and the AMG hierarchies
+    (`pyamg.ruge_stuben_solver`) of the matrices which have been solved, and
+    reuse them when a matrix comes again
+
+    A matrix is known by its fingerprint, the shape, the number of nonzeros
+    and a hash of the csr arrays, or `version` if it is given to `solve`
+    (then the data is not hashed). The cache is LRU and the least recently
+    used solvers are dropped when their memory is over `maxbytes`.
+
+    When `reuse` is True and a matrix is not in the cache but a cached one has
+    the same sparsity pattern, e.g. the matrix of the last nonlinear
+    iteration, the old setup is used as the preconditioner of a Krylov
+    method on the new matrix, `cg` for 'amg' (the matrix must be symmetric
+    positive definite) and `gmres` for 'direct'. If it does not converge to
+    the relative residual `reusetol` in `maxiter` iterations the old setup is
+    dropped, and the new matrix is set up and cached.
+
+    Parameters
+    ----------
+    method : 'direct' or 'amg'
+    maxbytes : the memory budget of the cached solvers
+    tol : the tolerance of the AMG solves of the cached matrices
+    reuse : reuse the setup of a matrix with the same sparsity pattern
+    reusetol : the tolerance of the Krylov solves with an old setup, it is
+        looser than `tol`, as the old setup is not the exact inverse and a
+        Krylov method with it does not get to the round-off in a few steps
+    maxiter : the largest number of the Krylov iterations with an old setup
+
+    Example
+    -------
+        context = SolverContext(method='amg')
+        for i in range(NT):
+            A, b = model.get_current_linear_system()
+            x[:] = context.solve(A, b)
+    """
+    def __init__(self, method='direct', maxbytes=2**30, tol=1e-12,
+            reuse=False, reusetol=1e-8, maxiter=20):
+        self.method = method
+        self.maxbytes = maxbytes
+        self.tol = tol
+        self.reuse = reuse
+        self.reusetol = reusetol
+        self.maxiter = maxiter
+        self.cache = OrderedDict()
+        self.nbytes = 0
+        self.info = {'hit':0, 'miss':0, 'reuse':0, 'evict':0}
+
+    def __len__(self):
+        return len(self.cache)
+
+    def clear(self):
+        self.cache.clear()
+        self.nbytes = 0
+
+    def pattern(self, A):
+        return (A.shape, A.nnz, matrix_hash(A.indptr, A.indices))
+
+    def fingerprint(self, A, method, version=None):
+        if version is not None:
+            return (method, A.shape, A.nnz, 'version', version)
+        else:
+            return (method, A.shape, A.nnz, matrix_hash(A.indptr, A.indices, A.data))
+
+    def get_solver(self, A, method=None, version=None):
+        """ The cached solver of `A`, it is set up if `A` is not in the cache
+        """
+        method = self.method if method is None else method
+        A = A if isspmatrix_csr(A) else csr_matrix(A)
+        key = self.fingerprint(A, method, version)
+        if key in self.cache:
+            self.info['hit'] += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        self.info['miss'] += 1
+        solver = CachedSolver(A, method, key, self.pattern(A))
+        self.add(solver)
+        return solver
+
+    def add(self, solver):
+        self.cache[solver.key] = solver
+        self.nbytes += solver.nbytes
+        while (self.nbytes > self.maxbytes) and (len(self.cache) > 1):
+            _, old = self.cache.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.info['evict'] += 1
+
+    def remove(self, solver):
+        del self.cache[solver.key]
+        self.nbytes -= solver.nbytes
+
+    def find_pattern(self, pattern, method):
+        for solver in reversed(self.cache.values()):
+            if (solver.method == method) and (solver.pattern == pattern):
+                return solver
+        return None
+
+    def solve(self, A, b, method=None, version=None, x0=None, reusetol=None):
+        """ Solve `A x = b`
+
+        Parameters
+        ----------
+        method : 'direct' or 'amg', default `self.method`
+        version : a number or a string which changes when the entries of `A`
+            change, if it is given the data of `A` is not hashed
+        x0 : the initial guess of the Krylov method, only used when an old
+            setup is reused
+        reusetol : the tolerance of the Krylov method with an old setup,
+            default `self.reusetol`
+        """
+        method = self.method if method is None else method
+        A = A if isspmatrix_csr(A) else csr_matrix(A)
+        key = self.fingerprint(A, method, version)
+        solver = self.cache.get(key)
+        if solver is not None:
+            self.info['hit'] += 1
+            self.cache.move_to_end(key)
+            return solver.solve(b, self.tol)
+
+        pattern = self.pattern(A)
+        if self.reuse:
+            solver = self.find_pattern(pattern, method)
+            if solver is not None:
+                x, info = self.krylov(A, b, solver, x0, reusetol)
+                if info == 0:
+                    self.info['reuse'] += 1
+                    self.cache.move_to_end(solver.key)
+                    return x
+                self.remove(solver)
+
+        self.info['miss'] += 1
+        solver = CachedSolver(A, method, key, pattern)
+        self.add(solver)
+        return solver.solve(b, self.tol)
+
+    def krylov(self, A, b, solver, x0=None, tol=None):
+        tol = self.reusetol if tol is None else tol
+        M = solver.preconditioner()
+        if solver.method == 'amg':
+            return cg(A, b, x0=x0, tol=tol, atol=0, maxiter=self.maxiter, M=M)
+        else:
+            return gmres(A, b, x0=x0, tol=tol, atol=0, restart=self.maxiter,
+                    maxiter=1, M=M)
@@ -0,0 +1,128 @@
+import numpy as np
+from timeit import default_timer as timer
+from scipy.sparse import csr_matrix, isspmatrix_csr
+from scipy.sparse.linalg import splu
+
+from .amg import AMGSolver
+
+
+def lagrange_prolongation(cspace, fspace, parent=None):
+    """ The interpolation matrix of the Lagrange finite element functions from
+    the space on a coarse mesh to the space on a refined mesh
+
+    Parameters
+    ----------
+    cspace, fspace : LagrangeFiniteElementSpace, the spaces on the coarse and
+        the fine simplex meshes, two different mesh objects
+    parent : the parent cell of each fine cell, default `i % NC` which is the
+        order of the children made by `uniform_refine`
+
+    Returns
+    -------
+    P : csr_matrix, `(fgdof, cgdof)`
+
+    Notes
+    -----
+    The coarse basis functions are evaluated at the interpolation points of
+    each fine cell, by the barycentric coordinates of the points in the
+    parent cell. The points shared by the fine cells give the same rows, only
+    one of them is kept.
+    """
+    cmesh = cspace.mesh
+    fmesh = fspace.mesh
+    NC = cmesh.number_of_cells()
+    NCf = fmesh.number_of_cells()
+    if parent is None:
+        parent = np.arange(NCf) % NC
+
+    ccell = cmesh.entity('cell')[parent]
+    cnode = cmesh.entity('node')
+    fcell2dof = fspace.cell_to_dof()
+    ps = fspace.interpolation_points()[fcell2dof]
+
+    # the barycentric coordinates of `ps` in the parent cells
+    v0 = cnode[ccell[:, 0]]
+    T = cnode[ccell[:, 1:]] - v0[:, np.newaxis, :]
+    l = np.linalg.solve(np.swapaxes(T, 1, 2), np.swapaxes(ps - v0[:, np.newaxis, :], 1, 2))
+    l = np.swapaxes(l, 1, 2)
+    bc = np.concatenate((1 - np.sum(l, axis=-1, keepdims=True), l), axis=-1)
+
+    phi = cspace._basis(bc) # (NCf, fldof, cldof)
+    ccell2dof = cspace.cell_to_dof()[parent]
+    I = np.broadcast_to(fcell2dof[:, :, np.newaxis], phi.shape)
+    J = np.broadcast_to(ccell2dof[:, np.newaxis, :], phi.shape)
+    isNonZero = np.abs(phi) > 1e-12
+    I = I[isNonZero]
+    J = J[isNonZero]
+    val = phi[isNonZero]
+
+    cgdof = cspace.number_of_global_dofs()
+    fgdof = fspace.number_of_global_dofs()
+    _, idx = np.unique(I.astype(np.int64)*cgdof + J, return_index=True)
+    return csr_matrix((val[idx], (I[idx], J[idx])), shape=(fgdof, cgdof))
+
+
+class GeometricMultigrid(AMGSolver):
+    """ Multigrid on the hierarchy of nested meshes
+
+    The interpolations come from the refinement, e.g. the matrices returned by
+    `uniform_refine(n, returnim=True)` of the triangle and tetrahedron meshes,
+    `refine(returnim=True)` of the tree meshes, or `lagrange_prolongation` for
+    the higher order spaces, and the coarse matrices are `R@A@P`. Nothing is
+    coarsened algebraically, so the setup only costs the Galerkin products
+    and the smoothers. The cycles, the smoothers and `solve` are the ones of
+    `AMGSolver`.
+
+    Parameters
+    ----------
+    IM : list of the interpolation matrices from the coarsest mesh to the
+        finest one, `IM[i]` maps the functions of the level `i` to the level
+        `i+1`
+    smoother : 'gs' or 'jacobi'
+    nu : the number of the pre- and the post-smoothing steps
+    cycle : 'V' or 'W'
+
+    Example
+    -------
+        mesh = TriangleMesh(node, cell)
+        IM = mesh.uniform_refine(5, returnim=True)
+        ...
+        gmg = GeometricMultigrid(IM)
+        gmg.setup(A)
+        x = gmg.solve(b, tol=1e-10, accel='cg')
+    """
+    def __init__(self, IM, smoother='gs', nu=1, cycle='V'):
+        super(GeometricMultigrid, self).__init__(smoother=smoother, nu=nu,
+                cycle=cycle, maxcoarse=0, maxlevel=len(IM) + 1)
+        self.coarsen = 'geometric'
+        self.IM = IM
+
+    def setup(self, A):
+        """ Build the coarse matrices `A[k+1] = R[k]@A[k]@P[k]` and the
+        smoothers
+
+        `A` is the matrix on the finest mesh, it may have the Dirichlet rows
+        and columns replaced by the identity as `DirichletBC.apply` does.
+        """
+        A = A if isspmatrix_csr(A) else csr_matrix(A)
+        if A.shape[0] != self.IM[-1].shape[0]:
+            raise ValueError("The size of the matrix {} is not the one of the finest level {}!".format(
+                A.shape[0], self.IM[-1].shape[0]))
+        self.A = [A]
+        self.P = []
+        self.R = []
+        self.setupTime = []
+        for P in reversed(self.IM):
+            start = timer()
+            P = P.tocsr()
+            R = P.T.tocsr()
+            self.P.append(P)
+            self.R.append(R)
+            self.A.append((R@self.A[-1]@P).tocsr())
+            self.setupTime.append(timer() - start)
+
+        start = timer()
+        self.setup_smoother()
+        self.coarsest = splu(self.A[-1].tocsc())
+        self.setupTime.append(timer() - start)
+        self.solveTime = np.zeros(len(self.A), dtype=np.float64)
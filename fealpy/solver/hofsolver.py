@@ -1,69 +1,207 @@
 import numpy as np
-from scipy.sparse import coo_matrix, csc_matrix, csr_matrix
-from scipy.sparse import spdiags, eye, bmat, tril, triu
-from scipy.sparse.linalg import cg, spsolve, LinearOperator
+from scipy.sparse import csr_matrix, spdiags, tril, isspmatrix
+from scipy.sparse.linalg import cg, splu, LinearOperator
 from timeit import default_timer as timer
-import pyamg
 from ..functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
-from ..femmodel.doperator import stiff_matrix
+from ..fem.doperator import stiff_matrix, stiff_operator
+from .amg import AMGSolver
+
+
+def p_prolongation(cspace, fspace):
+    """ The interpolation matrix from the Lagrange space `cspace` of degree
+    `q` to the space `fspace` of degree `p > q` on the same mesh
+
+    The basis of `cspace` is evaluated at the interpolation points
+    `multiIndex/p` of the reference cell, which gives the same local matrix
+    on every cell. The rows of the dofs shared by the cells are equal, only
+    one of them is kept.
+    """
+    bc = fspace.dof.multiIndex/fspace.p
+    phi = cspace.basis(bc) # (fldof, cldof)
+    fcell2dof = fspace.cell_to_dof()
+    ccell2dof = cspace.cell_to_dof()
+    NC = fcell2dof.shape[0]
+
+    isNonZero = np.abs(phi) > 1e-12
+    i, j = np.nonzero(isNonZero)
+    I = fcell2dof[:, i].reshape(-1)
+    J = ccell2dof[:, j].reshape(-1)
+    val = np.tile(phi[i, j], NC)
+
+    cgdof = cspace.number_of_global_dofs()
+    fgdof = fspace.number_of_global_dofs()
+    _, idx = np.unique(I.astype(np.int64)*cgdof + J, return_index=True)
+    return csr_matrix((val[idx], (I[idx], J[idx])), shape=(fgdof, cgdof))
 
 
 class HOFEMFastSovler():
-    def __init__(self, A, space, integrator, measure):
-        self.A = A
-
-
-        self.DL = tril(A).tocsr()
-        self.U = triu(A, k=1).tocsr()
-
-        self.DU = triu(A).tocsr()
-        self.L =  tril(A, k=-1).tocsr()
-
-        linspace = LagrangeFiniteElementSpace(space.mesh, 1)
-
-        # construct amg solver for linear 
-        A1 = stiff_matrix(linspace, integrator, measure)
-        isBdDof = linspace.boundary_dof()
-        bdIdx = np.zeros((A1.shape[0], ), np.int)
-        bdIdx[isBdDof] = 1
-        Tbd = spdiags(bdIdx, 0, A1.shape[0], A1.shape[0])
-        T = spdiags(1-bdIdx, 0, A1.shape[0], A1.shape[0])
-        A1 = T@A1@T + Tbd
-        self.ml = pyamg.ruge_stuben_solver(A1)  
-
-        # Get interpolation matrix 
-        NC = space.mesh.number_of_cells()
-        bc = space.dof.multiIndex/space.p
-        val = np.tile(bc, (NC, 1))
-        c2d0 = space.cell_to_dof()
-        c2d1 = linspace.cell_to_dof()
-
-        I = np.einsum('ij, k->ijk', c2d0, np.ones(3))
-        J = np.einsum('ik, j->ijk', c2d1, np.ones(len(bc)))
-        gdof = space.number_of_global_dofs()
-        lgdof = linspace.number_of_global_dofs()
-        self.PI = csr_matrix((val.flat, (I.flat, J.flat)), shape=(gdof, lgdof))
-
-    def solve(self, b, tol=1e-13):
-        gdof = self.DL.shape[0]
-        P = LinearOperator((gdof, gdof), matvec=self.linear_operator)
+    """ p-multigrid preconditioner for the high order Lagrange finite element
+    methods
+
+    The levels are the spaces of degree p, p-1, ..., 1 on the same mesh, the
+    transfers are the interpolations `p_prolongation`, and the P1 problem is
+    approximated by one V-cycle of `AMGSolver`.
+
+    If `A` is a sparse matrix, the coarse matrices are `R@A@P`. If `A` is a
+    matrix-free operator with a `diagonal` method (see
+    `fem.doperator.MatrixFreeOperator`), the levels p-1, ..., 2 are the
+    matrix-free Laplace operators `stiff_operator(space, integrator,
+    measure)` and the P1 matrix is assembled by `stiff_matrix`, with the
+    Dirichlet dofs of `A.isBdDof`.
+
+    Parameters
+    ----------
+    A : the sparse matrix or the matrix-free operator of degree p
+    space : LagrangeFiniteElementSpace of degree p
+    integrator, measure : the quadrature and the cell measure of the
+        rediscretized operators
+    smoother : 'gs', Gauss-Seidel by the lower triangular part (sparse `A`
+        only), 'jacobi', damped by `4/(3*lmax)` where `lmax` is an estimate
+        of the largest eigenvalue of `D^{-1}A`, or 'chebyshev', the Chebyshev
+        polynomial of `D^{-1}A` on `[lmax/10, 1.1*lmax]`, the default
+    nu : the number of the smoothing steps (the degree of the Chebyshev
+        polynomial) before and after the coarse correction
+
+    Example
+    -------
+        solver = HOFEMFastSovler(A, space, integrator, mesh.area())
+        x = solver.solve(b, tol=1e-10)
+        # or
+        M = solver.aspreconditioner()
+        x, info = cg(A, b, M=M, tol=1e-10)
+    """
+    def __init__(self, A, space, integrator, measure, smoother='chebyshev', nu=2):
+        self.matrixfree = not isspmatrix(A)
+        if (smoother == 'gs') and self.matrixfree:
+            raise ValueError("The Gauss-Seidel smoother needs the matrix!")
+        if smoother not in {'gs', 'jacobi', 'chebyshev'}:
+            raise ValueError("I don't know the smoother {}!".format(smoother))
+        self.smoother = smoother
+        self.nu = nu
+
         start = timer()
-        x, info = cg(self.A, b, M=P, tol=tol)
-        end = timer()
-        print("Solve time:", end-start, " with convergence info: ", info)
+        self.spaces = [space] + [LagrangeFiniteElementSpace(space.mesh, q)
+                for q in range(space.p - 1, 0, -1)]
+        self.P = [p_prolongation(self.spaces[k+1], self.spaces[k])
+                for k in range(len(self.spaces) - 1)]
+        self.R = [P.T.tocsr() for P in self.P]
+
+        if self.matrixfree:
+            isBdDof = getattr(A, 'isBdDof', None)
+            self.A = [A]
+            for s in self.spaces[1:-1]:
+                self.A.append(stiff_operator(s, integrator, measure,
+                    isBdDof=None if isBdDof is None else s.boundary_dof()))
+            linspace = self.spaces[-1]
+            A1 = stiff_matrix(linspace, integrator, measure)
+            if isBdDof is not None:
+                isBdDof = linspace.boundary_dof()
+                bdIdx = np.zeros((A1.shape[0], ), np.int_)
+                bdIdx[isBdDof] = 1
+                Tbd = spdiags(bdIdx, 0, A1.shape[0], A1.shape[0])
+                T = spdiags(1-bdIdx, 0, A1.shape[0], A1.shape[0])
+                A1 = T@A1@T + Tbd
+            self.A.append(A1.tocsr())
+        else:
+            self.A = [A.tocsr()]
+            for k in range(len(self.P)):
+                self.A.append((self.R[k]@self.A[k]@self.P[k]).tocsr())
+
+        self.setup_smoother()
+
+        # the AMG of the P1 problem
+        self.amg = AMGSolver()
+        self.amg.setup(self.A[-1])
+        self.setupTime = timer() - start
+
+    def setup_smoother(self):
+        self.DL = []
+        self.D = []
+        self.lmax = []
+        for A in self.A[:-1]:
+            if self.smoother == 'gs':
+                self.DL.append(splu(tril(A).tocsc(), permc_spec='NATURAL',
+                    diag_pivot_thresh=0, options={'SymmetricMode':True}))
+            else:
+                D = A.diagonal()
+                self.D.append(D)
+                self.lmax.append(self.estimate_lmax(A, D))
+
+    def estimate_lmax(self, A, D, maxit=15):
+        """ Estimate the largest eigenvalue of `D^{-1}A` by the power method
+
+        The start vector is fixed, so the Jacobi and the Chebyshev smoothers
+        are the same in every run.
+        """
+        x = np.random.default_rng(0).random(A.shape[0])
+        lam = 1
+        for i in range(maxit):
+            y = (A@x)/D
+            lam = np.linalg.norm(y)/np.linalg.norm(x)
+            x = y/np.linalg.norm(y)
+        return 1.1*lam
+
+    def smooth(self, k, b, x, forward=True):
+        A = self.A[k]
+        if self.smoother == 'gs':
+            for i in range(self.nu):
+                r = b - A@x
+                if forward:
+                    x += self.DL[k].solve(r)
+                else:
+                    x += self.DL[k].solve(r, trans='T')
+        elif self.smoother == 'jacobi':
+            omega = 4/(3*self.lmax[k])
+            for i in range(self.nu):
+                x += omega*(b - A@x)/self.D[k]
+        else:
+            # the Chebyshev iteration for `D^{-1}A` on [lmin, lmax]
+            D = self.D[k]
+            lmax = self.lmax[k]
+            lmin = lmax/10
+            theta = (lmax + lmin)/2
+            delta = (lmax - lmin)/2
+            sigma = theta/delta
+            rho = 1/sigma
+            r = b - A@x
+            d = r/D/theta
+            for i in range(self.nu):
+                x += d
+                if i == self.nu - 1:
+                    break
+                r -= A@d
+                rho1 = 1/(2*sigma - rho)
+                d = rho1*rho*d + 2*rho1/delta*r/D
+                rho = rho1
         return x
 
-    def linear_operator(self, r):
-        gdof = self.DL.shape[0]
-        u = np.zeros(gdof, dtype=np.float)
-        for i in range(6):
-            u[:] = spsolve(self.DL, r - self.U@u, permc_spec="NATURAL") 
+    def vcycle(self, k, b, x):
+        if k == len(self.A) - 1:
+            return self.amg.precondition(b)
+        x = self.smooth(k, b, x, forward=True)
+        r = self.R[k]@(b - self.A[k]@x)
+        e = self.vcycle(k+1, r, np.zeros(self.A[k+1].shape[0], dtype=x.dtype))
+        x += self.P[k]@e
+        x = self.smooth(k, b, x, forward=False)
+        return x
 
-        r0 = r - (self.DL@u + self.U@u)
-        u0 = self.ml.solve(self.PI.transpose()@r0, tol=1e-13, accel='cg')
+    def linear_operator(self, r):
+        return self.vcycle(0, r, np.zeros_like(r))
 
-        u += self.PI@u0
-        for i in range(6):
-            u[:] = spsolve(self.DU, r - self.L@u, permc_spec="NATURAL") 
+    def aspreconditioner(self):
+        gdof = self.A[0].shape[0]
+        return LinearOperator((gdof, gdof), matvec=self.linear_operator,
+                dtype=np.float64)
 
-        return u
+    def solve(self, b, tol=1e-13, maxiter=None):
+        niter = [0]
+        def callback(xk):
+            niter[0] += 1
+        start = timer()
+        x, info = cg(self.A[0], b, M=self.aspreconditioner(), tol=tol,
+                atol=0, maxiter=maxiter, callback=callback)
+        end = timer()
+        self.niter = niter[0]
+        print("Solve time:", end-start, " with convergence info: ", info,
+                " iterations: ", self.niter)
+        return x
@@ -2,7 +2,10 @@
 from numpy import sqrt, inner, finfo, zeros
 from numpy.linalg import norm
 
-from scipy.sparse.linalg.isolve.utils import make_system
+try:
+    from scipy.sparse.linalg._isolve.utils import make_system
+except ImportError:
+    from scipy.sparse.linalg.isolve.utils import make_system
 
 
 def minres(A, b, x0=None, shift=0.0, tol=1e-5, maxiter=None,
@@ -107,6 +110,11 @@ def minres(A, b, x0=None, shift=0.0, tol=1e-5, maxiter=None,
     w = zeros(n, dtype=xtype)
     w2 = zeros(n, dtype=xtype)
     r2 = r1
+    # `alfa` of the first step is 0 for a saddle point system with the
+    # right hand side only in the second block, so the bounds of the
+    # diagonal of R start from `gamma`
+    gmax = 0
+    gmin = finfo(xtype).max
 
     if show:
         print()
@@ -140,9 +148,6 @@ def minres(A, b, x0=None, shift=0.0, tol=1e-5, maxiter=None,
         if itn == 1:
             if beta/beta1 <= 10*eps:
                 istop = -1  # Terminate later
-            # tnorm2 = alfa**2 ??
-            gmax = abs(alfa)
-            gmin = gmax
 
         # Apply previous rotation Qk-1 to get
         #   [deltak epslnk+1] = [cs  sn][dbark    0   ]
@@ -264,9 +269,8 @@ def minres(A, b, x0=None, shift=0.0, tol=1e-5, maxiter=None,
         if callback is not None:
             callback(x)
 
-        if istop in [1, 2]:
-            pass
-            #break  # TODO check this
+        if istop != 0:
+            break
 
     if show:
         print()
@@ -0,0 +1,200 @@
+import numpy as np
+from timeit import default_timer as timer
+from scipy.sparse import bmat, spdiags, tril, isspmatrix
+from scipy.sparse.linalg import splu, gmres, LinearOperator
+
+from .minres import minres
+
+
+def inverse(M):
+    """ A function `r -> x` approximating the inverse of a block
+
+    Parameters
+    ----------
+    M : one of
+        * a 1d array, the diagonal of the block, `x = r/M`
+        * a sparse matrix, the block itself, it is factorized by `splu`
+        * an object with `aspreconditioner`, e.g. `AMGSolver`,
+          `GeometricMultigrid` or `HOFEMFastSovler` after the setup
+        * a `LinearOperator` or a function, applied to `r` as it is
+    """
+    if isinstance(M, np.ndarray) and (M.ndim == 1):
+        return lambda r: r/M
+    elif isspmatrix(M):
+        return splu(M.tocsc()).solve
+    elif hasattr(M, 'aspreconditioner'):
+        return M.aspreconditioner().matvec
+    elif hasattr(M, 'matvec'):
+        return M.matvec
+    elif callable(M):
+        return M
+    else:
+        raise ValueError("I don't know how to invert {}!".format(type(M)))
+
+def schur_complement(B, d, BT=None, C=None):
+    """ The approximate Schur complement `C + B D^{-1} BT` of the system
+    `[[A, BT], [B, -C]]`, where `D = diag(d)` approximates `A`, e.g. its
+    diagonal or the lumped mass matrix
+    """
+    BT = B.T if BT is None else BT
+    n = len(d)
+    S = B@spdiags(1/d, 0, n, n)@BT
+    if C is not None:
+        S = S + C
+    return S.tocsr()
+
+
+class AuxiliarySpacePreconditioner():
+    """ The auxiliary space preconditioner of a symmetric positive definite
+    matrix `A`, e.g. the Schur complement on a discontinuous space
+
+    `nu` symmetric Gauss-Seidel sweeps on `A`, with the correction from the
+    auxiliary space, usually the continuous P1 space, between the forward and
+    the backward sweeps. The auxiliary matrix is `P.T@A@P`, for a vector
+    space with `ncomponent` interleaved components only its diagonal blocks
+    are kept, and each of them is solved approximately by one cycle of
+    `AMGSolver`.
+
+    Parameters
+    ----------
+    A : the sparse matrix
+    P : the interpolation from the auxiliary space to the space of `A`
+    ncomponent : the number of the components, the dof `i` of the component
+        `j` is `ncomponent*i + j`
+    nu : the number of the smoothing steps
+    coarsen : the coarsening of `AMGSolver`
+    """
+    def __init__(self, A, P, ncomponent=1, nu=2, coarsen='rs'):
+        from .amg import AMGSolver
+        self.A = A.tocsr()
+        self.P = P.tocsr()
+        self.R = P.T.tocsr()
+        self.DL = splu(tril(self.A).tocsc(), permc_spec='NATURAL',
+                diag_pivot_thresh=0, options={'SymmetricMode':True})
+        A1 = (self.R@self.A@self.P).tocsr()
+        self.amg = []
+        for i in range(ncomponent):
+            amg = AMGSolver(coarsen=coarsen)
+            amg.setup(A1[i::ncomponent, i::ncomponent])
+            self.amg.append(amg)
+        self.ncomponent = ncomponent
+        self.nu = nu
+
+    def precondition(self, r):
+        A = self.A
+        x = np.zeros_like(r)
+        for i in range(self.nu):
+            x += self.DL.solve(r - A@x)
+        r1 = self.R@(r - A@x)
+        e = np.zeros_like(r1)
+        n = self.ncomponent
+        for i in range(n):
+            e[i::n] = self.amg[i].precondition(r1[i::n])
+        x += self.P@e
+        for i in range(self.nu):
+            x += self.DL.solve(r - A@x, trans='T')
+        return x
+
+    def aspreconditioner(self):
+        n = self.A.shape[0]
+        return LinearOperator((n, n), matvec=self.precondition, dtype=np.float64)
+
+
+class BlockPreconditioner():
+    """ Block preconditioners of the saddle point system
+
+        [[A, BT], [B, -C]] [u, p] = [f, g]
+
+    where `BT = B.T` in the symmetric case. Let `S = C + B A^{-1} BT` be the
+    Schur complement, which is positive definite in the usual case.
+
+    Parameters
+    ----------
+    B : the (2, 1) block
+    Ainv, Sinv : the approximate inverses of `A` and `S`, anything `inverse`
+        takes
+    BT : the (1, 2) block, default `B.T`
+    structure : 'diagonal', `diag(A, S)`, symmetric positive definite if `A`
+        and `S` are, for MINRES; 'upper', `[[A, BT], [0, -S]]`, or 'lower',
+        `[[A, 0], [B, -S]]`, for GMRES. With the exact inverses, GMRES
+        converges in 2 steps for the triangular ones, and in 3 for the
+        diagonal one if `C = 0`.
+
+    Example
+    -------
+        d = M.diagonal()
+        amg = AMGSolver()
+        amg.setup(schur_complement(B, d))
+        P = BlockPreconditioner(B, d, amg)
+        u, p, info = saddle_point_solve(M, B, f, g, P)
+    """
+    def __init__(self, B, Ainv, Sinv, BT=None, structure='diagonal'):
+        if structure not in {'diagonal', 'upper', 'lower'}:
+            raise ValueError("I don't know the block structure {}!".format(structure))
+        self.B = B
+        self.BT = B.T if BT is None else BT
+        self.Ainv = inverse(Ainv)
+        self.Sinv = inverse(Sinv)
+        self.structure = structure
+        self.n1, self.n0 = B.shape
+
+    def matvec(self, r):
+        r0 = r[:self.n0]
+        r1 = r[self.n0:]
+        if self.structure == 'diagonal':
+            x0 = self.Ainv(r0)
+            x1 = self.Sinv(r1)
+        elif self.structure == 'upper':
+            x1 = -self.Sinv(r1)
+            x0 = self.Ainv(r0 - self.BT@x1)
+        else:
+            x0 = self.Ainv(r0)
+            x1 = self.Sinv(self.B@x0 - r1)
+        return np.r_[x0, x1]
+
+    def aspreconditioner(self):
+        n = self.n0 + self.n1
+        return LinearOperator((n, n), matvec=self.matvec, dtype=np.float64)
+
+
+def saddle_point_solve(A, B, f, g, P, BT=None, C=None, method=None,
+        tol=1e-8, maxiter=None, x0=None, verbose=False):
+    """ Solve `[[A, BT], [B, -C]] [u, p] = [f, g]` preconditioned by the
+    `BlockPreconditioner` `P`
+
+    Parameters
+    ----------
+    method : 'minres' or 'gmres', default 'minres' for the diagonal
+        preconditioner of the symmetric system and 'gmres' otherwise
+    verbose : print the solve time and the number of the iterations
+
+    Returns
+    -------
+    u, p, info : `info` is the convergence flag of the Krylov method, the
+        number of the iterations is kept in `P.niter`
+    """
+    symmetric = BT is None
+    BT = B.T if BT is None else BT
+    K = bmat([[A, BT], [B, None if C is None else -C]], format='csr')
+    b = np.r_[f, g]
+    if method is None:
+        method = 'minres' if symmetric and (P.structure == 'diagonal') else 'gmres'
+
+    niter = [0]
+    def callback(x):
+        niter[0] += 1
+    start = timer()
+    M = P.aspreconditioner()
+    if method == 'minres':
+        x, info = minres(K, b, x0=x0, tol=tol, maxiter=maxiter, M=M, callback=callback)
+    elif method == 'gmres':
+        x, info = gmres(K, b, x0=x0, tol=tol, atol=0, restart=50,
+                maxiter=maxiter, M=M, callback=callback, callback_type='pr_norm')
+    else:
+        raise ValueError("I don't know the method {}!".format(method))
+    end = timer()
+    P.niter = niter[0]
+    if verbose:
+        print("Solve time:", end - start, " with", method, P.niter, "iterations, info:", info)
+    n0 = A.shape[0]
+    return x[:n0], x[n0:], info
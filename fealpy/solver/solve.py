@@ -2,14 +2,20 @@
 import numpy as np
 from scipy.sparse.linalg import cg, inv, dsolve
 
-try:
-    from mumps import spsolve
-except  ImportError:
-    from scipy.sparse.linalg import spsolve
-
 from scipy.sparse import spdiags
 from timeit import default_timer as timer
-import pyamg
+
+# pyamg and mumps are imported when they are used, they take most of the
+# time of `import fealpy.solver`
+
+def spsolve(A, b):
+    """ Solve `A x = b` by mumps if it is installed, otherwise by scipy
+    """
+    try:
+        from mumps import spsolve
+    except ImportError:
+        from scipy.sparse.linalg import spsolve
+    return spsolve(A, b)
 
 def solve1(a, L, uh, dirichlet=None, neuman=None, solver='cg'):
     space = a.space
@@ -38,6 +44,7 @@ def solve1(a, L, uh, dirichlet=None, neuman=None, solver='cg'):
         end = timer()
         print(info)
     elif solver is 'amg':
+        import pyamg
         start = timer()
         ml = pyamg.ruge_stuben_solver(AD)  
         uh[:] = ml.solve(b, tol=1e-12, accel='cg').reshape((-1,))
@@ -54,7 +61,12 @@ def solve1(a, L, uh, dirichlet=None, neuman=None, solver='cg'):
 
     return A 
 
-def solve(dmodel, uh, dirichlet=None, solver='direct'):
+def solve(dmodel, uh, dirichlet=None, solver='direct', context=None):
+    """ Solve the linear system of `dmodel`
+
+    With a `SolverContext` as `context`, the 'direct' and 'amg' solvers are
+    reused when the same matrix is solved again.
+    """
     space = uh.space
     start = timer()
     A = dmodel.get_left_matrix()
@@ -75,7 +87,12 @@ def solve(dmodel, uh, dirichlet=None, solver='direct'):
         uh[:], info = cg(AD, b, tol=1e-14, M=M)
         end = timer()
         print(info)
+    elif (context is not None) and (solver in {'direct', 'amg'}):
+        start = timer()
+        uh[:] = context.solve(AD, b, method=solver)
+        end = timer()
     elif solver is 'amg':
+        import pyamg
         start = timer()
         ml = pyamg.ruge_stuben_solver(AD)  
         uh[:] = ml.solve(b, tol=1e-12, accel='cg').reshape(-1)
@@ -94,7 +111,7 @@ def solve(dmodel, uh, dirichlet=None, solver='direct'):
 
 
 def active_set_solver(dmodel, uh, gh, maxit=5000, dirichlet=None,
-        solver='direct'):
+        solver='direct', context=None):
     space = uh.space
     start = timer()
     A = dmodel.get_left_matrix()
@@ -129,9 +146,12 @@ def active_set_solver(dmodel, uh, gh, maxit=5000, dirichlet=None,
         M[idx, idx] = 1
         F[idx] = gh[idx]
 
-        if solver is 'direct':
+        if context is not None:
+            uh[:] = context.solve(M.tocsr(), F, method=solver, x0=uh)
+        elif solver is 'direct':
             uh[:] = spsolve(M.tocsr(), F)
         elif solver is 'amg':
+            import pyamg
             ml = pyamg.ruge_stuben_solver(M.tocsr())  
             uh[:] = ml.solve(F, tol=1e-12, accel='cg').reshape(-1)
         lam[:] = AD@uh - b
@@ -1,10 +1,21 @@
 import numpy as np
 
 class TimeIntegratorAlgorithm():
-    def __init__(self, timeline):
+    def __init__(self, timeline, writer=None, filepattern='solution{:06d}.npz'):
+        """
+        Parameters
+        ----------
+        writer : AsyncWriter, optional
+            the output of the accepted solutions
+        filepattern : str
+            the file of the step `i` is `filepattern.format(i)`, e.g.
+            'results/heat{:06d}.npz'
+        """
         self.timeline = timeline
         self.current = 0 
         self.stop = len(timeline)
+        self.writer = writer
+        self.filepattern = filepattern
 
     def step(self):
         self.current += 1 
@@ -32,9 +43,17 @@ class TimeIntegratorAlgorithm():
                 self.accept_solution(currentSolution)
             except StopIteration:
                 break
+        if self.writer is not None:
+            self.writer.flush()
 
     def accept_solution(self, currentSolution):
-        pass
+        """ Hand the solution of the current step to the output `writer`,
+        the subclasses which override it should keep only what the next
+        step needs
+        """
+        if self.writer is not None:
+            self.writer.save(self.filepattern.format(self.current),
+                    uh=currentSolution, t=self.get_current_time())
 
     def solve(self, A, b):
         pass
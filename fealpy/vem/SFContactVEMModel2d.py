@@ -2,7 +2,6 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye
 from scipy.sparse.linalg import cg, inv, dsolve, spsolve
-import pyamg
 
 from ..functionspace.vem_space import VirtualElementSpace2d 
 from ..boundarycondition import DirichletBC
@@ -132,6 +131,7 @@ class SFContactVEMModel2d():
         eta = self.model.eta
 
         AD = bc.apply_on_matrix(A)
+        import pyamg
         ml = pyamg.ruge_stuben_solver(AD)  
         while k < maxit:
             b1 = self.get_lagrangian_multiplier_vector(edge, edge2dof)
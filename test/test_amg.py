@@ -0,0 +1,52 @@
+import warnings
+import numpy as np
+import pytest
+from scipy.sparse import diags, eye, kron, SparseEfficiencyWarning
+
+from fealpy.solver.amg import AMGSolver
+
+
+def laplace_matrix(n):
+    """ The 5-point Laplacian on the `n` by `n` interior nodes
+    """
+    T = diags([-np.ones(n-1), 2*np.ones(n), -np.ones(n-1)], [-1, 0, 1])
+    return (kron(T, eye(n)) + kron(eye(n), T)).tocsr()
+
+@pytest.mark.parametrize('accel', [None, 'cg'])
+@pytest.mark.parametrize('coarsen', ['rs', 'aggregation'])
+def test_amg_convergence(coarsen, accel):
+    np.random.seed(0)
+    A = laplace_matrix(63)
+    x = np.random.rand(A.shape[0])
+    b = A@x
+    amg = AMGSolver(coarsen=coarsen, maxcoarse=100)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', SparseEfficiencyWarning)
+        amg.setup(A)
+        x1 = amg.solve(b, tol=1e-8, maxit=100, accel=accel)
+    assert amg.number_of_levels() > 2
+    assert amg.A[-1].shape[0] <= 100
+    assert amg.operator_complexity() < 4
+    # the multigrid rate, far fewer steps than the smoother alone needs
+    assert len(amg.residuals) < (20 if accel == 'cg' else 40)
+    assert np.linalg.norm(b - A@x1) <= 1e-8*np.linalg.norm(b)
+    assert np.linalg.norm(x1 - x) < 1e-6*np.linalg.norm(x)
+
+@pytest.mark.parametrize('coarsen', ['rs', 'aggregation'])
+def test_amg_diagonal_matrix(coarsen):
+    # no strong connections, so nothing to coarsen although the matrix is
+    # larger than `maxcoarse`
+    np.random.seed(0)
+    N = 2000
+    d = 1 + np.random.rand(N)
+    A = diags(d).tocsr()
+    b = np.random.rand(N)
+    amg = AMGSolver(coarsen=coarsen, maxcoarse=500)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', SparseEfficiencyWarning)
+        amg.setup(A)
+    assert amg.number_of_levels() == 1
+    x = amg.solve(b, tol=1e-12)
+    assert np.allclose(x, b/d)
+    x = amg.solve(b, tol=1e-12, accel='cg')
+    assert np.allclose(x, b/d)
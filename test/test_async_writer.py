@@ -0,0 +1,73 @@
+import os
+import numpy as np
+import pytest
+
+from fealpy.common import AsyncWriter
+from fealpy.timeintegratoralg.TimeIntegratorAlgorithm import TimeIntegratorAlgorithm
+
+
+def test_save_flush_load(tmp_path):
+    path = os.path.join(str(tmp_path), 'results', 'run')
+    uh = np.zeros(100)
+    with AsyncWriter(maxsize=2) as writer:
+        for i in range(10):
+            uh[:] = i
+            writer.save(os.path.join(path, 'uh{:06d}.npz'.format(i)), uh=uh, t=0.1*i)
+        writer.flush()
+        # everything is on the disk after `flush`, and the arrays have been
+        # copied when they were submitted
+        for i in range(10):
+            with np.load(os.path.join(path, 'uh{:06d}.npz'.format(i))) as data:
+                assert np.all(data['uh'] == i)
+                assert np.isclose(data['t'], 0.1*i)
+
+def test_uncompressed(tmp_path):
+    f = os.path.join(str(tmp_path), 'a.npz')
+    a = np.random.rand(10, 3)
+    writer = AsyncWriter(compresslevel=0)
+    writer.save(f, a=a, b=np.arange(4))
+    writer.close()
+    with np.load(f) as data:
+        assert np.all(data['a'] == a)
+        assert np.all(data['b'] == np.arange(4))
+
+def test_error_is_raised(tmp_path):
+    def fail():
+        raise IOError("disk full")
+    writer = AsyncWriter()
+    writer.submit(fail)
+    with pytest.raises(IOError):
+        writer.flush()
+    # the writer goes on after the error has been raised
+    f = os.path.join(str(tmp_path), 'a.npz')
+    writer.save(f, a=np.ones(3))
+    writer.close()
+    with np.load(f) as data:
+        assert np.all(data['a'] == 1)
+    with pytest.raises(RuntimeError):
+        writer.save(f, a=np.ones(3))
+
+def test_bad_path_fails_at_once(tmp_path):
+    f = os.path.join(str(tmp_path), 'file')
+    open(f, 'w').close()
+    writer = AsyncWriter()
+    with pytest.raises(OSError):
+        writer.save(os.path.join(f, 'a.npz'), a=np.ones(3))
+    writer.close()
+
+def test_time_integrator_file_pattern(tmp_path):
+    class Integrator(TimeIntegratorAlgorithm):
+        def step(self, dt):
+            self.current += 1
+            if self.current == self.stop - 1:
+                raise StopIteration
+            return self.current*np.ones(4)
+
+    pattern = os.path.join(str(tmp_path), 'out', 'u{:03d}.npz')
+    timeline = np.linspace(0, 1, 6)
+    with AsyncWriter() as writer:
+        Integrator(timeline, writer=writer, filepattern=pattern).run()
+    for i in range(1, 5):
+        with np.load(pattern.format(i)) as data:
+            assert np.all(data['uh'] == i)
+            assert np.isclose(data['t'], timeline[i])
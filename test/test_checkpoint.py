@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import signal
+import subprocess
+import numpy as np
+import pytest
+
+from fealpy.common import Checkpoint
+from fealpy.mesh.tree_data_structure import Quadtree
+
+
+def quadtree():
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(0, 1, 2, 3)], dtype=np.int_)
+    mesh = Quadtree(node, cell)
+    mesh.uniform_refine(2)
+    return mesh
+
+def test_save_load(tmp_path):
+    path = os.path.join(str(tmp_path), 'checkpoint')
+    checkpoint = Checkpoint(path, interval=3600, keep=2)
+    assert checkpoint.load() is None
+
+    mesh = quadtree()
+    uh = np.zeros(mesh.number_of_nodes())
+    for i in range(4):
+        uh[:] = i
+        # only the forced ones are written before the interval
+        assert checkpoint.save(i, mesh, functions={'uh':uh},
+                state={'step':i, 't':0.5*i, 'name':'run', 'eta':np.arange(i+1)},
+                force=(i != 1)) == (i != 1)
+    assert sorted(os.listdir(path)) == ['checkpoint_000002', 'checkpoint_000003', 'latest']
+
+    mesh1, functions, state = Checkpoint(path).load()
+    assert state['step'] == 3
+    assert state['t'] == 1.5
+    assert state['name'] == 'run'
+    assert np.all(state['eta'] == np.arange(4))
+    assert np.all(functions['uh'] == 3)
+    assert np.all(mesh1.node == mesh.node)
+    assert np.all(mesh1.ds.cell == mesh.ds.cell)
+    assert np.all(mesh1.child == mesh.child)
+    assert np.all(mesh1.parent == mesh.parent)
+
+    # the loaded tree can be refined further
+    mesh1.uniform_refine()
+    mesh.uniform_refine()
+    assert np.all(mesh1.ds.cell == mesh.ds.cell)
+
+def test_interrupted_save(tmp_path, monkeypatch):
+    path = os.path.join(str(tmp_path), 'checkpoint')
+    checkpoint = Checkpoint(path, interval=0)
+    mesh = quadtree()
+    checkpoint.save(0, mesh, functions={'uh':np.zeros(mesh.number_of_nodes())},
+            state={'step':0})
+
+    def fail(*args, **kwargs):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(np, 'savez', fail)
+    with pytest.raises(KeyboardInterrupt):
+        checkpoint.save(1, mesh, functions={'uh':np.ones(mesh.number_of_nodes())},
+                state={'step':1})
+    monkeypatch.undo()
+
+    # the half written checkpoint is ignored
+    _, functions, state = checkpoint.load()
+    assert state['step'] == 0
+    assert np.all(functions['uh'] == 0)
+
+    # and replaced by the next save of the same step
+    checkpoint.save(1, mesh, functions={'uh':np.ones(mesh.number_of_nodes())},
+            state={'step':1})
+    _, functions, state = checkpoint.load()
+    assert state['step'] == 1
+    assert np.all(functions['uh'] == 1)
+
+code = """
+import sys
+import numpy as np
+from fealpy.common import Checkpoint
+from fealpy.mesh.tree_data_structure import Quadtree
+
+node = np.array([(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)])
+cell = np.array([(0, 1, 2, 3)])
+mesh = Quadtree(node, cell)
+mesh.uniform_refine(5)
+checkpoint = Checkpoint(sys.argv[1], interval=0)
+uh = np.zeros(mesh.number_of_nodes())
+i = 0
+while True:
+    uh[:] = i
+    checkpoint.save(i, mesh, functions={'uh':uh}, state={'step':i})
+    if i == 2:
+        print('ready', flush=True)
+    i += 1
+"""
+
+def test_killed_run(tmp_path):
+    path = os.path.join(str(tmp_path), 'checkpoint')
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.dirname(os.path.abspath(__file__))]
+            + sys.path)
+    p = subprocess.Popen([sys.executable, '-W', 'ignore', '-c', code, path],
+            stdout=subprocess.PIPE, env=env)
+    try:
+        assert p.stdout.readline().strip() == b'ready'
+        time.sleep(0.2)
+    finally:
+        p.send_signal(signal.SIGKILL)
+        p.wait()
+        p.stdout.close()
+
+    # the run is killed at a random point, the last finished checkpoint is
+    # complete and consistent
+    mesh, functions, state = Checkpoint(path).load()
+    assert state['step'] >= 2
+    assert np.all(functions['uh'] == state['step'])
+    assert mesh.number_of_cells() == 1 + 4 + 16 + 64 + 256 + 1024
@@ -0,0 +1,131 @@
+import copy
+import numpy as np
+import pytest
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.mesh.tree_data_structure import Tritree, Quadtree, Octree
+from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+from fealpy.boundarycondition.BoundaryCondition import DirichletBC
+from fealpy.fem.doperator import stiff_matrix, mass_matrix
+from fealpy.solver.gmg import GeometricMultigrid, lagrange_prolongation
+
+
+def unit_square_mesh():
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    return TriangleMesh(node, cell)
+
+def poisson_system(space):
+    """ `-Δu = 2π^2 sin(πx)sin(πy)` with `u = 0` on the boundary
+    """
+    mesh = space.mesh
+    qf = mesh.integrator(3)
+    area = mesh.area()
+    A = stiff_matrix(space, qf, area)
+    f = lambda p: 2*np.pi**2*np.sin(np.pi*p[:, 0])*np.sin(np.pi*p[:, 1])
+    b = mass_matrix(space, qf, area)@space.interpolation(f)
+    return DirichletBC(space, lambda p: np.zeros(p.shape[0])).apply(A, b)
+
+def test_gmg_iterations():
+    niter = []
+    for n in [4, 5, 6]:
+        mesh = unit_square_mesh()
+        IM = mesh.uniform_refine(n, returnim=True)
+        space = LagrangeFiniteElementSpace(mesh, 1)
+        A, b = poisson_system(space)
+        gmg = GeometricMultigrid(IM)
+        gmg.setup(A)
+        assert gmg.number_of_levels() == n + 1
+        assert gmg.A[-1].shape[0] == 4
+        x = gmg.solve(b, tol=1e-10, accel='cg')
+        assert np.linalg.norm(b - A@x) <= 1e-10*np.linalg.norm(b)
+        niter.append(len(gmg.residuals) - 1)
+    # the multigrid rate does not depend on the mesh size
+    assert max(niter) <= 16
+    assert max(niter) - min(niter) <= 2
+
+def refined_spaces(p, n=2):
+    cmesh = unit_square_mesh()
+    cmesh.uniform_refine(n)
+    fmesh = copy.deepcopy(cmesh)
+    fmesh.uniform_refine()
+    return LagrangeFiniteElementSpace(cmesh, p), LagrangeFiniteElementSpace(fmesh, p)
+
+@pytest.mark.parametrize('p', [1, 2])
+def test_lagrange_prolongation(p):
+    cspace, fspace = refined_spaces(p)
+    P = lagrange_prolongation(cspace, fspace)
+    assert P.shape == (fspace.number_of_global_dofs(), cspace.number_of_global_dofs())
+    # the polynomials of degree `p` are reproduced exactly
+    u = lambda x: 1 + x[..., 0] - 2*x[..., 1] + (p > 1)*(3*x[..., 0]*x[..., 1] + x[..., 1]**2)
+    uc = cspace.interpolation(u)
+    uf = fspace.interpolation(u)
+    assert np.allclose(P@uc, uf, atol=1e-12)
+    assert np.allclose(P.sum(axis=1), 1)
+
+    # any coarse function, the fine dofs at the coarse interpolation points
+    # keep their coarse values
+    uc = np.random.rand(cspace.number_of_global_dofs())
+    cps = cspace.interpolation_points()
+    fps = fspace.interpolation_points()
+    d = np.sum((fps[:, np.newaxis, :] - cps[np.newaxis, :, :])**2, axis=-1)
+    i, j = np.nonzero(d < 1e-20)
+    assert len(j) == len(cps)
+    assert np.allclose((P@uc)[i], uc[j])
+
+    # so `lagrange_prolongation` and `GeometricMultigrid` work for p = 2
+    if p == 2:
+        A, b = poisson_system(fspace)
+        gmg = GeometricMultigrid([P])
+        gmg.setup(A)
+        x = gmg.solve(b, tol=1e-10, accel='cg')
+        assert np.linalg.norm(b - A@x) <= 1e-10*np.linalg.norm(b)
+
+class BallMarker():
+    def __init__(self, r):
+        self.r = r
+
+    def refine_marker(self, tmesh):
+        idx = tmesh.leaf_cell_index()
+        center = tmesh.entity_barycenter('cell')[idx]
+        return idx[np.sum(center**2, axis=1) < self.r**2]
+
+def tree_meshes():
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    yield Tritree(node, np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_))
+    yield Quadtree(node, np.array([(0, 1, 2, 3)], dtype=np.int_))
+    node = np.array([
+        (0.0, 0.0, 0.0),
+        (1.0, 0.0, 0.0),
+        (1.0, 1.0, 0.0),
+        (0.0, 1.0, 0.0),
+        (0.0, 0.0, 1.0),
+        (1.0, 0.0, 1.0),
+        (1.0, 1.0, 1.0),
+        (0.0, 1.0, 1.0)], dtype=np.float64)
+    yield Octree(node, np.array([(0, 1, 2, 3, 4, 5, 6, 7)], dtype=np.int_))
+
+@pytest.mark.parametrize('mesh', list(tree_meshes()),
+        ids=['tritree', 'quadtree', 'octree'])
+def test_tree_refine_returnim(mesh):
+    # the Q1 (P1 on the tritree) functions, multilinear in x, y and z
+    if isinstance(mesh, Tritree):
+        u = lambda x: 1 + 2*x[:, 0] - x[:, 1]
+    else:
+        u = lambda x: 1 + 2*x[:, 0] - x[:, 1] + 3*np.prod(x, axis=1)
+    for marker in [None, None, BallMarker(0.5)]:
+        uc = u(mesh.entity('node'))
+        NN = mesh.number_of_nodes()
+        P = mesh.refine(marker, returnim=True)
+        assert P.shape == (mesh.number_of_nodes(), NN)
+        assert P.shape[0] > NN
+        assert np.allclose(P@uc, u(mesh.entity('node')))
+        assert np.allclose(P.sum(axis=1), 1)
@@ -0,0 +1,57 @@
+import os
+import numpy as np
+import pytest
+
+from fealpy.mesh.gmshio import read_msh, load_msh_mesh
+
+# The unit square cut into 4 triangles by its center (node tag 10). The node
+# 7 is not on the cells, the line (1, 2) is 'bottom', the other boundary lines
+# are 'wall', and the last triangle is clockwise.
+path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+files = ['square_v22.msh', 'square_v22_binary.msh', 'square_v41.msh',
+        'square_v41_binary.msh']
+
+physicalnames = {4:(0, 'corner'), 1:(1, 'wall'), 3:(1, 'bottom'), 2:(2, 'domain')}
+
+@pytest.mark.parametrize('f', files)
+def test_read_msh(f):
+    node, cell, names = read_msh(os.path.join(path, f))
+    assert node.shape == (6, 3)
+    assert np.all(node[[4, 5]] == [(2, 2, 0), (0.5, 0.5, 0)])
+    assert names == physicalnames
+    assert sorted(cell) == ['line', 'triangle', 'vertex']
+
+    c, physical, elementary = cell['vertex']
+    assert np.all(c == [[0]])
+    assert np.all(physical == [4])
+
+    c, physical, elementary = cell['line']
+    assert np.all(c == [(0, 1), (1, 2), (2, 3), (3, 0)])
+    assert np.all(physical == [3, 1, 1, 1])
+    assert np.all(elementary == [1, 2, 3, 4])
+
+    c, physical, elementary = cell['triangle']
+    assert np.all(c == [(0, 1, 5), (1, 2, 5), (2, 3, 5), (3, 5, 0)])
+    assert np.all(physical == 2)
+    assert np.all(elementary == 1)
+
+@pytest.mark.parametrize('f', files)
+def test_load_msh_mesh(f):
+    mesh = load_msh_mesh(os.path.join(path, f))
+    assert mesh.meshtype == 'tri'
+    assert mesh.number_of_nodes() == 5
+    assert mesh.number_of_cells() == 4
+    assert np.all(mesh.node == [(0, 0), (1, 0), (1, 1), (0, 1), (0.5, 0.5)])
+    assert np.all(mesh.ds.cell == [(0, 1, 4), (1, 2, 4), (2, 3, 4), (3, 0, 4)])
+    assert np.allclose(mesh.area(), 0.25)
+    assert np.all(mesh.celldata['physical'] == 2)
+    assert np.all(mesh.celldata['elementary'] == 1)
+    assert mesh.physicalnames == physicalnames
+
+    edge = np.sort(mesh.entity('edge'), axis=1)
+    physical = mesh.edgedata['physical']
+    isBdEdge = mesh.ds.boundary_edge_flag()
+    assert np.all(physical[~isBdEdge] == 0)
+    isBottom = np.all(edge == [0, 1], axis=1)
+    assert np.all(physical[isBottom] == 3)
+    assert np.all(physical[isBdEdge & ~isBottom] == 1)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from scipy.sparse import spdiags
+from scipy.sparse.linalg import cg
+
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+from fealpy.fem.doperator import stiff_matrix, stiff_operator
+from fealpy.solver.hofsolver import HOFEMFastSovler, p_prolongation
+
+
+def dirichlet_system(space, integrator, measure):
+    """ The stiffness matrix with the identity on the boundary dofs, and a
+    random right hand side which is zero there
+    """
+    gdof = space.number_of_global_dofs()
+    isBdDof = space.boundary_dof()
+    A = stiff_matrix(space, integrator, measure)
+    bdIdx = np.zeros(gdof, dtype=np.int_)
+    bdIdx[isBdDof] = 1
+    Tbd = spdiags(bdIdx, 0, gdof, gdof)
+    T = spdiags(1-bdIdx, 0, gdof, gdof)
+    A = (T@A@T + Tbd).tocsr()
+    b = np.random.default_rng(0).random(gdof)
+    b[isBdDof] = 0
+    return A, b, isBdDof
+
+@pytest.mark.parametrize('smoother', ['gs', 'jacobi', 'chebyshev', 'free'])
+@pytest.mark.parametrize('p', [2, 3])
+def test_pmg_cg(p, smoother):
+    mesh = CosCosData().init_mesh(3)
+    space = LagrangeFiniteElementSpace(mesh, p)
+    integrator = mesh.integrator(p+2)
+    measure = mesh.area()
+    A, b, isBdDof = dirichlet_system(space, integrator, measure)
+    if smoother == 'free':
+        M = stiff_operator(space, integrator, measure, isBdDof=isBdDof)
+        solver = HOFEMFastSovler(M, space, integrator, measure)
+    else:
+        solver = HOFEMFastSovler(A, space, integrator, measure, smoother=smoother)
+    assert len(solver.A) == p
+
+    x = solver.solve(b, tol=1e-10)
+    assert np.linalg.norm(b - A@x) <= 1e-10*np.linalg.norm(b)
+    # plain CG takes 62 and 123 steps here
+    assert solver.niter < 20
+
+    # the preconditioner of scipy's cg is the same
+    x1, info = cg(A, b, M=solver.aspreconditioner(), tol=1e-10, atol=0)
+    assert info == 0
+    assert np.allclose(x1, x)
+
+def test_unknown_smoother():
+    mesh = CosCosData().init_mesh(1)
+    space = LagrangeFiniteElementSpace(mesh, 2)
+    integrator = mesh.integrator(4)
+    A, _, isBdDof = dirichlet_system(space, integrator, mesh.area())
+    with pytest.raises(ValueError):
+        HOFEMFastSovler(A, space, integrator, mesh.area(), smoother='sor')
+    M = stiff_operator(space, integrator, mesh.area(), isBdDof=isBdDof)
+    with pytest.raises(ValueError):
+        HOFEMFastSovler(M, space, integrator, mesh.area(), smoother='gs')
+
+@pytest.mark.parametrize('p', [2, 3, 4])
+def test_p_prolongation(p):
+    mesh = CosCosData().init_mesh(2)
+    fspace = LagrangeFiniteElementSpace(mesh, p)
+    for q in range(1, p):
+        cspace = LagrangeFiniteElementSpace(mesh, q)
+        P = p_prolongation(cspace, fspace)
+        assert P.shape == (fspace.number_of_global_dofs(),
+                cspace.number_of_global_dofs())
+        # the polynomials of degree `q` are in both spaces
+        u = lambda x: (1 + x[..., 0] - 2*x[..., 1])**q + x[..., 0]*x[..., 1]**(q-1)
+        uc = cspace.interpolation(u)
+        uf = fspace.interpolation(u)
+        assert np.allclose(P@uc, uf, atol=1e-12)
+        # and any function of degree `q` on the cells
+        uc = np.random.rand(cspace.number_of_global_dofs())
+        bcs = mesh.integrator(p+1).quadpts
+        cell2dof = cspace.cell_to_dof()
+        val0 = np.einsum('qi, ci->qc', cspace.basis(bcs), uc[cell2dof])
+        val1 = np.einsum('qi, ci->qc', fspace.basis(bcs), (P@uc)[fspace.cell_to_dof()])
+        assert np.allclose(val0, val1)
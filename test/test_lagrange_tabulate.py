@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+
+
+def test_tabulate_is_readonly():
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    space = LagrangeFiniteElementSpace(TriangleMesh(node, cell), 2)
+    bcs = space.mesh.integrator(4).quadpts
+    for f, g in [(space.basis, space._basis),
+            (space.barycentric_grad_basis, space._barycentric_grad_basis)]:
+        val = f(bcs)
+        assert np.allclose(val, g(bcs))
+        # the same data, no copies
+        assert np.shares_memory(val, f(bcs.copy()))
+        assert not val.flags.writeable
+        with pytest.raises(ValueError):
+            val[:] = 0
+        with pytest.raises(ValueError):
+            val.flags.writeable = True
+    assert len(space.tabulations) == 2
@@ -0,0 +1,98 @@
+import numpy as np
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.mesh.tree_data_structure import Tritree, Quadtree
+
+
+class IndexMarker():
+    """ Mark the given leaf cells of a tree mesh, by their place among the
+    leaf cells
+    """
+    def __init__(self, f):
+        self.f = f
+
+    def refine_marker(self, tmesh):
+        idx = tmesh.leaf_cell_index()
+        return idx[self.f(tmesh, idx)]
+
+    def coarsen_marker(self, tmesh):
+        return None
+
+
+def square(meshtype):
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    if meshtype == 'quad':
+        cell = np.array([(0, 1, 2, 3)], dtype=np.int_)
+    else:
+        cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    return node, cell
+
+def check_update(mesh):
+    """ The edges made by `ds.update` are the ones of a full `construct`, up
+    to their numbering
+    """
+    ds = mesh.ds
+    # the last change was made by `update`
+    assert ds.changedCell is not None
+    edge = ds.edge.copy()
+    edge2cell = ds.edge2cell.copy()
+    cell2edge = ds.cell_to_edge().copy()
+    NE = ds.NE
+    assert edge.shape == (NE, 2)
+    assert edge2cell.shape == (NE, 4)
+
+    ds.construct()
+    assert ds.NE == NE
+    NN = ds.NN
+    key = np.sort(edge, axis=1)
+    key = key[:, 0]*NN + key[:, 1]
+    key0 = np.sort(ds.edge, axis=1)
+    key0 = key0[:, 0]*NN + key0[:, 1]
+    assert len(np.unique(key)) == NE
+    i = np.argsort(key)
+    i0 = np.argsort(key0)
+    assert np.all(key[i] == key0[i0])
+
+    # `perm` maps the edge indices of the update to the ones of construct
+    perm = np.zeros(NE, dtype=np.int_)
+    perm[i] = i0
+    assert np.all(edge == ds.edge[perm])
+    assert np.all(edge2cell == ds.edge2cell[perm])
+    assert np.all(perm[cell2edge] == ds.cell_to_edge())
+
+def test_bisect_update():
+    node, cell = square('tri')
+    mesh = TriangleMesh(node, cell)
+    mesh.uniform_refine(2)
+    for i in range(6):
+        center = mesh.entity_barycenter('cell')
+        markedCell, = np.nonzero(np.sum(center**2, axis=1) < 0.25)
+        mesh.bisect(markedCell)
+        check_update(mesh)
+
+def test_tritree_refine_update():
+    node, cell = square('tri')
+    mesh = Tritree(node, cell)
+    for i in range(2):
+        mesh.refine()
+        check_update(mesh)
+    marker = IndexMarker(lambda t, idx:
+        np.sum(t.entity_barycenter('cell')[idx]**2, axis=1) < 0.3)
+    for i in range(4):
+        mesh.refine(marker)
+        check_update(mesh)
+
+def test_quadtree_refine_update():
+    node, cell = square('quad')
+    mesh = Quadtree(node, cell)
+    mesh.uniform_refine(2)
+    check_update(mesh)
+    marker = IndexMarker(lambda t, idx:
+        np.sum(t.entity_barycenter('cell')[idx]**2, axis=1) < 0.3)
+    for i in range(4):
+        mesh.refine(marker)
+        check_update(mesh)
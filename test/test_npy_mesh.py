@@ -0,0 +1,138 @@
+import os
+import numpy as np
+import pytest
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.mesh.TetrahedronMesh import TetrahedronMesh
+from fealpy.mesh.tree_data_structure import Quadtree
+from fealpy.mesh.meshio import write_npy_mesh, load_npy_mesh
+from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+
+
+def tri_mesh():
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    mesh = TriangleMesh(node, cell)
+    mesh.uniform_refine(3)
+    return mesh
+
+def tet_mesh():
+    node = np.array([
+        (0.0, 0.0, 0.0),
+        (1.0, 0.0, 0.0),
+        (1.0, 1.0, 0.0),
+        (0.0, 1.0, 0.0),
+        (0.0, 0.0, 1.0),
+        (1.0, 0.0, 1.0),
+        (1.0, 1.0, 1.0),
+        (0.0, 1.0, 1.0)], dtype=np.float64)
+    cell = np.array([
+        (0, 1, 2, 6),
+        (0, 5, 1, 6),
+        (0, 4, 5, 6),
+        (0, 7, 4, 6),
+        (0, 3, 7, 6),
+        (0, 2, 3, 6)], dtype=np.int_)
+    mesh = TetrahedronMesh(node, cell)
+    mesh.uniform_refine(1)
+    return mesh
+
+def quadtree():
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(0, 1, 2, 3)], dtype=np.int_)
+    mesh = Quadtree(node, cell)
+    mesh.uniform_refine(3)
+    return mesh
+
+def check_round_trip(mesh, f, mmap_mode, topology=True):
+    NC = mesh.number_of_cells()
+    mesh.celldata['mu'] = np.arange(NC, dtype=np.float64)
+    functions = {'uh':np.sin(mesh.node[:, 0])}
+    if mesh.meshtype in ['tri', 'tet']:
+        space = LagrangeFiniteElementSpace(mesh, 2)
+        functions['vh'] = space.function()
+        functions['vh'][:] = np.arange(space.number_of_global_dofs())
+
+    write_npy_mesh(f, mesh, functions=functions, topology=topology)
+    mesh1, functions1 = load_npy_mesh(f, mmap_mode=mmap_mode)
+
+    assert type(mesh1) is type(mesh)
+    assert mesh1.meshtype == mesh.meshtype
+    assert mesh1.number_of_nodes() == mesh.number_of_nodes()
+    assert mesh1.number_of_cells() == NC
+    assert mesh1.number_of_edges() == mesh.number_of_edges()
+    assert np.all(mesh1.node == mesh.node)
+    assert np.all(mesh1.ds.cell == mesh.ds.cell)
+    if topology:
+        # the same numbering of the edges and the faces
+        if mesh.meshtype == 'tet':
+            names = ['face', 'face2cell', 'edge']
+        else:
+            names = ['edge', 'edge2cell']
+        for name in names:
+            assert np.all(getattr(mesh1.ds, name) == getattr(mesh.ds, name))
+        assert np.all(mesh1.ds.cell_to_edge() == mesh.ds.cell_to_edge())
+    else:
+        # the edges are made again, maybe in another order
+        edge = np.sort(mesh.entity('edge'), axis=1)
+        edge1 = np.sort(mesh1.entity('edge'), axis=1)
+        assert np.all(np.unique(edge, axis=0) == np.unique(edge1, axis=0))
+    assert np.allclose(mesh1.entity_measure('cell'), mesh.entity_measure('cell'))
+    assert np.all(mesh1.celldata['mu'] == mesh.celldata['mu'])
+    assert sorted(functions1) == sorted(functions)
+    for key in functions:
+        assert np.all(functions1[key] == functions[key])
+    for name in ['parent', 'child']:
+        if hasattr(mesh, name):
+            assert np.all(getattr(mesh1, name) == getattr(mesh, name))
+
+    if mmap_mode is None:
+        assert not isinstance(mesh1.node, np.memmap)
+    elif topology:
+        # the blocks are mapped, not read
+        assert isinstance(mesh1.node, np.memmap)
+        assert isinstance(mesh1.ds.cell, np.memmap)
+        assert isinstance(functions1['uh'], np.memmap)
+    return mesh1
+
+@pytest.mark.parametrize('mmap_mode', ['r', None])
+@pytest.mark.parametrize('ext', ['', '.zip'])
+@pytest.mark.parametrize('init_mesh', [tri_mesh, tet_mesh, quadtree])
+def test_npy_round_trip(tmp_path, init_mesh, ext, mmap_mode):
+    f = os.path.join(str(tmp_path), 'mesh' + ext)
+    check_round_trip(init_mesh(), f, mmap_mode)
+
+@pytest.mark.parametrize('ext', ['', '.zip'])
+def test_npy_without_topology(tmp_path, ext):
+    f = os.path.join(str(tmp_path), 'mesh' + ext)
+    check_round_trip(tri_mesh(), f, 'r', topology=False)
+
+def test_npy_readonly_map(tmp_path):
+    f = os.path.join(str(tmp_path), 'mesh.zip')
+    mesh = check_round_trip(tri_mesh(), f, 'r')
+    with pytest.raises(ValueError):
+        mesh.node[0] = 1
+
+@pytest.mark.parametrize('ext', ['', '.zip'])
+def test_npy_copy_on_write_refine(tmp_path, ext):
+    f = os.path.join(str(tmp_path), 'mesh' + ext)
+    mesh = quadtree()
+    write_npy_mesh(f, mesh)
+    mesh1, _ = load_npy_mesh(f, mmap_mode='c')
+    mesh.uniform_refine()
+    mesh1.uniform_refine()
+    assert np.all(mesh1.node == mesh.node)
+    assert np.all(mesh1.ds.cell == mesh.ds.cell)
+    assert np.all(mesh1.child == mesh.child)
+
+    # the file is not changed
+    mesh2, _ = load_npy_mesh(f, mmap_mode='r')
+    assert mesh2.number_of_cells() < mesh1.number_of_cells()
@@ -0,0 +1,81 @@
+import numpy as np
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.mesh.TetrahedronMesh import TetrahedronMesh
+from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+from fealpy.quadrature.SimplexQuadrature import SimplexQuadrature
+
+
+def tri_mesh():
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    mesh = TriangleMesh(node, cell)
+    mesh.uniform_refine(1)
+    # perturb the interior node so that the cells are not all similar
+    mesh.node[4] += (0.1, 0.05)
+    return mesh, 7 # TriangleQuadrature(7) is exact for degree 10
+
+def tet_mesh():
+    node = np.array([
+        (0.0, 0.0, 0.0),
+        (1.0, 0.0, 0.0),
+        (1.0, 1.0, 0.0),
+        (0.0, 1.0, 0.0),
+        (0.0, 0.0, 1.0),
+        (1.0, 0.0, 1.0),
+        (1.0, 1.0, 1.0),
+        (0.0, 1.0, 1.0)], dtype=np.float64)
+    cell = np.array([
+        (0, 1, 2, 6),
+        (0, 5, 1, 6),
+        (0, 4, 5, 6),
+        (0, 7, 4, 6),
+        (0, 3, 7, 6),
+        (0, 2, 3, 6)], dtype=np.int_)
+    mesh = TetrahedronMesh(node, cell)
+    mesh.node[6] += (0.1, -0.05, 0.2)
+    return mesh, 6 # TetrahedronQuadrature(6) is exact for degree 8
+
+
+def check_element_matrices(mesh, index):
+    measure = mesh.entity_measure('cell')
+    Dlambda = mesh.grad_lambda()
+    qf = mesh.integrator(index)
+    bcs, ws = qf.quadpts, qf.weights
+    for p in range(1, 5):
+        space = LagrangeFiniteElementSpace(mesh, p)
+
+        S = space.reference_stiff_tensor()
+        G = np.einsum('kam, kbm->kab', Dlambda, Dlambda)
+        A0 = np.einsum('ijab, kab, k->kij', S, G, measure)
+        gphi = space.grad_basis(bcs)
+        A1 = np.einsum('i, ijkm, ijpm, j->jkp', ws, gphi, gphi, measure)
+        assert np.allclose(A0, A1, rtol=1e-10, atol=1e-12)
+
+        M = space.reference_mass_matrix()
+        M0 = np.einsum('ij, k->kij', M, measure)
+        phi = space.basis(bcs)
+        M1 = np.einsum('m, mi, mj, k->kij', ws, phi, phi, measure)
+        assert np.allclose(M0, M1, rtol=1e-10, atol=1e-14)
+
+def test_triangle_reference_tensors():
+    check_element_matrices(*tri_mesh())
+
+def test_tetrahedron_reference_tensors():
+    check_element_matrices(*tet_mesh())
+
+def test_simplex_quadrature():
+    # int_T lambda_0^a lambda_1^b lambda_2^c = a! b! c! d!/(a+b+c+d)! |T|
+    from math import factorial
+    for dim in [2, 3]:
+        qf = SimplexQuadrature(dim, 7)
+        assert np.isclose(np.sum(qf.weights), 1)
+        bcs, ws = qf.quadpts, qf.weights
+        a, b = 3, 4
+        val = np.sum(ws*bcs[:, 0]**a*bcs[:, 1]**b)
+        exact = factorial(a)*factorial(b)*factorial(dim)/factorial(a + b + dim)
+        assert np.isclose(val, exact)
@@ -0,0 +1,103 @@
+import numpy as np
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.mesh.TetrahedronMesh import TetrahedronMesh
+
+
+def tri_mesh():
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    mesh = TriangleMesh(node, cell)
+    mesh.uniform_refine(4)
+    return mesh
+
+def tet_mesh():
+    node = np.array([
+        (0.0, 0.0, 0.0),
+        (1.0, 0.0, 0.0),
+        (1.0, 1.0, 0.0),
+        (0.0, 1.0, 0.0),
+        (0.0, 0.0, 1.0),
+        (1.0, 0.0, 1.0),
+        (1.0, 1.0, 1.0),
+        (0.0, 1.0, 1.0)], dtype=np.float64)
+    cell = np.array([
+        (0, 1, 2, 6),
+        (0, 5, 1, 6),
+        (0, 4, 5, 6),
+        (0, 7, 4, 6),
+        (0, 3, 7, 6),
+        (0, 2, 3, 6)], dtype=np.int_)
+    mesh = TetrahedronMesh(node, cell)
+    mesh.uniform_refine(2)
+    return mesh
+
+def check_reorder(mesh, method, etypes):
+    # a random numbering to start from
+    rng = np.random.default_rng(0)
+    NN = mesh.number_of_nodes()
+    NC = mesh.number_of_cells()
+    mesh.renumber(rng.permutation(NN), rng.permutation(NC))
+
+    node = mesh.entity('node').copy()
+    entity = {etype:mesh.entity(etype).copy() for etype in ['cell'] + etypes}
+    measure = mesh.entity_measure('cell').copy()
+    mesh.nodedata['f'] = np.arange(NN)
+    mesh.celldata['f'] = np.arange(NC)
+
+    perm = mesh.reorder(method)
+
+    # the permutations
+    for etype in ['node', 'cell'] + etypes:
+        p = perm[etype]
+        assert np.all(np.sort(p) == np.arange(len(p)))
+    assert np.all(mesh.nodedata['f'] == perm['node'])
+    assert np.all(mesh.celldata['f'] == perm['cell'])
+
+    # the same mesh
+    assert np.all(mesh.entity('node') == node[perm['node']])
+    newMeasure = mesh.entity_measure('cell')
+    assert np.all(newMeasure > 0)
+    assert np.allclose(newMeasure, measure[perm['cell']])
+    assert np.isclose(np.sum(newMeasure), np.sum(measure))
+    for etype in ['cell'] + etypes:
+        a = perm['node'][mesh.entity(etype)]
+        b = entity[etype][perm[etype]]
+        if etype == 'cell':
+            # the same vertices in the same order
+            assert np.all(a == b)
+        else:
+            assert np.all(np.sort(a, axis=1) == np.sort(b, axis=1))
+
+    # the topology is consistent
+    cell = mesh.entity('cell')
+    edge = mesh.entity('edge')
+    localEdge = mesh.ds.localEdge
+    cell2edge = mesh.ds.cell_to_edge()
+    assert np.all(np.sort(cell[:, localEdge], axis=-1)
+            == np.sort(edge[cell2edge], axis=-1))
+    return perm
+
+def test_triangle_reorder():
+    for method in ['rcm', 'hilbert', 'morton']:
+        check_reorder(tri_mesh(), method, ['edge'])
+
+def test_tetrahedron_reorder():
+    for method in ['rcm', 'hilbert', 'morton']:
+        check_reorder(tet_mesh(), method, ['edge', 'face'])
+
+def test_rcm_bandwidth():
+    mesh = tri_mesh()
+    NN = mesh.number_of_nodes()
+    rng = np.random.default_rng(0)
+    mesh.renumber(rng.permutation(NN), np.arange(mesh.number_of_cells()))
+    edge = mesh.entity('edge')
+    b0 = np.max(np.abs(edge[:, 0] - edge[:, 1]))
+    mesh.reorder('rcm')
+    edge = mesh.entity('edge')
+    b1 = np.max(np.abs(edge[:, 0] - edge[:, 1]))
+    assert b1 < b0/4
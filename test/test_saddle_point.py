@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from fealpy.pde.darcy_forchheimer_2d import DarcyForchheimerdata1
+from fealpy.mg.DarcyFEMModel import DarcyP0P1
+
+
+def darcy_model(n=3):
+    pde = DarcyForchheimerdata1([-1, 1, -1, 1], 1, 1, 10, 0.1, 5, 1e-6, 2000, 3, 3)
+    mesh = pde.init_mesh(n)
+    return DarcyP0P1(pde, mesh, 1, mesh.integrator(3))
+
+def test_darcy_minres(capsys):
+    fem = darcy_model()
+    u0, p0 = fem.solve(solver='direct')
+    u1, p1 = fem.solve(solver='minres', tol=1e-12)
+    assert np.allclose(u1, u0, atol=1e-10)
+    assert np.allclose(p1, p0, atol=1e-10)
+    # `saddle_point_solve` is quiet unless `verbose` is set
+    assert 'Solve time' not in capsys.readouterr().out
+
+def test_darcy_unknown_solver():
+    fem = darcy_model(1)
+    with pytest.raises(ValueError):
+        fem.solve(solver='cg')
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+from fealpy.fem.doperator import stiff_matrix, mass_matrix
+from fealpy.solver.context import SolverContext
+
+
+def poisson_matrix(n=4):
+    """ The P1 stiffness plus mass matrix on the unit square
+    """
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    mesh = TriangleMesh(node, cell)
+    mesh.uniform_refine(n)
+    space = LagrangeFiniteElementSpace(mesh, 1)
+    qf = mesh.integrator(3)
+    area = mesh.area()
+    return (stiff_matrix(space, qf, area) + mass_matrix(space, qf, area)).tocsr()
+
+def residual(A, x, b):
+    return np.linalg.norm(b - A@x)/np.linalg.norm(b)
+
+@pytest.fixture(params=['direct', 'amg'])
+def method(request):
+    if request.param == 'amg':
+        pytest.importorskip('pyamg')
+    return request.param
+
+def test_hit_and_miss(method):
+    A = poisson_matrix()
+    b = np.random.rand(A.shape[0])
+    context = SolverContext(method=method)
+    x = context.solve(A, b)
+    assert residual(A, x, b) < 1e-10
+    x = context.solve(A.copy(), 2*b)
+    assert residual(A, x, 2*b) < 1e-10
+    assert context.info == {'hit':1, 'miss':1, 'reuse':0, 'evict':0}
+
+    # another matrix with the same pattern is set up without `reuse`
+    x = context.solve(2*A, b)
+    assert residual(2*A, x, b) < 1e-10
+    assert context.info['miss'] == 2
+    assert len(context) == 2
+
+def test_reuse(method):
+    A = poisson_matrix(6)
+    b = np.random.rand(A.shape[0])
+    context = SolverContext(method=method, reuse=True)
+    context.solve(A, b)
+    # the old setup preconditions the Krylov method on the new matrix
+    for s in [1.01, 1.02]:
+        x = context.solve(s*A, b)
+        assert residual(s*A, x, b) < context.reusetol
+    assert context.info == {'hit':0, 'miss':1, 'reuse':2, 'evict':0}
+    assert len(context) == 1
+
+    # the tolerance of the caller
+    x = context.solve(1.03*A, b, reusetol=1e-4)
+    assert 1e-12 < residual(1.03*A, x, b) < 1e-4
+    assert context.info['reuse'] == 3
+
+def test_reuse_fails():
+    A = poisson_matrix(6)
+    b = np.random.rand(A.shape[0])
+    context = SolverContext(method='direct', reuse=True, maxiter=2)
+    context.solve(A, b)
+    # a matrix far from `A`, the old factorization is dropped
+    B = A.copy()
+    B.data *= 1 + np.random.rand(B.nnz)
+    B = B + B.T
+    x = context.solve(B, b)
+    assert residual(B, x, b) < 1e-10
+    assert context.info == {'hit':0, 'miss':2, 'reuse':0, 'evict':0}
+    assert len(context) == 1
+    context.solve(B, b)
+    assert context.info['hit'] == 1
+
+def test_eviction(method):
+    A = poisson_matrix()
+    b = np.random.rand(A.shape[0])
+    context = SolverContext(method=method)
+    context.solve(A, b)
+    nbytes = context.nbytes
+    assert nbytes > 0
+
+    # room for two solvers
+    context = SolverContext(method=method, maxbytes=2*nbytes)
+    for s in [1, 2, 3]:
+        context.solve(s*A, b)
+    assert len(context) == 2
+    assert context.info['evict'] == 1
+    assert context.nbytes <= 2*nbytes
+    # `A` is gone, `3*A` is still there
+    context.solve(3*A, b)
+    assert context.info['hit'] == 1
+    context.solve(A, b)
+    assert context.info['miss'] == 4
+
+    # the last solver is kept even if it is over the budget
+    context = SolverContext(method=method, maxbytes=1)
+    context.solve(A, b)
+    context.solve(2*A, b)
+    assert len(context) == 1
+    assert context.info['evict'] == 1
+
+def test_version():
+    A = poisson_matrix()
+    b = np.random.rand(A.shape[0])
+    context = SolverContext(method='direct')
+    x0 = context.solve(A, b, version=0)
+    # with the same version the data is not hashed, so the old
+    # factorization is used although `A` has been changed in place
+    A.data *= 2
+    x = context.solve(A, b, version=0)
+    assert np.all(x == x0)
+    assert context.info['hit'] == 1
+    x = context.solve(A, b, version=1)
+    assert residual(A, x, b) < 1e-10
+    assert np.allclose(x, x0/2)
+    assert context.info['miss'] == 2
@@ -0,0 +1,108 @@
+import tracemalloc
+import numpy as np
+import pytest
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.mesh.TetrahedronMesh import TetrahedronMesh
+from fealpy.functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
+from fealpy.fem.doperator import stiff_matrix, cell_chunk_size, sparsity_pattern, Assembler
+
+
+def tri_mesh(n=3):
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    mesh = TriangleMesh(node, cell)
+    mesh.uniform_refine(n)
+    return mesh
+
+def tet_mesh(n=1):
+    node = np.array([
+        (0.0, 0.0, 0.0),
+        (1.0, 0.0, 0.0),
+        (1.0, 1.0, 0.0),
+        (0.0, 1.0, 0.0),
+        (0.0, 0.0, 1.0),
+        (1.0, 0.0, 1.0),
+        (1.0, 1.0, 1.0),
+        (0.0, 1.0, 1.0)], dtype=np.float64)
+    cell = np.array([
+        (0, 1, 2, 6),
+        (0, 5, 1, 6),
+        (0, 4, 5, 6),
+        (0, 7, 4, 6),
+        (0, 3, 7, 6),
+        (0, 2, 3, 6)], dtype=np.int_)
+    mesh = TetrahedronMesh(node, cell)
+    mesh.uniform_refine(n)
+    return mesh
+
+@pytest.mark.parametrize('workers', [None, 2])
+@pytest.mark.parametrize('init_mesh, p', [(tri_mesh, 2), (tet_mesh, 3)])
+def test_chunked_stiff_matrix(init_mesh, p, workers):
+    mesh = init_mesh()
+    space = LagrangeFiniteElementSpace(mesh, p)
+    qf = mesh.integrator(2*p)
+    measure = mesh.entity_measure('cell')
+    A = stiff_matrix(space, qf, measure)
+
+    maxmemory = 2**16
+    A1, nc = stiff_matrix(space, qf, measure, maxmemory=maxmemory,
+            workers=workers, returnchunk=True)
+    expected = cell_chunk_size(space, qf, maxmemory)
+    if workers is not None:
+        expected = min(expected, -(-mesh.number_of_cells()//workers))
+    assert nc == expected < mesh.number_of_cells()
+    assert A1.has_sorted_indices
+    assert A1.nnz == A.nnz
+    assert np.abs(A1 - A).max() < 1e-12
+
+    # the pattern of the assembler is used as it is
+    A2 = stiff_matrix(space, qf, measure, maxmemory=maxmemory,
+            assembler=Assembler(space))
+    assert np.abs(A2 - A).max() < 1e-12
+
+    # the quadrature path with a coefficient
+    cfun = lambda p: 1 + p[..., 0]**2
+    A = stiff_matrix(space, qf, measure, cfun=cfun, barycenter=False)
+    A1 = stiff_matrix(space, qf, measure, cfun=cfun, barycenter=False,
+            maxmemory=maxmemory, workers=workers)
+    assert np.abs(A1 - A).max() < 1e-12
+
+def test_sparsity_pattern():
+    mesh = tri_mesh()
+    space = LagrangeFiniteElementSpace(mesh, 2)
+    cell2dof = space.cell_to_dof()
+    gdof = space.number_of_global_dofs()
+    asm = Assembler(space)
+    for nrow in [None, 1, 7]:
+        indptr, indices = sparsity_pattern(cell2dof, gdof, nrow=nrow)
+        assert np.all(indptr == asm.indptr)
+        assert np.all(indices == asm.indices)
+
+def test_chunked_peak_memory():
+    mesh = tet_mesh(3)
+    space = LagrangeFiniteElementSpace(mesh, 3)
+    qf = mesh.integrator(4)
+    measure = mesh.entity_measure('cell')
+    space.cell_to_dof()
+    mesh.grad_lambda()
+
+    tracemalloc.start()
+    try:
+        A = stiff_matrix(space, qf, measure)
+        peak0 = tracemalloc.get_traced_memory()[1]
+        del A
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        A = stiff_matrix(space, qf, measure, maxmemory=2**20)
+        peak1 = tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+    # the element matrices and their index arrays are never made, only the
+    # CSR arrays, the keys of the pattern and the temporaries of one chunk
+    assert peak1 < peak0/3
+    assert peak1 < 4*8*A.nnz
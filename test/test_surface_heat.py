@@ -0,0 +1,62 @@
+import os
+import numpy as np
+import pytest
+
+from fealpy.mesh.level_set_function import Sphere
+from fealpy.functionspace.surface_lagrange_fem_space import SurfaceLagrangeFiniteElementSpace
+from fealpy.fem.SurfaceHeatFEMModel import SurfaceHeatFEMModel, TimeModel
+from fealpy.common import AsyncWriter
+
+
+def heat_model(method, NT=10, T=0.1):
+    """ `u_t = Δ_S u - u` on the unit sphere with `u(0) = z`, whose solution
+    is `z exp(-3t)`
+    """
+    surface = Sphere()
+    mesh = surface.init_mesh()
+    mesh.uniform_refine(2, surface)
+    V = SurfaceLagrangeFiniteElementSpace(mesh, surface, p=1)
+    w = V.function()
+    w[:] = 1
+    q0 = V.interpolation_points()[:, 2].copy()
+    tmodel = TimeModel(w, q0, np.linspace(0, T, NT+1))
+    return SurfaceHeatFEMModel(tmodel, V, mesh.integrator(3), method=method), q0
+
+@pytest.mark.parametrize('method', ['FM', 'BM', 'CN'])
+def test_surface_heat_run(method):
+    NT = 10
+    fem, q0 = heat_model(method, NT=NT)
+    fem.run()
+    assert fem.tmodel.stop()
+    # the matrix is factorized once and reused in the other steps
+    assert fem.context.info['miss'] == 1
+    assert fem.context.info['hit'] == NT - 1
+    u = q0*np.exp(-3*0.1)
+    # the explicit method is near its stability limit
+    tol = 0.1 if method == 'FM' else 0.01
+    assert np.abs(fem.uh - u).max() < tol
+
+def test_surface_heat_writer(tmp_path):
+    NT = 5
+    fem, q0 = heat_model('BM', NT=NT, T=0.05)
+    path = os.path.join(str(tmp_path), 'heat')
+    with AsyncWriter(maxsize=2) as writer:
+        fem.run(writer=writer, path=path)
+        # `run` has flushed the writer
+        assert sorted(os.listdir(path)) == ['surfaceHeat{}.npz'.format(i)
+                for i in range(NT+1)]
+    # only the current and the previous steps are kept in the model
+    assert fem.uh.shape == fem.uh0.shape == q0.shape
+    with np.load(os.path.join(path, 'surfaceHeat0.npz')) as data:
+        assert np.all(data['uh'] == q0)
+        assert data['t'] == 0
+    with np.load(os.path.join(path, 'surfaceHeat{}.npz'.format(NT-1))) as data:
+        assert np.all(data['uh'] == fem.uh0)
+    with np.load(os.path.join(path, 'surfaceHeat{}.npz'.format(NT))) as data:
+        assert np.all(data['uh'] == fem.uh)
+        assert np.isclose(data['t'], 0.05)
+
+def test_surface_heat_unknown_method():
+    fem, _ = heat_model('RK')
+    with pytest.raises(ValueError):
+        fem.run()
@@ -0,0 +1,121 @@
+import copy
+import numpy as np
+
+from fealpy.mesh.tree_data_structure import Quadtree, Octree
+from fealpy.common import DynamicArray
+
+
+class CoarsenMarker():
+    """ Coarsen the leaf cells whose barycenters are in the ball of radius
+    `r`, refine nothing
+
+    `Quadtree.coarsen` takes the parents of the cells to remove, and
+    `Octree.coarsen` the leaf cells themselves.
+    """
+    def __init__(self, r, parent=True):
+        self.r = r
+        self.parent = parent
+
+    def refine_marker(self, tmesh):
+        return None
+
+    def coarsen_marker(self, tmesh):
+        idx = tmesh.leaf_cell_index()
+        center = tmesh.entity_barycenter('cell')[idx]
+        idx = idx[np.sum(center**2, axis=1) < self.r**2]
+        if not self.parent:
+            return idx
+        idx = tmesh.parent[idx, 0]
+        return np.unique(idx[idx > -1])
+
+
+def copy_tree(mesh):
+    """ The same tree whose arrays are not in the buffers of `mesh`
+    """
+    other = copy.copy(mesh)
+    other.ds = copy.copy(mesh.ds)
+    other.buffers = {name:DynamicArray() for name in mesh.buffers}
+    other.node = mesh.node.copy()
+    other.ds.cell = mesh.ds.cell.copy()
+    other.parent = mesh.parent.copy()
+    other.child = mesh.child.copy()
+    return other
+
+def check_refine_coarsen(mesh, marker):
+    mesh.uniform_refine(3)
+    NC = mesh.number_of_cells()
+    NN = mesh.number_of_nodes()
+
+    # coarsened from copies, the buffers are rebuilt
+    other = copy_tree(mesh)
+    assert other.coarsen(marker)
+
+    # only a few cells are removed, so the rows are compacted in the
+    # buffers, and the arrays taken before see the new rows
+    old = mesh.ds.cell
+    capacity = [b.capacity() for b in mesh.buffers.values()]
+    assert mesh.coarsen(marker)
+    assert capacity == [b.capacity() for b in mesh.buffers.values()]
+    assert np.shares_memory(old, mesh.ds.cell)
+    assert np.all(old[:mesh.number_of_cells()] == mesh.ds.cell)
+
+    for name in ['node', 'parent', 'child']:
+        assert np.all(getattr(mesh, name) == getattr(other, name))
+    assert np.all(mesh.ds.cell == other.ds.cell)
+    assert mesh.number_of_cells() < NC
+    assert mesh.number_of_nodes() < NN
+    assert np.all(mesh.child[mesh.is_leaf_cell()] == -1)
+    assert np.all(mesh.ds.cell < mesh.number_of_nodes())
+
+    # the buffers keep working after `coarsen`
+    mesh.uniform_refine()
+    other.uniform_refine()
+    assert np.all(mesh.node == other.node)
+    assert np.all(mesh.ds.cell == other.ds.cell)
+    return mesh
+
+def test_compact():
+    buf = DynamicArray()
+    a = buf.extend(np.zeros((0, 2), dtype=np.int_), np.arange(200).reshape(-1, 2))
+    assert buf.capacity() == 200
+    b = a.copy()
+
+    # in place
+    flag = np.ones(100, dtype=np.bool_)
+    flag[[10, 50, 51]] = False
+    a1 = buf.compact(a, flag)
+    b = b[flag]
+    assert buf.capacity() == 200
+    assert np.shares_memory(a, a1)
+    assert np.all(a1 == b)
+
+    # less than a quarter is used, the buffer is shrunk
+    flag = np.arange(97) % 5 == 0
+    a2 = buf.compact(a1, flag)
+    assert buf.capacity() == 2*20
+    assert not np.shares_memory(a1, a2)
+    assert np.all(a2 == b[flag])
+
+def test_quadtree_refine_coarsen():
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(0, 1, 2, 3)], dtype=np.int_)
+    mesh = check_refine_coarsen(Quadtree(node, cell), CoarsenMarker(0.3))
+    isLeafCell = mesh.is_leaf_cell()
+    assert np.isclose(np.sum(mesh.entity_measure('cell')[isLeafCell]), 1)
+
+def test_octree_refine_coarsen():
+    node = np.array([
+        (0.0, 0.0, 0.0),
+        (1.0, 0.0, 0.0),
+        (1.0, 1.0, 0.0),
+        (0.0, 1.0, 0.0),
+        (0.0, 0.0, 1.0),
+        (1.0, 0.0, 1.0),
+        (1.0, 1.0, 1.0),
+        (0.0, 1.0, 1.0)], dtype=np.float64)
+    cell = np.array([(0, 1, 2, 3, 4, 5, 6, 7)], dtype=np.int_)
+    check_refine_coarsen(Octree(node, cell), CoarsenMarker(0.3, parent=False))
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.common import block_map, block_slices
+
+
+def unit_square_mesh(n=3):
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    mesh = TriangleMesh(node, cell)
+    mesh.uniform_refine(n)
+    return mesh
+
+
+def test_geometry_is_readonly():
+    mesh = unit_square_mesh()
+    area = mesh.area()
+    Dlambda = mesh.grad_lambda()
+    # the same data, no copies
+    assert np.shares_memory(area, mesh.area())
+    for a in [area, Dlambda]:
+        assert not a.flags.writeable
+        with pytest.raises(ValueError):
+            a[:] = 0
+        with pytest.raises(ValueError):
+            a.flags.writeable = True
+    area = area.copy()
+    area[:] = 0
+    assert np.allclose(np.sum(mesh.area()), 1)
+
+def test_geometry_follows_node():
+    mesh = unit_square_mesh()
+    assert np.isclose(np.sum(mesh.area()), 1)
+    mesh.node = 2*mesh.node
+    assert np.isclose(np.sum(mesh.area()), 4)
+    mesh.node *= 0.5
+    mesh.modified()
+    assert np.isclose(np.sum(mesh.area()), 1)
+
+def test_geometry_from_threads():
+    mesh = unit_square_mesh(4)
+    area = TriangleMesh.area(TriangleMesh(mesh.node, mesh.ds.cell))
+    NC = mesh.number_of_cells()
+    def kernel(idx):
+        mesh.modified()
+        return mesh.area()[idx], mesh.grad_lambda()[idx]
+    val = block_map(kernel, block_slices(NC, 16), workers=8)
+    assert np.allclose(np.concatenate([v[0] for v in val]), area)
+
+def test_topology_is_readonly():
+    mesh = unit_square_mesh()
+    ds = mesh.ds
+    for a in [ds.boundary_edge_flag(), ds.boundary_node_flag(), ds.cell_to_edge()]:
+        assert not a.flags.writeable
+        with pytest.raises(ValueError):
+            a[0] = 0
+
+    # the sparse matrices share the cached arrays, but not the matrix object
+    A = ds.node_to_node()
+    B = ds.node_to_node()
+    assert A is not B
+    assert np.shares_memory(A.data, B.data)
+    with pytest.raises(ValueError):
+        A.data[:] = 0
+    with pytest.raises(ValueError):
+        A.setdiag(1)
+    A.data = A.data + 1
+    assert (A != B).nnz == A.nnz
+    assert (B != ds.node_to_node()).nnz == 0
+
+def test_cache_bytes():
+    mesh = unit_square_mesh(4)
+    NC = mesh.number_of_cells()
+    # room for `area` but not for `grad_lambda`
+    mesh.maxcachebytes = 8*NC*4
+    mesh.area()
+    assert np.shares_memory(mesh.area(), mesh.area())
+    assert mesh._versionedcache['nbytes'] == 8*NC
+    Dlambda = mesh.grad_lambda()
+    assert Dlambda.flags.writeable
+    assert not np.shares_memory(Dlambda, mesh.grad_lambda())
+    assert mesh._versionedcache['nbytes'] == 8*NC
+
+    # the least recently used results are dropped
+    mesh.entity_barycenter('cell')
+    assert mesh._versionedcache['nbytes'] == 3*8*NC
+    mesh.edge_length()
+    data = mesh._versionedcache['data']
+    assert [k[0] for k in data] == ['entity_barycenter', 'edge_length']
+    assert mesh._versionedcache['nbytes'] <= mesh.maxcachebytes
+
+def test_topology_follows_refine():
+    mesh = unit_square_mesh(1)
+    NBE = np.sum(mesh.ds.boundary_edge_flag())
+    NC = mesh.number_of_cells()
+    mesh.uniform_refine()
+    assert np.sum(mesh.ds.boundary_edge_flag()) == 2*NBE
+    assert mesh.ds.cell_to_edge().shape == (4*NC, 3)
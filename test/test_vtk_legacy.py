@@ -0,0 +1,107 @@
+import os
+import numpy as np
+import pytest
+
+from fealpy.mesh.vtkio import read_vtk, load_vtk_mesh, cell_starts
+
+path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+# file : (mesh type, VTK cell type, NN, NC, point data, cell data)
+fixtures = {
+    '3_circle_test.vtk':('QuadrangleMesh', 9, 1765, 1631, ['fixed'], ['fixed']),
+    'ballmesh.vtk':('TetrahedronMesh', 10, 587, 2696, [], []),
+    'fourquad.vtk':('QuadrangleMesh', 9, 9, 4, ['fixed'], []),
+    'hole_in_square.vtk':('QuadrangleMesh', 9, 168, 140, ['fixed'], []),
+    'hole_in_square_opt.vtk':('QuadrangleMesh', 9, 168, 140, ['fixed'], ['quality']),
+    'initialmesh-fixed-part.vtk':('QuadrangleMesh', 9, 4360, 4201,
+        ['cellsdata', 'fixed'], ['cellsdata']),
+    'shashkov.vtk':('TriangleMesh', 5, 4225, 8192, ['fixed'], []),
+    'twotets.vtk':('TetrahedronMesh', 10, 4, 1, [], []),
+    }
+
+def ascii_cells(fileName):
+    """ The rows of the `CELLS` section, split without the reader
+    """
+    with open(fileName, 'rb') as fp:
+        buf = fp.read()
+    i = buf.index(b'CELLS')
+    j = buf.index(b'CELL_TYPES')
+    a = buf[i:j].split()
+    NC = int(a[1])
+    return np.array(a[3:], dtype=np.int_).reshape(NC, -1)
+
+@pytest.mark.parametrize('f', sorted(fixtures))
+def test_load_vtk_fixture(f):
+    name, t, NN, NC, nodedata, celldata = fixtures[f]
+    fileName = os.path.join(path, f)
+    node, cell, cellLocation, cellType, _, _ = read_vtk(fileName)
+    assert node.shape == (NN, 3)
+    assert np.all(cellType == t)
+    assert cellType.shape == (NC, )
+
+    mesh = load_vtk_mesh(fileName)
+    assert type(mesh).__name__ == name
+    assert mesh.number_of_nodes() == NN
+    assert mesh.number_of_cells() == NC
+    assert sorted(mesh.nodedata) == nodedata
+    assert sorted(mesh.celldata) == celldata
+    for key in nodedata:
+        assert len(mesh.nodedata[key]) == NN
+    for key in celldata:
+        assert len(mesh.celldata[key]) == NC
+
+    a = ascii_cells(fileName)
+    nv = a.shape[1] - 1
+    assert np.all(a[:, 0] == nv)
+    assert np.all(mesh.ds.cell == a[:, 1:])
+    assert np.all(cellLocation == nv*np.arange(NC+1))
+    # the optimized `hole_in_square_opt.vtk` has nan nodes
+    assert np.array_equal(mesh.node, node[:, :mesh.node.shape[1]], equal_nan=True)
+
+def test_load_vtk_mixed_cells(tmp_path):
+    f = os.path.join(str(tmp_path), 'mixed.vtk')
+    with open(f, 'w') as fp:
+        fp.write("# vtk DataFile Version 3.0\n"
+                "two cells\n"
+                "ASCII\n"
+                "DATASET UNSTRUCTURED_GRID\n"
+                "POINTS 5 double\n"
+                "0 0 0 1 0 0 1 1 0 0 1 0 2 0.5 0\n"
+                "CELLS 2 9\n"
+                "4 0 1 2 3\n"
+                "3 1 4 2\n"
+                "CELL_TYPES 2\n"
+                "9\n"
+                "5\n"
+                "CELL_DATA 2\n"
+                "SCALARS id int 1\n"
+                "LOOKUP_TABLE default\n"
+                "7 8\n")
+    node, cell, cellLocation, cellType, _, celldata = read_vtk(f)
+    assert np.all(cell == [0, 1, 2, 3, 1, 4, 2])
+    assert np.all(cellLocation == [0, 4, 7])
+    assert np.all(cellType == [9, 5])
+    assert np.all(celldata['id'] == [7, 8])
+
+    mesh = load_vtk_mesh(f)
+    assert type(mesh).__name__ == 'PolygonMesh'
+    assert mesh.number_of_cells() == 2
+    assert np.allclose(mesh.entity_measure('cell'), [1, 0.5])
+
+@pytest.mark.parametrize('NC', [1, 2, 7, 64, 1000])
+def test_cell_starts(NC):
+    rng = np.random.default_rng(NC)
+    NV = rng.integers(1, 9, NC)
+    start = np.zeros(NC, dtype=np.int_)
+    start[1:] = np.cumsum(NV + 1)[:-1]
+    cells = rng.integers(0, 10, NC + NV.sum())
+    cells[start] = NV
+    assert np.all(cell_starts(cells, NC) == start)
+    # too few and too many values
+    with pytest.raises(ValueError):
+        cell_starts(cells[:-1], NC)
+    with pytest.raises(ValueError):
+        cell_starts(np.r_[cells, 1, 0], NC)
+    if NC > 1:
+        with pytest.raises(ValueError):
+            cell_starts(cells, NC - 1)
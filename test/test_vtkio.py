@@ -0,0 +1,74 @@
+import os
+import re
+import numpy as np
+
+from fealpy.mesh.TriangleMesh import TriangleMesh
+from fealpy.mesh.tree_data_structure import Quadtree
+from fealpy.mesh.vtkio import write_vtu_mesh, vtkDataType
+
+
+def read_vtu(fileName):
+    """ The piece sizes and the appended arrays of a `.vtu` file written by
+    `write_vtu_mesh`
+    """
+    with open(fileName, 'rb') as fp:
+        buf = fp.read()
+    i = buf.index(b'<AppendedData encoding="raw">')
+    xml = buf[:i].decode('utf-8')
+    data = buf[buf.index(b'_', i) + 1:]
+    NN, NC = map(int, re.search(
+        r'NumberOfPoints="(\d+)" NumberOfCells="(\d+)"', xml).groups())
+    dtypes = {val:np.dtype(key) for key, val in vtkDataType.items()}
+    arrays = {}
+    for t, name, ncomp, offset in re.findall(
+            r'type="(\w+)" Name="(\w+)" NumberOfComponents="(\d+)" '
+            r'format="appended" offset="(\d+)"', xml):
+        offset = int(offset)
+        n = int(np.frombuffer(data[offset:offset+8], dtype='<u8')[0])
+        val = np.frombuffer(data[offset+8:offset+8+n], dtype=dtypes[t].newbyteorder('<'))
+        arrays[name] = val.reshape(-1, int(ncomp)) if int(ncomp) > 1 else val
+    return NN, NC, arrays
+
+def test_write_vtu_triangle(tmp_path):
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int_)
+    mesh = TriangleMesh(node, cell)
+    mesh.uniform_refine(2)
+    NN = mesh.number_of_nodes()
+    NC = mesh.number_of_cells()
+    f = os.path.join(str(tmp_path), 'tri.vtu')
+    write_vtu_mesh(f, mesh, nodedata={'u':mesh.node[:, 0]},
+            celldata={'flag':np.arange(NC) % 2 == 0})
+    NN1, NC1, arrays = read_vtu(f)
+    assert (NN1, NC1) == (NN, NC)
+    assert np.all(arrays['Points'][:, :2] == mesh.node)
+    assert np.all(arrays['connectivity'] == mesh.ds.cell.reshape(-1))
+    assert np.all(arrays['types'] == 5)
+    assert np.all(arrays['u'] == mesh.node[:, 0])
+    assert np.all(arrays['flag'] == (np.arange(NC) % 2 == 0))
+
+def test_write_vtu_quadtree_leaves(tmp_path):
+    node = np.array([
+        (0.0, 0.0),
+        (1.0, 0.0),
+        (1.0, 1.0),
+        (0.0, 1.0)], dtype=np.float64)
+    cell = np.array([(0, 1, 2, 3)], dtype=np.int_)
+    mesh = Quadtree(node, cell)
+    mesh.uniform_refine(2)
+    NC = mesh.number_of_cells()
+    idx = mesh.leaf_cell_index()
+    mesh.celldata['level'] = np.arange(NC)
+    f = os.path.join(str(tmp_path), 'quadtree.vtu')
+    write_vtu_mesh(f, mesh, celldata={'eta':np.ones(len(idx))})
+    NN1, NC1, arrays = read_vtu(f)
+    assert NC1 == len(idx) < NC
+    assert np.all(arrays['connectivity'] == mesh.ds.cell[idx].reshape(-1))
+    assert np.all(arrays['offsets'] == 4*np.arange(1, NC1+1))
+    assert np.all(arrays['types'] == 9)
+    assert np.all(arrays['level'] == idx)
+    assert np.all(arrays['eta'] == 1)